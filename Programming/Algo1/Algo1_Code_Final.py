@@ -1,12 +1,20 @@
-import requests
+import os
 import signal
-import time
-from time import sleep
+import sys
+from time import perf_counter_ns, sleep
 
-Port = 10010
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.book import DepthBook, cross_depth
+from rit.client import RitClient
+from rit.clock import CaseClock
+from rit.hedge import QuoteHedger
+from rit.latency import LatencyRecorder
+from rit.legs import balance_legs
+from rit.ratelimit import TokenBucket
+from rit.tape import TapeRecorder
 
-class ApiException(Exception):
-    pass
+Port = 10010
 
 # Signal handler for graceful shutdown
 def signal_handler(signum, frame):
@@ -22,10 +30,29 @@ shutdown = False
 ORDER_LIMIT = 10  # orders per second (adjust based on actual rate limit)
 MAX_ORDER_SIZE = 10000
 POSITION_LIMIT = 25000
+TRADING_FEES = {'CRZY_M': 0.00, 'CRZY_A': 0.00}  # per-share market order fee on each venue (none in ALGO1)
+
+# Once the top of book crosses, fetch this many levels of both books and size the trade
+# by walking them against each other (rit.book.cross_depth); 0 sizes on the top level only
+DEPTH_LEVELS = 0
+
+# Send orders over raw keep-alive sockets with pre-built request bytes (rit/wire.py)
+RAW_ORDERS = False
 
-# Speed bump tracking
+# Re-send a /securities call that is slower than the p90 and take the first answer (rit/hedge.py)
+HEDGE_QUOTES = False
+quote_hedger = QuoteHedger() if HEDGE_QUOTES else None
+
+# Order rate limiting
+order_limiter = TokenBucket(ORDER_LIMIT)
 number_of_orders = 0
-total_speedbumps = 0
+
+# Latency histograms (quote_fetch, decision, order_rtt, leg_skew, quote_to_fill)
+latency = LatencyRecorder()
+LATENCY_FILE = None  # e.g. 'latency_period{period}.json' to save them at the end of each period
+
+# Tick tape of every case/securities response we see, for offline replay (rit/tape.py)
+RECORD_DIR = None  # e.g. 'tapes/run1'
 
 # Statistics tracking
 opportunities_found = 0
@@ -33,139 +60,124 @@ trades_executed = 0
 evaluations = 0
 expected_total_profit = 0
 
-def get_tick(session):
+def get_tick(client):
     """Get current tick of the case"""
-    resp = session.get(f'http://localhost:{Port}/v1/case')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    case = resp.json()
-    return case['tick'], case['status'], case['period']
+    return client.tick()
 
-def get_limits(session):
+def get_limits(client):
     """Get current trading limits"""
-    resp = session.get(f'http://localhost:{Port}/v1/limits')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    
-    limits = resp.json()
-    
-    for limit in limits:
-        if limit['name'] == 'LIMIT-STOCK':
-            return limit['gross'], limit['net'], limit['gross_limit'], limit['net_limit']
-    
-    return 0, 0, POSITION_LIMIT, POSITION_LIMIT
+    limit = client.stock_limit()
+    if limit is None:
+        return 0, 0, POSITION_LIMIT, POSITION_LIMIT
+    return limit
 
-def get_securities(session):
+def get_securities(client):
     """
     Get securities data - ONE API call for both tickers!
-    Returns bid, ask, bid_size, ask_size for both CRZY_M and CRZY_A
-    Also returns realized profit
+    Returns the Quote records (rit.records) for CRZY_M and CRZY_A
+    plus realized profit
     """
-    resp = session.get(f'http://localhost:{Port}/v1/securities')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
+    if quote_hedger is not None:
+        quotes = quote_hedger.call(client.quotes)
+    else:
+        quotes = client.quotes()
     
-    securities = resp.json()
+    crzy_m = quotes.get('CRZY_M')
+    crzy_a = quotes.get('CRZY_A')
     
-    crzy_m = None
-    crzy_a = None
-    total_realized = 0
-    
-    for security in securities:
-        if security['ticker'] == 'CRZY_M':
-            crzy_m = security
-        elif security['ticker'] == 'CRZY_A':
-            crzy_a = security
-        
-        # Sum up realized profits while we're at it
-        if security['ticker'] in ['CRZY_M', 'CRZY_A']:
-            total_realized += security.get('realized', 0)
+    # Sum up realized profits while we're at it
+    total_realized = sum(quote.realized for quote in (crzy_m, crzy_a) if quote is not None)
     
     return crzy_m, crzy_a, total_realized/2
 
-def submit_order(session, ticker, action, quantity):
-    """Submit a market order"""
-    params = {
-        'ticker': ticker,
-        'type': 'MARKET',
-        'quantity': quantity,
-        'action': action
-    }
+def submit_order(client, ticker, action, quantity):
+    """Submit a market order (waits for the rate limiter first)"""
+    global number_of_orders
     
-    resp = session.post(f'http://localhost:{Port}/v1/orders', params=params)
+    order_limiter.acquire()
+    number_of_orders += 1
+    sent = perf_counter_ns()
+    resp = client.post_order(ticker, action, quantity)
+    latency.record('order_rtt', perf_counter_ns() - sent)
     
     if resp.status_code == 429:
-        # Rate limited
+        # Rate limited - hold back the next orders instead of sleeping here
         wait_time = resp.json().get('wait', 1)
-        print(f"⚠️ Rate limited! Waiting {wait_time:.2f} seconds...")
-        sleep(wait_time)
+        print(f"⚠️ Rate limited! Pausing orders for {wait_time:.2f} seconds...")
+        order_limiter.penalize(wait_time)
         return None
     
     if resp.status_code != 200:
         print(f"⚠️ Order failed: {resp.json()}")
         return None
     
-    return resp.json()
+    return decode.order(resp.content)
 
-def speedbump(transaction_time):
-    """Calculate and apply speed bump"""
-    global total_speedbumps
-    global number_of_orders
-    
-    # Calculate speed bump for current order
-    order_speedbump = -transaction_time + 1/ORDER_LIMIT
-    
-    # Add to total
-    total_speedbumps = total_speedbumps + order_speedbump
+def size_cross(client, buy_ticker, sell_ticker, buy_quote, sell_quote):
+    """(quantity, buy_vwap, sell_vwap, expected_profit) of buying on buy_ticker and selling on sell_ticker
     
-    # Increment order counter
-    number_of_orders = number_of_orders + 1
-    
-    # Sleep for average speed bump (only if positive)
-    avg_speedbump = total_speedbumps / number_of_orders
-    if avg_speedbump > 0:
-        sleep(avg_speedbump)
+    The buy venue's asks are walked against the sell venue's bids up to the
+    quantity where profit after fees peaks, capped at MAX_ORDER_SIZE
+    """
+    if DEPTH_LEVELS:
+        asks = client.levels(buy_ticker, DEPTH_LEVELS)[1]
+        bids = client.levels(sell_ticker, DEPTH_LEVELS)[0]
+        asks = DepthBook.from_arrays([level.price for level in asks], [level.remaining for level in asks], 'asks')
+        bids = DepthBook.from_arrays([level.price for level in bids], [level.remaining for level in bids], 'bids')
+    else:
+        asks = DepthBook.from_arrays([buy_quote.ask], [buy_quote.ask_size], 'asks')
+        bids = DepthBook.from_arrays([sell_quote.bid], [sell_quote.bid_size], 'bids')
+    return cross_depth(asks, bids, TRADING_FEES[buy_ticker], TRADING_FEES[sell_ticker], MAX_ORDER_SIZE)
 
-def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sell_price):
-    """Execute arbitrage by buying on one exchange and selling on the other"""
+def execute_arbitrage(client, buy_ticker, sell_ticker, quantity, buy_price, sell_price, quoted_ns):
+    """Execute arbitrage by buying on one exchange and selling on the other
+    
+    quoted_ns is the perf_counter_ns() at which the triggering quote arrived
+    """
     global expected_total_profit
     
     expected_profit = (sell_price - buy_price) * quantity
     
     print(f"\n{'='*70}")
     print(f"   ARBITRAGE OPPORTUNITY DETECTED!")
-    print(f"   Buy  {quantity:,} shares on {buy_ticker} @ ${buy_price:.2f}")
-    print(f"   Sell {quantity:,} shares on {sell_ticker} @ ${sell_price:.2f}")
+    print(f"   Buy  {quantity:,} shares on {buy_ticker} @ ${buy_price:.4f}")
+    print(f"   Sell {quantity:,} shares on {sell_ticker} @ ${sell_price:.4f}")
     print(f"   Expected profit: ${expected_profit:.2f}")
     print(f"{'='*70}")
     
     # Execute buy order
-    start_time = time.time()
-    buy_order = submit_order(session, buy_ticker, 'BUY', quantity)
-    buy_time = time.time() - start_time
+    latency.record('decision', perf_counter_ns() - quoted_ns)
+    buy_order = submit_order(client, buy_ticker, 'BUY', quantity)
+    buy_done = perf_counter_ns()
     
     if buy_order is None:
         print("❌ BUY order failed!")
         return False
     
-    print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.2f} on {buy_ticker}")
-    speedbump(buy_time)
+    print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.2f} on {buy_ticker}")
     
     # Execute sell order
-    start_time = time.time()
-    sell_order = submit_order(session, sell_ticker, 'SELL', quantity)
-    sell_time = time.time() - start_time
+    sell_order = submit_order(client, sell_ticker, 'SELL', quantity)
+    sell_done = perf_counter_ns()
     
-    if sell_order is None:
-        print("❌ SELL order failed!")
-        return False
+    # Uneven legs leave unhedged inventory; trade the difference away right now
+    if sell_order is None or sell_order.quantity_filled != buy_order.quantity_filled:
+        if sell_order is None:
+            print("❌ SELL order failed!")
+        balance_legs(lambda ticker, action, qty: submit_order(client, ticker, action, qty),
+                     buy_ticker, sell_ticker, buy_order.quantity_filled,
+                     sell_order.quantity_filled if sell_order else 0, quotes=client.quotes)
+        if sell_order is None:
+            return False
+    
+    latency.record('leg_skew', sell_done - buy_done)
+    latency.record('quote_to_fill', sell_done - quoted_ns)
     
-    print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.2f} on {sell_ticker}")
-    speedbump(sell_time)
+    print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.2f} on {sell_ticker}")
     
     # Calculate actual profit
-    filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-    actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+    filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+    actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
     
     # Add to expected total profit
     expected_total_profit += expected_profit
@@ -175,14 +187,14 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
     
     return True
 
-def wait_for_case_start(session):
+def wait_for_case_start(client):
     """Wait for the case to start (status = ACTIVE and ticks moving)"""
     print("⏳ Waiting for case to start...")
     
     last_tick = -1
     while not shutdown:
         try:
-            tick, status, period = get_tick(session)
+            tick, status, period = get_tick(client)
             
             if status == 'ACTIVE':
                 if tick > last_tick or tick == 0:
@@ -212,14 +224,20 @@ def print_period_stats(realized_profit, period):
     print(f"   Total orders submitted: {number_of_orders}")
     print(f"   Expected total profit: ${expected_total_profit:.2f}")
     print(f"   Actual realized profit: ${realized_profit:.2f}")
+    print(latency.report())
+    if quote_hedger is not None:
+        print(quote_hedger.report())
     print("="*70 + "\n")
+    
+    if LATENCY_FILE:
+        latency.dump(LATENCY_FILE.format(period=period))
 
 def main():
     global shutdown, opportunities_found, trades_executed, evaluations, expected_total_profit
-    global number_of_orders, total_speedbumps
+    global number_of_orders
     
-    with requests.Session() as s:
-        s.headers.update(API_KEY)
+    recorder = TapeRecorder(RECORD_DIR) if RECORD_DIR else None
+    with RitClient(Port, API_KEY, recorder=recorder, raw_orders=RAW_ORDERS) as s:
         # Get current limits
         gross_position, net_position, gross_limit, net_limit = get_limits(s)
         
@@ -243,9 +261,12 @@ def main():
         last_status = 'ACTIVE'
         last_realized = 0
         
+        # Tick/status/period from a local clock; /case is only read around tick boundaries
+        clock = CaseClock(s)
+        
         while not shutdown:
             try:
-                tick, status, period = get_tick(s)
+                tick, status, period = clock.read()
                 
                 # Check if we've moved to a new period (case restarted)
                 if period != last_period:
@@ -260,7 +281,9 @@ def main():
                         evaluations = 0
                         expected_total_profit = 0
                         number_of_orders = 0
-                        total_speedbumps = 0
+                        latency.reset()
+                        if quote_hedger is not None:
+                            quote_hedger.reset()
                     
                     last_period = period
                 
@@ -289,68 +312,60 @@ def main():
                 #     continue
                 
                 # Get securities data - ONE CALL for both tickers!
+                fetch_start = perf_counter_ns()
                 crzy_m, crzy_a, last_realized = get_securities(s)
+                quoted_ns = perf_counter_ns()
+                latency.record('quote_fetch', quoted_ns - fetch_start)
                 
-                # Check if we got valid data
+                # Check if we got valid data (missing quotes may mean the case stopped)
                 if crzy_m is None or crzy_a is None:
+                    clock.poke()
                     sleep(0.1)
                     continue
                 
+                # Extract bid/ask from securities response
+                crzy_m_bid = crzy_m.bid
+                crzy_m_ask = crzy_m.ask
+                
+                crzy_a_bid = crzy_a.bid
+                crzy_a_ask = crzy_a.ask
+                
                 # Check if we have valid bid/ask (non-zero)
-                if crzy_m['bid'] == 0 or crzy_m['ask'] == 0:
+                if crzy_m_bid == 0 or crzy_m_ask == 0:
+                    clock.poke()
                     sleep(0.1)
                     continue
                     
-                if crzy_a['bid'] == 0 or crzy_a['ask'] == 0:
+                if crzy_a_bid == 0 or crzy_a_ask == 0:
+                    clock.poke()
                     sleep(0.1)
                     continue
                 
                 # Increment evaluation counter
                 evaluations += 1
                 
-                # Extract bid/ask from securities response
-                crzy_m_bid = crzy_m['bid']
-                crzy_m_ask = crzy_m['ask']
-                crzy_m_bid_size = crzy_m['bid_size']
-                crzy_m_ask_size = crzy_m['ask_size']
-                
-                crzy_a_bid = crzy_a['bid']
-                crzy_a_ask = crzy_a['ask']
-                crzy_a_bid_size = crzy_a['bid_size']
-                crzy_a_ask_size = crzy_a['ask_size']
-                
                 # Check for arbitrage opportunities
                 
                 # Opportunity 1: Buy on Main, Sell on Alternate (M ask < A bid)
                 if crzy_m_ask < crzy_a_bid:
                     opportunities_found += 1
                     
-                    # Calculate maximum quantity we can trade
-                    max_quantity = min(
-                        crzy_m_ask_size,      # Liquidity on Main ask
-                        crzy_a_bid_size,      # Liquidity on Alternate bid
-                        MAX_ORDER_SIZE,       # Per-order limit
-                        # remaining_capacity    # Position limit
-                    )
+                    # Size the trade on the depth both books have on the crossing sides
+                    quantity, buy_vwap, sell_vwap, _ = size_cross(s, 'CRZY_M', 'CRZY_A', crzy_m, crzy_a)
                     
-                    if max_quantity > 0:
-                        if execute_arbitrage(s, 'CRZY_M', 'CRZY_A', max_quantity, crzy_m_ask, crzy_a_bid):
+                    if quantity > 0:
+                        if execute_arbitrage(s, 'CRZY_M', 'CRZY_A', quantity, buy_vwap, sell_vwap, quoted_ns):
                             trades_executed += 1
                 
                 # Opportunity 2: Buy on Alternate, Sell on Main (A ask < M bid)
                 elif crzy_a_ask < crzy_m_bid:
                     opportunities_found += 1
                     
-                    # Calculate maximum quantity we can trade
-                    max_quantity = min(
-                        crzy_a_ask_size,      # Liquidity on Alternate ask
-                        crzy_m_bid_size,      # Liquidity on Main bid
-                        MAX_ORDER_SIZE,       # Per-order limit
-                        # remaining_capacity    # Position limit
-                    )
+                    # Size the trade on the depth both books have on the crossing sides
+                    quantity, buy_vwap, sell_vwap, _ = size_cross(s, 'CRZY_A', 'CRZY_M', crzy_a, crzy_m)
                     
-                    if max_quantity > 0:
-                        if execute_arbitrage(s, 'CRZY_A', 'CRZY_M', max_quantity, crzy_a_ask, crzy_m_bid):
+                    if quantity > 0:
+                        if execute_arbitrage(s, 'CRZY_A', 'CRZY_M', quantity, buy_vwap, sell_vwap, quoted_ns):
                             trades_executed += 1
                 
                 # Print status every 20 evaluations to show we're alive
@@ -374,6 +389,11 @@ def main():
         print(f"   Total orders submitted: {number_of_orders}")
         print(f"   Expected total profit: ${expected_total_profit:.2f}")
         print(f"   Actual realized profit: ${last_realized/2:.2f}")
+        print(f"   /case polls: {clock.polls} for {clock.reads} clock reads")
+        print(latency.report())
+        if quote_hedger is not None:
+            print(quote_hedger.report())
+            quote_hedger.close()
         print("="*70 + "\n")
 
 if __name__ == '__main__':
@@ -1,9 +1,15 @@
+import os
+import sys
 import requests
 import signal
-import time
 from time import sleep
 import concurrent.futures
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.legs import balance_legs
+from rit.ratelimit import TokenBucket
+
 Port = 10012
 
 class ApiException(Exception):
@@ -24,9 +30,9 @@ ORDER_LIMIT = 10  # orders per second
 MAX_ORDER_SIZE = 10000
 POSITION_LIMIT = 25000
 
-# Speed bump tracking
+# Order rate limiting
+order_limiter = TokenBucket(ORDER_LIMIT)
 number_of_orders = 0
-total_speedbumps = 0
 
 # Statistics tracking
 opportunities_found = 0
@@ -56,24 +62,16 @@ def get_limits(session):
     return 0, 0, POSITION_LIMIT, POSITION_LIMIT
 
 def get_securities(session):
-    """Get securities data"""
+    """Quote records (rit.records) for CRZY_M and CRZY_A plus realized profit"""
     resp = session.get(f'http://localhost:{Port}/v1/securities')
     if resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    securities = resp.json()
-    crzy_m = None
-    crzy_a = None
-    total_realized = 0
+    quotes = decode.quotes(resp.content)
+    crzy_m = quotes.get('CRZY_M')
+    crzy_a = quotes.get('CRZY_A')
     
-    for security in securities:
-        if security['ticker'] == 'CRZY_M':
-            crzy_m = security
-        elif security['ticker'] == 'CRZY_A':
-            crzy_a = security
-        
-        if security['ticker'] in ['CRZY_M', 'CRZY_A']:
-            total_realized += security.get('realized', 0)
+    total_realized = sum(quote.realized for quote in (crzy_m, crzy_a) if quote is not None)
     
     return crzy_m, crzy_a, total_realized/2
 
@@ -91,40 +89,27 @@ def submit_order(session, ticker, action, quantity):
         
         if resp.status_code == 429:
             print(f"⚠️ Rate limited on {ticker}!")
+            order_limiter.penalize(resp.json().get('wait', 1))
             return None
         
         if resp.status_code != 200:
             print(f"⚠️ Order failed on {ticker}: {resp.json()}")
             return None
             
-        return resp.json()
+        return decode.order(resp.content)
     except Exception as e:
         print(f"⚠️ Exception sending order to {ticker}: {e}")
         return None
 
-def speedbump(transaction_time):
-    """Calculate and apply speed bump"""
-    global total_speedbumps
+def hedge_order(session, ticker, action, quantity):
+    """Submit an order that evens out the two legs (the caller takes the permit)"""
     global number_of_orders
-    
-    # Calculate speed bump for current order
-    # debt = (1/rate) - (time_spent)
-    order_speedbump = -transaction_time + 1/ORDER_LIMIT
-    
-    # Add to total debt
-    total_speedbumps = total_speedbumps + order_speedbump
-    
-    # Increment order counter
-    number_of_orders = number_of_orders + 1
-    
-    # Sleep if we have positive debt
-    avg_speedbump = total_speedbumps / number_of_orders
-    if avg_speedbump > 0:
-        sleep(avg_speedbump)
+    number_of_orders += 1
+    return submit_order(session, ticker, action, quantity)
 
 def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sell_price):
     """Execute arbitrage using PARALLEL THREADS"""
-    global expected_total_profit
+    global expected_total_profit, number_of_orders
     
     expected_profit = (sell_price - buy_price) * quantity
     
@@ -136,7 +121,9 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
     print(f"{'='*70}")
     
     # --- STEP 1: Execute BOTH orders in PARALLEL ---
-    start_time = time.time()
+    # Both legs leave together, so take both permits up front
+    order_limiter.acquire(2)
+    number_of_orders += 2
     
     with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
         # Submit both tasks simultaneously
@@ -146,41 +133,33 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
         # Wait for both to complete
         buy_order = future_buy.result()
         sell_order = future_sell.result()
-        
-    end_time = time.time()
-    elapsed = end_time - start_time
     
     # --- STEP 2: Process Results ---
     
     # Check Buy
     if buy_order:
-        print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.2f} on {buy_ticker}")
+        print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.2f} on {buy_ticker}")
     else:
         print("❌ BUY order failed!")
 
     # Check Sell
     if sell_order:
-        print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.2f} on {sell_ticker}")
+        print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.2f} on {sell_ticker}")
     else:
         print("❌ SELL order failed!")
 
-    if not buy_order or not sell_order:
-        # Partial fill risk management would go here (e.g., dump the position)
-        pass
+    # Uneven legs (a failed or partly filled side) leave unhedged inventory:
+    # trade the difference away right now, through the same order limiter
+    bought = buy_order.quantity_filled if buy_order else 0
+    sold = sell_order.quantity_filled if sell_order else 0
+    if bought != sold:
+        balance_legs(lambda ticker, action, qty: hedge_order(session, ticker, action, qty),
+                     buy_ticker, sell_ticker, bought, sold, limiter=order_limiter)
 
-    # --- STEP 3: Pay the Rate Limit Debt ---
-    # We made 2 API calls. We must call speedbump twice.
-    # 1. First call: We claim the actual elapsed time.
-    speedbump(elapsed)
-    
-    # 2. Second call: We claim 0 time passed (since they happened simultaneously).
-    #    This ensures we pay the "debt" for the second order completely in sleep.
-    speedbump(0)
-    
     # Calculate stats if both succeeded
     if buy_order and sell_order:
-        filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-        actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+        filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+        actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
         expected_total_profit += expected_profit
         print(f"Actual profit: ${actual_profit:.2f}")
         print(f"{'='*70}\n")
@@ -223,7 +202,7 @@ def print_period_stats(realized_profit, period):
 
 def main():
     global shutdown, opportunities_found, trades_executed, evaluations, expected_total_profit
-    global number_of_orders, total_speedbumps
+    global number_of_orders
     
     with requests.Session() as s:
         s.headers.update(API_KEY)
@@ -260,7 +239,6 @@ def main():
                         evaluations = 0
                         expected_total_profit = 0
                         number_of_orders = 0
-                        total_speedbumps = 0
                     last_period = period
                 
                 # Status Change Detection
@@ -281,7 +259,7 @@ def main():
                     sleep(0.1)
                     continue
                 
-                if crzy_m['bid'] == 0 or crzy_m['ask'] == 0 or crzy_a['bid'] == 0 or crzy_a['ask'] == 0:
+                if crzy_m.bid == 0 or crzy_m.ask == 0 or crzy_a.bid == 0 or crzy_a.ask == 0:
                     sleep(0.1)
                     continue
                 
@@ -290,19 +268,19 @@ def main():
                 # --- ARBITRAGE LOGIC ---
                 
                 # Check Arbitrage M -> A
-                if crzy_m['ask'] < crzy_a['bid']:
+                if crzy_m.ask < crzy_a.bid:
                     opportunities_found += 1
-                    max_quantity = min(crzy_m['ask_size'], crzy_a['bid_size'], MAX_ORDER_SIZE)
+                    max_quantity = min(crzy_m.ask_size, crzy_a.bid_size, MAX_ORDER_SIZE)
                     if max_quantity > 0:
-                        if execute_arbitrage(s, 'CRZY_M', 'CRZY_A', max_quantity, crzy_m['ask'], crzy_a['bid']):
+                        if execute_arbitrage(s, 'CRZY_M', 'CRZY_A', max_quantity, crzy_m.ask, crzy_a.bid):
                             trades_executed += 1
 
                 # Check Arbitrage A -> M
-                elif crzy_a['ask'] < crzy_m['bid']:
+                elif crzy_a.ask < crzy_m.bid:
                     opportunities_found += 1
-                    max_quantity = min(crzy_a['ask_size'], crzy_m['bid_size'], MAX_ORDER_SIZE)
+                    max_quantity = min(crzy_a.ask_size, crzy_m.bid_size, MAX_ORDER_SIZE)
                     if max_quantity > 0:
-                        if execute_arbitrage(s, 'CRZY_A', 'CRZY_M', max_quantity, crzy_a['ask'], crzy_m['bid']):
+                        if execute_arbitrage(s, 'CRZY_A', 'CRZY_M', max_quantity, crzy_a.ask, crzy_m.bid):
                             trades_executed += 1
                 
                 elif evaluations % 20 == 0:
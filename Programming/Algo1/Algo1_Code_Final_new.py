@@ -1,8 +1,14 @@
+import os
+import sys
 import requests
 import signal
 import time
 from time import sleep
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.legs import balance_legs
+
 Port = 10010
 
 class ApiException(Exception):
@@ -57,19 +63,11 @@ def get_securities(session):
     if resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    securities = resp.json()
-    crzy_m = None
-    crzy_a = None
-    total_realized = 0
+    quotes = decode.quotes(resp.content)
+    crzy_m = quotes.get('CRZY_M')
+    crzy_a = quotes.get('CRZY_A')
     
-    for security in securities:
-        if security['ticker'] == 'CRZY_M':
-            crzy_m = security
-        elif security['ticker'] == 'CRZY_A':
-            crzy_a = security
-        
-        if security['ticker'] in ['CRZY_M', 'CRZY_A']:
-            total_realized += security.get('realized', 0)
+    total_realized = sum(quote.realized for quote in (crzy_m, crzy_a) if quote is not None)
     
     return crzy_m, crzy_a, total_realized/2
 
@@ -94,7 +92,7 @@ def submit_order(session, ticker, action, quantity):
         print(f"⚠️ Order failed: {resp.json()}")
         return None
     
-    return resp.json()
+    return decode.order(resp.content)
 
 def speedbump(transaction_time):
     """Calculate and apply speed bump"""
@@ -115,6 +113,13 @@ def speedbump(transaction_time):
     if avg_speedbump > 0:
         sleep(avg_speedbump)
 
+def hedge_order(session, ticker, action, quantity):
+    """Submit an order that evens out the two legs, paying its speed bump like any other"""
+    start_time = time.time()
+    order = submit_order(session, ticker, action, quantity)
+    speedbump(time.time() - start_time)
+    return order
+
 def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sell_price):
     """Execute arbitrage: Buy then Sell IMMEDIATELY, then sleep"""
     global expected_total_profit
@@ -137,7 +142,7 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
         print("❌ BUY order failed!")
         return False
     
-    print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.2f} on {buy_ticker}")
+    print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.2f} on {buy_ticker}")
     
     # --- STEP 2: Execute SELL (IMMEDIATELY - No sleep yet!) ---
     # We do not call speedbump() here intentionally to reduce leg risk
@@ -145,14 +150,20 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
     sell_order = submit_order(session, sell_ticker, 'SELL', quantity)
     sell_time = time.time() - start_time
     
-    if sell_order is None:
-        print("❌ SELL order failed! (Partial execution risk)")
-        # Even though sell failed, we must speedbump for the buy that succeeded
-        # to ensure we don't violate rate limits for future orders.
-        speedbump(buy_time)
-        return False
+    # Uneven legs leave unhedged inventory; trade the difference away right now
+    if sell_order is None or sell_order.quantity_filled != buy_order.quantity_filled:
+        if sell_order is None:
+            print("❌ SELL order failed! (Partial execution risk)")
+        balance_legs(lambda ticker, action, qty: hedge_order(session, ticker, action, qty),
+                     buy_ticker, sell_ticker, buy_order.quantity_filled,
+                     sell_order.quantity_filled if sell_order else 0)
+        if sell_order is None:
+            # Even though sell failed, we must speedbump for the buy that succeeded
+            # to ensure we don't violate rate limits for future orders.
+            speedbump(buy_time)
+            return False
     
-    print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.2f} on {sell_ticker}")
+    print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.2f} on {sell_ticker}")
     
     # --- STEP 3: Pay the Rate Limit Debt ---
     # Now that both trades are safely sent, we sleep for the accumulated time required.
@@ -160,8 +171,8 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
     speedbump(sell_time)  # Account for the sell order
     
     # Calculate actual profit
-    filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-    actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+    filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+    actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
     
     expected_total_profit += expected_profit
     
@@ -258,26 +269,26 @@ def main():
                     sleep(0.1)
                     continue
                 
-                if crzy_m['bid'] == 0 or crzy_m['ask'] == 0 or crzy_a['bid'] == 0 or crzy_a['ask'] == 0:
+                if crzy_m.bid == 0 or crzy_m.ask == 0 or crzy_a.bid == 0 or crzy_a.ask == 0:
                     sleep(0.1)
                     continue
                 
                 evaluations += 1
                 
                 # Check Arbitrage M -> A
-                if crzy_m['ask'] < crzy_a['bid']:
+                if crzy_m.ask < crzy_a.bid:
                     opportunities_found += 1
-                    max_quantity = min(crzy_m['ask_size'], crzy_a['bid_size'], MAX_ORDER_SIZE)
+                    max_quantity = min(crzy_m.ask_size, crzy_a.bid_size, MAX_ORDER_SIZE)
                     if max_quantity > 0:
-                        if execute_arbitrage(s, 'CRZY_M', 'CRZY_A', max_quantity, crzy_m['ask'], crzy_a['bid']):
+                        if execute_arbitrage(s, 'CRZY_M', 'CRZY_A', max_quantity, crzy_m.ask, crzy_a.bid):
                             trades_executed += 1
 
                 # Check Arbitrage A -> M
-                elif crzy_a['ask'] < crzy_m['bid']:
+                elif crzy_a.ask < crzy_m.bid:
                     opportunities_found += 1
-                    max_quantity = min(crzy_a['ask_size'], crzy_m['bid_size'], MAX_ORDER_SIZE)
+                    max_quantity = min(crzy_a.ask_size, crzy_m.bid_size, MAX_ORDER_SIZE)
                     if max_quantity > 0:
-                        if execute_arbitrage(s, 'CRZY_A', 'CRZY_M', max_quantity, crzy_a['ask'], crzy_m['bid']):
+                        if execute_arbitrage(s, 'CRZY_A', 'CRZY_M', max_quantity, crzy_a.ask, crzy_m.bid):
                             trades_executed += 1
                 
                 elif evaluations % 20 == 0:
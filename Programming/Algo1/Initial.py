@@ -1,11 +1,13 @@
 import os
-import functools
-import operator
+import sys
 import itertools
 from time import sleep
 import signal
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit.book import calculate_cumulatives
+
 Port = 10005
 
 class ApiException(Exception):
@@ -44,13 +46,6 @@ def depth_view(session):
     combined = itertools.zip_longest(crzy_book['bids'], crzy_book['asks'], tame_book['bids'], tame_book['asks'], fillvalue={'cumulative_vwap': 0, 'cumulative_vol': 0, 'price': 0})
     return combined
 
-# this helper method calculates cumulative volumes and VWAPs for each level of an order book
-def calculate_cumulatives(book):
-    for level in book:
-        slice = book[:book.index(level) + 1]
-        level['cumulative_vol'] = int(sum(s['quantity'] - s['quantity_filled'] for s in slice))
-        level['cumulative_vwap'] = sum(functools.reduce(operator.mul, data) for data in zip((s['quantity'] - s['quantity_filled'] for s in slice), (s['price'] for s in slice))) / level['cumulative_vol']
-
 # this helper method prints two order books to the screen
 def print_books(combined):
     os.system('cls')
@@ -1,6 +1,17 @@
 import asyncio
+import os
+import sys
+import time
+
 import aiohttp
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.latency import LatencyRecorder
+from rit.legs import balance_legs_async, filled
+from rit.ledger import RECONCILE_INTERVAL, PositionLedger
+from rit.ratelimit import ORDER_LIMIT, TokenBucket
+
 PORT = 10001
 API_KEY = 'HCYA2KPW'
 URL_SEC = f'http://localhost:{PORT}/v1/securities'
@@ -8,97 +19,220 @@ URL_ORD = f'http://localhost:{PORT}/v1/orders'
 URL_CASE = f'http://localhost:{PORT}/v1/case'
 URL_LIM = f'http://localhost:{PORT}/v1/limits'
 
-async def post_order(session, ticker, action, qty):
-    """Fire and forget order submission"""
-    async with session.post(URL_ORD, params={
-        'ticker': ticker, 'type': 'MARKET', 'quantity': qty, 'action': action
-    }) as r:
-        return r.status
+IN_FLIGHT = 3              # quote requests kept in flight at once
+MAX_ORDER_SIZE = 10000
+POSITION_LIMIT = 25000
+CASE_CHECK_INTERVAL = 0.25  # seconds between /case status checks
+
+
+class Engine:
+    """Polling, decision and execution tasks sharing the latest quote"""
+
+    def __init__(self, session):
+        self.s = session
+        self.limiter = TokenBucket(ORDER_LIMIT)
+        self.latency = LatencyRecorder()
+
+        # Latest snapshot: (sequence, received ns, CRZY_M, CRZY_A)
+        self.sent = 0
+        self.latest = (0, 0, None, None)
+        self.new_quote = asyncio.Event()
+        self.active = asyncio.Event()
+
+        # Only quotes requested after our last fills may trigger a new trade
+        self.fresh_after = 0
+        self.orders = asyncio.Queue(maxsize=1)
+
+        # Positions from our own fills; /limits is only read by reconcile()
+        self.ledger = PositionLedger(('CRZY_M', 'CRZY_A'), POSITION_LIMIT, POSITION_LIMIT)
+        self.n = 0
+        self.rate_limited = 0
+
+    # ---- polling -----------------------------------------------------
+
+    async def poll(self, worker):
+        """Keep one quote request in flight; publish it if nothing newer arrived first"""
+        await asyncio.sleep(worker * 0.0003)  # stagger the workers a little
+        while True:
+            await self.active.wait()
+            self.sent += 1
+            seq = self.sent
+            start = time.perf_counter_ns()
+            try:
+                async with self.s.get(URL_SEC) as r:
+                    # An error body (401, 500, ...) is a failed request, not a snapshot
+                    r.raise_for_status()
+                    sec = decode.loads(await r.read())
+                if not isinstance(sec, list):
+                    raise ValueError(f"unexpected /securities body: {sec}")
+                quotes = decode.project_quotes(sec)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                print(f"Quote request failed: {e}")
+                await asyncio.sleep(0.05)
+                continue
+            received = time.perf_counter_ns()
+            self.latency.record('quote_fetch', received - start)
+
+            if seq <= self.latest[0]:
+                continue
+            m, a = quotes.get('CRZY_M'), quotes.get('CRZY_A')
+            if m and a:
+                self.latest = (seq, received, m, a)
+                self.new_quote.set()
+                self.ledger.observe('CRZY_M', m.position)
+                self.ledger.observe('CRZY_A', a.position)
+
+    # ---- decision ----------------------------------------------------
+
+    async def decide(self):
+        """Look at the latest snapshot only and hand at most one trade to execution"""
+        last = 0
+        while True:
+            await self.new_quote.wait()
+            self.new_quote.clear()
+            seq, received, m, a = self.latest
+            if seq <= last or seq <= self.fresh_after or self.orders.full():
+                continue
+            last = seq
+            if m.bid == 0 or a.bid == 0:
+                continue
+
+            # Buy M, Sell A
+            if m.ask < a.bid:
+                trade = ('CRZY_M', 'CRZY_A', min(m.ask_size, a.bid_size, MAX_ORDER_SIZE,
+                                                 self.ledger.pair_headroom('CRZY_M', 'CRZY_A')))
+            # Buy A, Sell M
+            elif a.ask < m.bid:
+                trade = ('CRZY_A', 'CRZY_M', min(a.ask_size, m.bid_size, MAX_ORDER_SIZE,
+                                                 self.ledger.pair_headroom('CRZY_A', 'CRZY_M')))
+            else:
+                continue
+
+            if trade[2] > 0:
+                self.latency.record('quote_age', time.perf_counter_ns() - received)
+                self.orders.put_nowait(trade + (received,))
+
+    # ---- execution ---------------------------------------------------
+
+    async def post_order(self, ticker, action, qty):
+        """One MARKET order; the Order, or None if it was refused"""
+        async with self.s.post(URL_ORD, params={
+            'ticker': ticker, 'type': 'MARKET', 'quantity': qty, 'action': action
+        }) as r:
+            if r.status == 200:
+                order = decode.order(await r.read())
+                self.ledger.apply_order(order)
+                return order
+            if r.status == 429:
+                self.rate_limited += 1
+                self.limiter.penalize((await r.json()).get('wait', 1))
+            else:
+                self.ledger.unknown()
+            return None
+
+    async def execute(self):
+        """Fire both legs together once the shared limiter has room for two orders"""
+        while True:
+            buy, sell, q, received = await self.orders.get()
+            try:
+                await self.limiter.acquire_async(2)
+                legs = await asyncio.gather(
+                    self.post_order(buy, 'BUY', q),
+                    self.post_order(sell, 'SELL', q),
+                    return_exceptions=True
+                )
+                self.latency.record('quote_to_fill', time.perf_counter_ns() - received)
+                if any(isinstance(leg, Exception) for leg in legs):
+                    self.ledger.unknown()
+                    legs = [None if isinstance(leg, Exception) else leg for leg in legs]
+                bought, sold = filled(legs[0]), filled(legs[1])
+                if bought == sold == q:
+                    self.n += 1
+                else:
+                    print(f"Leg results {buy} BUY / {sell} SELL: {bought:,} / {sold:,} of {q:,}")
+                    if bought != sold:
+                        # Trade the difference away before the next decision
+                        await balance_legs_async(self.post_order, buy, sell, bought, sold, limiter=self.limiter)
+                # Quotes already in flight were priced before these fills
+                self.fresh_after = self.sent
+            finally:
+                self.orders.task_done()
+
+    # ---- housekeeping ------------------------------------------------
+
+    async def reconcile(self):
+        """Re-read positions and limits only when the ledger asks (or every RECONCILE_INTERVAL)"""
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(0.05)
+            if not self.ledger.wanted.is_set() and time.monotonic() - last < RECONCILE_INTERVAL:
+                continue
+            last = time.monotonic()
+            version = self.ledger.version
+            try:
+                async with self.s.get(URL_SEC) as r:
+                    r.raise_for_status()
+                    positions = {t: quote.position for t, quote in decode.quotes(await r.read()).items()}
+                limit = None
+                async with self.s.get(URL_LIM) as r:
+                    r.raise_for_status()
+                    for l in await r.json():
+                        if l['name'] == 'LIMIT-STOCK':
+                            limit = (l['gross'], l['net'], l['gross_limit'], l['net_limit'])
+                            break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Reconcile failed: {e}")
+                continue
+            # Skipped if a fill landed while we were reading; wanted stays set so it retries
+            self.ledger.reconcile(positions, limit, version)
+
+    async def watch_case(self):
+        """Open the gate while the case is ACTIVE, print stats when a period ends"""
+        while True:
+            try:
+                async with self.s.get(URL_CASE) as r:
+                    r.raise_for_status()
+                    status = (await r.json())['status']
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"Case check failed: {e}")
+                status = None
+            if status == 'ACTIVE' and not self.active.is_set():
+                print("GO!")
+                self.n = 0
+                self.ledger.reset()
+                self.latency.reset()
+                self.active.set()
+            elif status is not None and status != 'ACTIVE' and self.active.is_set():
+                self.active.clear()
+                self.report("Period ended.")
+            await asyncio.sleep(CASE_CHECK_INTERVAL)
+
+    def report(self, title):
+        print(f"{title} Trades: {self.n}  429s: {self.rate_limited}  limiter: {self.limiter.stats()}"
+              f"  ledger reconciles: {self.ledger.reconciles}")
+        print(self.latency.report())
+
 
 async def main():
     headers = {'X-API-Key': API_KEY}
-    connector = aiohttp.TCPConnector(limit=100, limit_per_host=100, force_close=False)
-    
+    connector = aiohttp.TCPConnector(limit=IN_FLIGHT + 4, limit_per_host=IN_FLIGHT + 4, force_close=False)
+
     async with aiohttp.ClientSession(headers=headers, connector=connector) as s:
-        
+        engine = Engine(s)
         print("Waiting...")
-        while True:
-            async with s.get(URL_CASE) as r:
-                if (await r.json())['status'] == 'ACTIVE':
-                    print("GO!")
-                    break
-            await asyncio.sleep(0.1)
-        
-        cap = 25000
-        n = 0
-        check = 0
-        
-        while True:
-            try:
-                # Get securities
-                async with s.get(URL_SEC) as r:
-                    sec = await r.json()
-                
-                m = a = None
-                for x in sec:
-                    if x['ticker'] == 'CRZY_M': m = x
-                    elif x['ticker'] == 'CRZY_A': a = x
-                
-                if not m or not a or m['bid'] == 0 or a['bid'] == 0:
-                    continue
-                
-                # Buy M, Sell A
-                if m['ask'] < a['bid']:
-                    q = min(m['ask_size'], a['bid_size'], 10000, cap)
-                    if q > 0:
-                        # TRUE PARALLEL - both orders fire simultaneously!
-                        await asyncio.gather(
-                            post_order(s, 'CRZY_M', 'BUY', q),
-                            post_order(s, 'CRZY_A', 'SELL', q)
-                        )
-                        cap -= q * 2
-                        n += 1
-                
-                # Buy A, Sell M
-                elif a['ask'] < m['bid']:
-                    q = min(a['ask_size'], m['bid_size'], 10000, cap)
-                    if q > 0:
-                        # TRUE PARALLEL - both orders fire simultaneously!
-                        await asyncio.gather(
-                            post_order(s, 'CRZY_A', 'BUY', q),
-                            post_order(s, 'CRZY_M', 'SELL', q)
-                        )
-                        cap -= q * 2
-                        n += 1
-                
-                # Periodic checks
-                check += 1
-                if check >= 50 or cap <= 0:
-                    check = 0
-                    async with s.get(URL_LIM) as r:
-                        for l in await r.json():
-                            if l['name'] == 'LIMIT-STOCK':
-                                cap = min(l['gross_limit']-l['gross'], l['net_limit']-abs(l['net']))
-                                break
-                    
-                    async with s.get(URL_CASE) as r:
-                        if (await r.json())['status'] != 'ACTIVE':
-                            print(f"Period ended. Trades: {n}")
-                            while True:
-                                async with s.get(URL_CASE) as r2:
-                                    if (await r2.json())['status'] == 'ACTIVE':
-                                        print("GO!")
-                                        n = 0
-                                        cap = 25000
-                                        break
-                                await asyncio.sleep(0.1)
-            
-            except KeyboardInterrupt:
-                break
-            except:
-                pass
-        
-        print(f"Final: {n}")
+        tasks = [asyncio.create_task(engine.poll(i)) for i in range(IN_FLIGHT)]
+        tasks += [
+            asyncio.create_task(engine.decide()),
+            asyncio.create_task(engine.execute()),
+            asyncio.create_task(engine.reconcile()),
+            asyncio.create_task(engine.watch_case()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            engine.report("Final:")
 
 if __name__ == '__main__':
     try:
@@ -1,8 +1,15 @@
+import os
+import sys
 import requests
 import signal
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.ledger import PositionLedger, start_reconciler
+from rit.legs import balance_legs, filled
+
 # CONFIGURATION
 PORT = 10007
 API_KEY = {'X-API-Key': 'HCYA2KPW'}
@@ -22,8 +29,18 @@ def signal_handler(signum, frame):
     global shutdown
     shutdown = True
 
-def submit_order(session, ticker, action, quantity):
-    """Submit order - used by thread pool"""
+def fetch_positions():
+    """Positions and LIMIT-STOCK for the ledger's background reconcile (own session)"""
+    with requests.Session() as s:
+        s.headers.update(API_KEY)
+        positions = {t: quote.position for t, quote in decode.quotes(s.get(URL_SECURITIES).content).items()}
+        for lim in s.get(URL_LIMITS).json():
+            if lim['name'] == 'LIMIT-STOCK':
+                return positions, (lim['gross'], lim['net'], lim['gross_limit'], lim['net_limit'])
+    return positions, None
+
+def submit_order(session, ledger, ticker, action, quantity):
+    """Submit order - used by thread pool; fills go straight into the ledger. Returns the Order or None"""
     try:
         r = session.post(URL_ORDERS, params={
             'ticker': ticker,
@@ -40,9 +57,16 @@ def submit_order(session, ticker, action, quantity):
                 'quantity': quantity,
                 'action': action
             })
-        return r.status_code == 200
+        if r.status_code == 200:
+            order = decode.order(r.content)
+            ledger.apply_order(order)
+            return order
+        if r.status_code != 429:
+            ledger.unknown()
+        return None
     except:
-        return False
+        ledger.unknown()
+        return None
 
 def main():
     global trades
@@ -68,25 +92,29 @@ def main():
         except:
             pass
     
-    remaining = POSITION_LIMIT
+    # Positions from our own fills - /limits is only read in the background
+    ledger = PositionLedger(('CRZY_M', 'CRZY_A'), POSITION_LIMIT, POSITION_LIMIT)
+    stop_reconciler = start_reconciler(ledger, fetch_positions)
     check_ctr = 0
     
     while not shutdown:
         try:
             # Get quotes
-            securities = s_get(URL_SECURITIES).json()
+            quotes = decode.quotes(s_get(URL_SECURITIES).content)
             
             m_bid = m_ask = m_bid_sz = m_ask_sz = 0
             a_bid = a_ask = a_bid_sz = a_ask_sz = 0
             
-            for sec in securities:
-                t = sec['ticker']
-                if t == 'CRZY_M':
-                    m_bid, m_ask = sec['bid'], sec['ask']
-                    m_bid_sz, m_ask_sz = sec['bid_size'], sec['ask_size']
-                elif t == 'CRZY_A':
-                    a_bid, a_ask = sec['bid'], sec['ask']
-                    a_bid_sz, a_ask_sz = sec['bid_size'], sec['ask_size']
+            m = quotes.get('CRZY_M')
+            if m is not None:
+                m_bid, m_ask = m.bid, m.ask
+                m_bid_sz, m_ask_sz = m.bid_size, m.ask_size
+                ledger.observe('CRZY_M', m.position)
+            a = quotes.get('CRZY_A')
+            if a is not None:
+                a_bid, a_ask = a.bid, a.ask
+                a_bid_sz, a_ask_sz = a.bid_size, a.ask_size
+                ledger.observe('CRZY_A', a.position)
             
             if m_bid == 0 or a_bid == 0:
                 continue
@@ -94,41 +122,33 @@ def main():
             # ARBITRAGE CHECK AND PARALLEL EXECUTION
             
             if m_ask < a_bid:
-                qty = min(m_ask_sz, a_bid_sz, MAX_ORDER_SIZE, remaining)
+                qty = min(m_ask_sz, a_bid_sz, MAX_ORDER_SIZE, ledger.pair_headroom('CRZY_M', 'CRZY_A'))
                 if qty > 0:
                     # Submit BOTH orders in parallel!
-                    f1 = executor.submit(submit_order, s, 'CRZY_M', 'BUY', qty)
-                    f2 = executor.submit(submit_order, s, 'CRZY_A', 'SELL', qty)
-                    # Wait for both to complete
-                    f1.result()
-                    f2.result()
+                    f1 = executor.submit(submit_order, s, ledger, 'CRZY_M', 'BUY', qty)
+                    f2 = executor.submit(submit_order, s, ledger, 'CRZY_A', 'SELL', qty)
+                    # Wait for both to complete; even out the legs if one came back short
+                    bought, sold = filled(f1.result()), filled(f2.result())
+                    if bought != sold:
+                        balance_legs(lambda t, a, q: submit_order(s, ledger, t, a, q), 'CRZY_M', 'CRZY_A', bought, sold)
                     trades += 1
-                    remaining -= qty * 2
             
             elif a_ask < m_bid:
-                qty = min(a_ask_sz, m_bid_sz, MAX_ORDER_SIZE, remaining)
+                qty = min(a_ask_sz, m_bid_sz, MAX_ORDER_SIZE, ledger.pair_headroom('CRZY_A', 'CRZY_M'))
                 if qty > 0:
                     # Submit BOTH orders in parallel!
-                    f1 = executor.submit(submit_order, s, 'CRZY_A', 'BUY', qty)
-                    f2 = executor.submit(submit_order, s, 'CRZY_M', 'SELL', qty)
-                    f1.result()
-                    f2.result()
+                    f1 = executor.submit(submit_order, s, ledger, 'CRZY_A', 'BUY', qty)
+                    f2 = executor.submit(submit_order, s, ledger, 'CRZY_M', 'SELL', qty)
+                    bought, sold = filled(f1.result()), filled(f2.result())
+                    if bought != sold:
+                        balance_legs(lambda t, a, q: submit_order(s, ledger, t, a, q), 'CRZY_A', 'CRZY_M', bought, sold)
                     trades += 1
-                    remaining -= qty * 2
             
-            # Periodic checks
+            # Periodic case status check
             check_ctr += 1
-            if check_ctr >= 50 or remaining <= 0:
+            if check_ctr >= 50:
                 check_ctr = 0
                 try:
-                    for lim in s_get(URL_LIMITS).json():
-                        if lim['name'] == 'LIMIT-STOCK':
-                            remaining = min(
-                                lim['gross_limit'] - lim['gross'],
-                                lim['net_limit'] - abs(lim['net'])
-                            )
-                            break
-                    
                     c = s_get(URL_CASE).json()
                     if c['status'] != 'ACTIVE':
                         print(f"Period ended. Trades: {trades}")
@@ -136,7 +156,7 @@ def main():
                             if s_get(URL_CASE).json()['status'] == 'ACTIVE':
                                 print("New period! GO!")
                                 trades = 0
-                                remaining = POSITION_LIMIT
+                                ledger.reset()
                                 break
                             time.sleep(0.5)
                 except:
@@ -148,7 +168,8 @@ def main():
             pass
     
     executor.shutdown(wait=False)
-    print(f"Done. Trades: {trades}")
+    stop_reconciler.set()
+    print(f"Done. Trades: {trades}  (ledger reconciles: {ledger.reconciles})")
     s.close()
 
 if __name__ == '__main__':
@@ -1,12 +1,21 @@
+import os
+import sys
 import requests
 import signal
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.ledger import PositionLedger, start_reconciler
+from rit.legs import balance_legs, filled
+from rit.poller import QuotePoller
+
 # CONFIGURATION
 PORT = 10007
 API_KEY = {'X-API-Key': 'HCYA2KPW'}
 MAX_ORDER_SIZE = 10000
 POSITION_LIMIT = 25000
+QUOTE_CONNECTIONS = 3  # /securities requests kept in flight at once (rit/poller.py)
 
 # Pre-computed URLs (string formatting is slow)
 URL_CASE = f'http://localhost:{PORT}/v1/case'
@@ -22,6 +31,39 @@ def signal_handler(signum, frame):
     global shutdown
     shutdown = True
 
+def fetch_positions():
+    """Positions and LIMIT-STOCK for the ledger's background reconcile (own session)"""
+    with requests.Session() as s:
+        s.headers.update(API_KEY)
+        positions = {t: quote.position for t, quote in decode.quotes(s.get(URL_SECURITIES).content).items()}
+        for lim in s.get(URL_LIMITS).json():
+            if lim['name'] == 'LIMIT-STOCK':
+                return positions, (lim['gross'], lim['net'], lim['gross_limit'], lim['net_limit'])
+    return positions, None
+
+def record_fill(ledger, r):
+    """Apply an order response to the ledger and return the Order (None if refused);
+    unclear outcomes trigger a reconcile"""
+    if r.status_code == 200:
+        order = decode.order(r.content)
+        ledger.apply_order(order)
+        return order
+    if r.status_code != 429:
+        ledger.unknown()
+    return None
+
+def submit_order(session, ledger, ticker, action, quantity):
+    """One MARKET order for evening out legs; the Order, or None"""
+    r = session.post(URL_ORDERS, params={
+        'ticker': ticker,
+        'type': 'MARKET',
+        'quantity': quantity,
+        'action': action
+    })
+    if r.status_code == 429:
+        time.sleep(r.json().get('wait', 0.1))
+    return record_fill(ledger, r)
+
 def main():
     global trades
     
@@ -46,33 +88,36 @@ def main():
         except:
             pass
     
-    # Cache for limits - don't check every iteration
-    remaining_capacity = POSITION_LIMIT
-    limit_check_counter = 0
+    # Positions from our own fills - /limits is only read in the background
+    ledger = PositionLedger(('CRZY_M', 'CRZY_A'), POSITION_LIMIT, POSITION_LIMIT)
+    stop_reconciler = start_reconciler(ledger, fetch_positions)
+    case_check_counter = 0
+    
+    # Several /securities requests in flight at once; we always read the freshest
+    poller = QuotePoller(PORT, API_KEY, connections=QUOTE_CONNECTIONS).start()
+    seq = 0
     
     # Main racing loop
     while not shutdown:
         try:
-            # Get securities - ONE call for everything
-            r = s_get(URL_SECURITIES)
-            securities = r.json()
+            # Next snapshot newer than the one we last acted on
+            new_seq, quotes = poller.wait(seq)
+            if new_seq <= seq:
+                continue
+            seq = new_seq
             
-            # Fast extraction - direct loop, no dict building
+            # Fast extraction - straight from the Quote records
             m_bid = m_ask = m_bid_sz = m_ask_sz = 0
             a_bid = a_ask = a_bid_sz = a_ask_sz = 0
             
-            for sec in securities:
-                t = sec['ticker']
-                if t == 'CRZY_M':
-                    m_bid = sec['bid']
-                    m_ask = sec['ask']
-                    m_bid_sz = sec['bid_size']
-                    m_ask_sz = sec['ask_size']
-                elif t == 'CRZY_A':
-                    a_bid = sec['bid']
-                    a_ask = sec['ask']
-                    a_bid_sz = sec['bid_size']
-                    a_ask_sz = sec['ask_size']
+            m = quotes.get('CRZY_M')
+            if m is not None:
+                m_bid, m_ask, m_bid_sz, m_ask_sz = m.bid, m.ask, m.bid_size, m.ask_size
+                ledger.observe('CRZY_M', m.position)
+            a = quotes.get('CRZY_A')
+            if a is not None:
+                a_bid, a_ask, a_bid_sz, a_ask_sz = a.bid, a.ask, a.bid_size, a.ask_size
+                ledger.observe('CRZY_A', a.position)
             
             # Skip if no valid quotes
             if m_bid == 0 or a_bid == 0:
@@ -82,7 +127,7 @@ def main():
             
             # Opportunity 1: Buy Main, Sell Alternate
             if m_ask < a_bid:
-                qty = min(m_ask_sz, a_bid_sz, MAX_ORDER_SIZE, remaining_capacity)
+                qty = min(m_ask_sz, a_bid_sz, MAX_ORDER_SIZE, ledger.pair_headroom('CRZY_M', 'CRZY_A'))
                 if qty > 0:
                     # BUY IMMEDIATELY
                     r1 = s_post(URL_ORDERS, params={
@@ -99,18 +144,27 @@ def main():
                         'action': 'SELL'
                     })
                     
+                    o1 = record_fill(ledger, r1)
+                    o2 = record_fill(ledger, r2)
+                    
                     # Handle rate limit only if it happens
                     if r1.status_code == 429:
                         time.sleep(r1.json().get('wait', 0.1))
                     if r2.status_code == 429:
                         time.sleep(r2.json().get('wait', 0.1))
                     
+                    # A refused or short leg leaves unhedged shares; trade them away now
+                    if filled(o1) != filled(o2):
+                        balance_legs(lambda t, a, q: submit_order(s, ledger, t, a, q), 'CRZY_M', 'CRZY_A',
+                                     filled(o1), filled(o2), quotes=lambda: poller.latest()[1])
+                    
+                    # Snapshots requested before the orders still show the old book
+                    seq = max(seq, poller.mark())
                     trades += 1
-                    remaining_capacity -= qty * 2
             
             # Opportunity 2: Buy Alternate, Sell Main
             elif a_ask < m_bid:
-                qty = min(a_ask_sz, m_bid_sz, MAX_ORDER_SIZE, remaining_capacity)
+                qty = min(a_ask_sz, m_bid_sz, MAX_ORDER_SIZE, ledger.pair_headroom('CRZY_A', 'CRZY_M'))
                 if qty > 0:
                     # BUY IMMEDIATELY
                     r1 = s_post(URL_ORDERS, params={
@@ -127,32 +181,28 @@ def main():
                         'action': 'SELL'
                     })
                     
+                    o1 = record_fill(ledger, r1)
+                    o2 = record_fill(ledger, r2)
+                    
                     # Handle rate limit only if it happens
                     if r1.status_code == 429:
                         time.sleep(r1.json().get('wait', 0.1))
                     if r2.status_code == 429:
                         time.sleep(r2.json().get('wait', 0.1))
                     
+                    # A refused or short leg leaves unhedged shares; trade them away now
+                    if filled(o1) != filled(o2):
+                        balance_legs(lambda t, a, q: submit_order(s, ledger, t, a, q), 'CRZY_A', 'CRZY_M',
+                                     filled(o1), filled(o2), quotes=lambda: poller.latest()[1])
+                    
+                    # Snapshots requested before the orders still show the old book
+                    seq = max(seq, poller.mark())
                     trades += 1
-                    remaining_capacity -= qty * 2
             
-            # Only check limits occasionally (every 50 iterations)
-            limit_check_counter += 1
-            if limit_check_counter >= 50 or remaining_capacity <= 0:
-                limit_check_counter = 0
-                try:
-                    r = s_get(URL_LIMITS)
-                    for lim in r.json():
-                        if lim['name'] == 'LIMIT-STOCK':
-                            remaining_capacity = min(
-                                lim['gross_limit'] - lim['gross'],
-                                lim['net_limit'] - abs(lim['net'])
-                            )
-                            break
-                except:
-                    pass
-                
-                # Also check if case ended
+            # Only check the case status occasionally (every 50 iterations)
+            case_check_counter += 1
+            if case_check_counter >= 50:
+                case_check_counter = 0
                 try:
                     r = s_get(URL_CASE)
                     c = r.json()
@@ -165,7 +215,7 @@ def main():
                             if c['status'] == 'ACTIVE':
                                 print(f"New period {c['period']}! GO!")
                                 trades = 0
-                                remaining_capacity = POSITION_LIMIT
+                                ledger.reset()
                                 break
                             time.sleep(0.5)
                 except:
@@ -174,9 +224,12 @@ def main():
         except KeyboardInterrupt:
             break
         except:
-            pass  # Never stop for errors
+            ledger.unknown()  # Never stop for errors; positions get re-checked in the background
     
-    print(f"Stopped. Total trades: {trades}")
+    stop_reconciler.set()
+    poller.stop()
+    print(f"Stopped. Total trades: {trades}  (ledger reconciles: {ledger.reconciles})")
+    print(f"Quotes: {poller.rate():.0f} snapshots/s over {QUOTE_CONNECTIONS} connections ({poller.dropped} out of order dropped, {poller.errors} errors)")
     s.close()
 
 if __name__ == '__main__':
@@ -1,10 +1,16 @@
+import os
+import sys
 import requests
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit.poller import QuotePoller
+
 PORT = 10007
+API_KEY = {'X-API-Key': 'HCYA2KPW'}
+QUOTE_CONNECTIONS = 3  # /securities requests kept in flight at once
 s = requests.Session()
-s.headers.update({'X-API-Key': 'HCYA2KPW'})
+s.headers.update(API_KEY)
 
-URL_SEC = f'http://localhost:{PORT}/v1/securities'
 URL_ORD = f'http://localhost:{PORT}/v1/orders'
 URL_CASE = f'http://localhost:{PORT}/v1/case'
 URL_LIM = f'http://localhost:{PORT}/v1/limits'
@@ -16,35 +22,39 @@ print("GO!")
 
 cap = 25000
 n = 0
+poller = QuotePoller(PORT, API_KEY, connections=QUOTE_CONNECTIONS).start()
+seq = 0
 
 while True:
     try:
-        sec = s.get(URL_SEC).json()
-        m = a = None
-        for x in sec:
-            if x['ticker'] == 'CRZY_M': m = x
-            elif x['ticker'] == 'CRZY_A': a = x
+        new_seq, sec = poller.wait(seq)
+        if new_seq <= seq: continue
+        seq = new_seq
+        m = sec.get('CRZY_M')
+        a = sec.get('CRZY_A')
         
-        if not m or not a or m['bid'] == 0 or a['bid'] == 0:
+        if not m or not a or m.bid == 0 or a.bid == 0:
             continue
         
         # Buy M, Sell A
-        if m['ask'] < a['bid']:
-            q = min(m['ask_size'], a['bid_size'], 10000, cap)
+        if m.ask < a.bid:
+            q = min(m.ask_size, a.bid_size, 10000, cap)
             if q > 0:
                 s.post(URL_ORD, params={'ticker':'CRZY_M','type':'MARKET','quantity':q,'action':'BUY'})
                 s.post(URL_ORD, params={'ticker':'CRZY_A','type':'MARKET','quantity':q,'action':'SELL'})
                 cap -= q*2
                 n += 1
+                seq = max(seq, poller.mark())
         
         # Buy A, Sell M
-        elif a['ask'] < m['bid']:
-            q = min(a['ask_size'], m['bid_size'], 10000, cap)
+        elif a.ask < m.bid:
+            q = min(a.ask_size, m.bid_size, 10000, cap)
             if q > 0:
                 s.post(URL_ORD, params={'ticker':'CRZY_A','type':'MARKET','quantity':q,'action':'BUY'})
                 s.post(URL_ORD, params={'ticker':'CRZY_M','type':'MARKET','quantity':q,'action':'SELL'})
                 cap -= q*2
                 n += 1
+                seq = max(seq, poller.mark())
         
         # Refresh limits occasionally
         if n % 20 == 0 or cap <= 0:
@@ -62,4 +72,5 @@ while True:
     except:
         pass
 
-print(f"Final: {n}")
+poller.stop()
+print(f"Final: {n}  ({poller.rate():.0f} snapshots/s over {QUOTE_CONNECTIONS} connections, {poller.errors} errors)")
@@ -1,8 +1,14 @@
+import os
+import sys
 import requests
 import signal
 import time
 from time import sleep
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.legs import balance_legs
+
 Port = 10005
 
 class ApiException(Exception):
@@ -50,15 +56,15 @@ def get_limits(session):
     return 0, 0, POSITION_LIMIT, POSITION_LIMIT
 
 def get_order_books(session):
-    """Get order books for both exchanges"""
+    """Get order books for both exchanges, as (bids, asks) BookLevel lists"""
     crzy_m_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=CRZY_M&limit=1')
     crzy_a_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=CRZY_A&limit=1')
     
     if crzy_m_resp.status_code == 401 or crzy_a_resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    crzy_m_book = crzy_m_resp.json()
-    crzy_a_book = crzy_a_resp.json()
+    crzy_m_book = decode.levels(crzy_m_resp.content)
+    crzy_a_book = decode.levels(crzy_a_resp.content)
     
     return crzy_m_book, crzy_a_book
 
@@ -84,7 +90,7 @@ def submit_order(session, ticker, action, quantity):
         print(f"⚠ Order failed: {resp.json()}")
         return None
     
-    return resp.json()
+    return decode.order(resp.content)
 
 def speedbump(transaction_time):
     """Calculate and apply speed bump"""
@@ -105,6 +111,13 @@ def speedbump(transaction_time):
     if avg_speedbump > 0:
         sleep(avg_speedbump)
 
+def hedge_order(session, ticker, action, quantity):
+    """Submit an order that evens out the two legs, paying its speed bump like any other"""
+    start_time = time.time()
+    order = submit_order(session, ticker, action, quantity)
+    speedbump(time.time() - start_time)
+    return order
+
 def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sell_price):
     """Execute arbitrage by buying on one exchange and selling on the other"""
     
@@ -124,7 +137,7 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
         print("❌ BUY order failed!")
         return False
     
-    print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.2f} on {buy_ticker}")
+    print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.2f} on {buy_ticker}")
     speedbump(buy_time)
     
     # Execute sell order
@@ -132,16 +145,22 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
     sell_order = submit_order(session, sell_ticker, 'SELL', quantity)
     sell_time = time.time() - start_time
     
-    if sell_order is None:
-        print("❌ SELL order failed!")
-        return False
+    # Uneven legs leave unhedged inventory; trade the difference away right now
+    if sell_order is None or sell_order.quantity_filled != buy_order.quantity_filled:
+        if sell_order is None:
+            print("❌ SELL order failed!")
+        balance_legs(lambda ticker, action, qty: hedge_order(session, ticker, action, qty),
+                     buy_ticker, sell_ticker, buy_order.quantity_filled,
+                     sell_order.quantity_filled if sell_order else 0)
+        if sell_order is None:
+            return False
     
-    print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.2f} on {sell_ticker}")
+    print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.2f} on {sell_ticker}")
     speedbump(sell_time)
     
     # Calculate actual profit
-    filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-    actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+    filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+    actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
     print(f"💰 Actual profit: ${actual_profit:.2f}")
     print(f"{'='*70}\n")
     
@@ -186,29 +205,29 @@ def main():
                     continue
                 
                 # Get order books
-                crzy_m_book, crzy_a_book = get_order_books(s)
+                (crzy_m_bids, crzy_m_asks), (crzy_a_bids, crzy_a_asks) = get_order_books(s)
                 
                 # Check if books have valid data
-                if not crzy_m_book.get('bids') or not crzy_m_book.get('asks'):
+                if not crzy_m_bids or not crzy_m_asks:
                     tick, status = get_tick(s)
                     sleep(0.1)
                     continue
                     
-                if not crzy_a_book.get('bids') or not crzy_a_book.get('asks'):
+                if not crzy_a_bids or not crzy_a_asks:
                     tick, status = get_tick(s)
                     sleep(0.1)
                     continue
                 
                 # Extract best bid/ask for both exchanges
-                crzy_m_bid = crzy_m_book['bids'][0]['price']
-                crzy_m_ask = crzy_m_book['asks'][0]['price']
-                crzy_m_bid_size = crzy_m_book['bids'][0]['quantity'] - crzy_m_book['bids'][0]['quantity_filled']
-                crzy_m_ask_size = crzy_m_book['asks'][0]['quantity'] - crzy_m_book['asks'][0]['quantity_filled']
+                crzy_m_bid = crzy_m_bids[0].price
+                crzy_m_ask = crzy_m_asks[0].price
+                crzy_m_bid_size = crzy_m_bids[0].remaining
+                crzy_m_ask_size = crzy_m_asks[0].remaining
                 
-                crzy_a_bid = crzy_a_book['bids'][0]['price']
-                crzy_a_ask = crzy_a_book['asks'][0]['price']
-                crzy_a_bid_size = crzy_a_book['bids'][0]['quantity'] - crzy_a_book['bids'][0]['quantity_filled']
-                crzy_a_ask_size = crzy_a_book['asks'][0]['quantity'] - crzy_a_book['asks'][0]['quantity_filled']
+                crzy_a_bid = crzy_a_bids[0].price
+                crzy_a_ask = crzy_a_asks[0].price
+                crzy_a_bid_size = crzy_a_bids[0].remaining
+                crzy_a_ask_size = crzy_a_asks[0].remaining
                 
                 # Check for arbitrage opportunities
                 
@@ -1,8 +1,15 @@
+import os
+import sys
 import requests
 import signal
 import time
 from time import sleep
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.book import depth_books
+from rit.legs import balance_legs
+
 Port = 10005
 
 class ApiException(Exception):
@@ -62,12 +69,12 @@ def get_realized_profits(session):
     if resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    securities = resp.json()
+    quotes = decode.quotes(resp.content)
     total_realized = 0
     
-    for security in securities:
-        if security['ticker'] in ['CRZY_M', 'CRZY_A']:
-            total_realized += security.get('realized', 0)
+    for ticker in ['CRZY_M', 'CRZY_A']:
+        if ticker in quotes:
+            total_realized += quotes[ticker].realized
     
     return total_realized
 
@@ -80,47 +87,20 @@ def get_order_books(session):
     if crzy_m_resp.status_code == 401 or crzy_a_resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    crzy_m_book = crzy_m_resp.json()
-    crzy_a_book = crzy_a_resp.json()
+    crzy_m_book = depth_books(crzy_m_resp.json())
+    crzy_a_book = depth_books(crzy_a_resp.json())
     
     return crzy_m_book, crzy_a_book
 
 def calculate_vwap_and_quantity(order_book_side, desired_quantity):
     """
-    Calculate VWAP for a given quantity by walking through order book levels.
+    Calculate VWAP for a given quantity from the book's running totals.
     Returns: (vwap, available_quantity, total_cost)
     
-    order_book_side: list of orders (either bids or asks)
+    order_book_side: DepthBook for one side (either bids or asks)
     desired_quantity: how many shares we want to trade
     """
-    if not order_book_side:
-        return None, 0, 0
-    
-    total_quantity = 0
-    total_cost = 0
-    
-    for level in order_book_side:
-        available_at_level = level['quantity'] - level['quantity_filled']
-        
-        if available_at_level <= 0:
-            continue
-        
-        # How much can we take from this level?
-        quantity_from_level = min(available_at_level, desired_quantity - total_quantity)
-        
-        # Add to totals
-        total_quantity += quantity_from_level
-        total_cost += quantity_from_level * level['price']
-        
-        # If we've accumulated enough, stop
-        if total_quantity >= desired_quantity:
-            break
-    
-    if total_quantity == 0:
-        return None, 0, 0
-    
-    vwap = total_cost / total_quantity
-    return vwap, total_quantity, total_cost
+    return order_book_side.vwap(desired_quantity)
 
 def submit_order(session, ticker, action, quantity):
     """Submit a market order"""
@@ -144,7 +124,7 @@ def submit_order(session, ticker, action, quantity):
         print(f"⚠ Order failed: {resp.json()}")
         return None
     
-    return resp.json()
+    return decode.order(resp.content)
 
 def speedbump(transaction_time):
     """Calculate and apply speed bump"""
@@ -172,6 +152,13 @@ def speedbump(transaction_time):
         number_of_orders = number_of_orders + 1
         print(f"   ⏱️  No speed bump needed (txn was slow: {transaction_time:.3f}s)")
 
+def hedge_order(session, ticker, action, quantity):
+    """Submit an order that evens out the two legs, paying its speed bump like any other"""
+    start_time = time.time()
+    order = submit_order(session, ticker, action, quantity)
+    speedbump(time.time() - start_time)
+    return order
+
 def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, expected_buy_vwap, expected_sell_vwap, expected_profit):
     """Execute arbitrage by buying on one exchange and selling on the other"""
     
@@ -191,7 +178,7 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, expected_buy_v
         print("❌ BUY order failed!")
         return False
     
-    print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.4f} on {buy_ticker}")
+    print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.4f} on {buy_ticker}")
     speedbump(buy_time)
     
     # Execute sell order
@@ -199,16 +186,22 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, expected_buy_v
     sell_order = submit_order(session, sell_ticker, 'SELL', quantity)
     sell_time = time.time() - start_time
     
-    if sell_order is None:
-        print("❌ SELL order failed!")
-        return False
-    
-    print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.4f} on {sell_ticker}")
+    # Uneven legs leave unhedged inventory; trade the difference away right now
+    if sell_order is None or sell_order.quantity_filled != buy_order.quantity_filled:
+        if sell_order is None:
+            print("❌ SELL order failed!")
+        balance_legs(lambda ticker, action, qty: hedge_order(session, ticker, action, qty),
+                     buy_ticker, sell_ticker, buy_order.quantity_filled,
+                     sell_order.quantity_filled if sell_order else 0)
+        if sell_order is None:
+            return False
+    
+    print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.4f} on {sell_ticker}")
     speedbump(sell_time)
     
     # Calculate actual profit
-    filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-    actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+    filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+    actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
     
     print(f"💰 Actual profit: ${actual_profit:.2f} (Expected: ${expected_profit:.2f})")
     
@@ -1,12 +1,16 @@
-import requests
+import os
 import signal
-import time
+import sys
 from time import sleep
 
-Port = 10005
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.book import cross_depth, depth_books
+from rit.client import RitClient
+from rit.legs import balance_legs
+from rit.ratelimit import TokenBucket
 
-class ApiException(Exception):
-    pass
+Port = 10005
 
 # Signal handler for graceful shutdown
 def signal_handler(signum, frame):
@@ -23,10 +27,11 @@ ORDER_LIMIT = 10  # orders per second (adjust based on actual rate limit)
 MAX_ORDER_SIZE = 10000
 POSITION_LIMIT = 25000
 MIN_PRICE_DIFFERENCE = 0.01  # Minimum price spread in dollars
+TRADING_FEES = {'CRZY_M': 0.00, 'CRZY_A': 0.00}  # per-share market order fee on each venue (none in ALGO1)
 
-# Speed bump tracking
+# Order rate limiting
+order_limiter = TokenBucket(ORDER_LIMIT)
 number_of_orders = 0
-total_speedbumps = 0
 
 # Statistics tracking
 opportunities_found = 0
@@ -35,145 +40,70 @@ trades_executed = 0
 evaluations = 0
 expected_total_profit = 0
 
-def get_tick(session):
+def get_tick(client):
     """Get current tick of the case"""
-    resp = session.get(f'http://localhost:{Port}/v1/case')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    case = resp.json()
-    return case['tick'], case['status'], case['period']
+    return client.tick()
 
-def get_limits(session):
+def get_limits(client):
     """Get current trading limits"""
-    resp = session.get(f'http://localhost:{Port}/v1/limits')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    
-    limits = resp.json()
-    
-    for limit in limits:
-        if limit['name'] == 'LIMIT-STOCK':
-            return limit['gross'], limit['net'], limit['gross_limit'], limit['net_limit']
-    
-    return 0, 0, POSITION_LIMIT, POSITION_LIMIT
+    limit = client.stock_limit()
+    if limit is None:
+        return 0, 0, POSITION_LIMIT, POSITION_LIMIT
+    return limit
 
-def get_realized_profits(session):
+def get_realized_profits(client):
     """Get actual realized profits from the server"""
-    resp = session.get(f'http://localhost:{Port}/v1/securities')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    
-    securities = resp.json()
     total_realized = 0
     
-    for security in securities:
-        if security['ticker'] in ['CRZY_M', 'CRZY_A']:
-            total_realized += security.get('realized', 0)
+    quotes = client.quotes()
+    for ticker in ['CRZY_M', 'CRZY_A']:
+        if ticker in quotes:
+            total_realized += quotes[ticker].realized
     
     return total_realized
 
-def get_order_books(session):
+def get_order_books(client):
     """Get order books for both exchanges - get more depth"""
     # Get more levels to calculate VWAP properly
-    crzy_m_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=CRZY_M&limit=20')
-    crzy_a_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=CRZY_A&limit=20')
-    
-    if crzy_m_resp.status_code == 401 or crzy_a_resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    
-    crzy_m_book = crzy_m_resp.json()
-    crzy_a_book = crzy_a_resp.json()
+    crzy_m_book = depth_books(client.book('CRZY_M', 20))
+    crzy_a_book = depth_books(client.book('CRZY_A', 20))
     
     return crzy_m_book, crzy_a_book
 
-def calculate_vwap_and_quantity(order_book_side, desired_quantity):
+def size_arbitrage(buy_ticker, sell_ticker, buy_side, sell_side, max_quantity):
     """
-    Calculate VWAP for a given quantity by walking through order book levels.
-    Returns: (vwap, available_quantity, total_cost)
+    Walk buy_side asks against sell_side bids for the quantity that maximizes profit after fees.
+    Returns: (quantity, buy_vwap, sell_vwap, expected_profit)
     
-    order_book_side: list of orders (either bids or asks)
-    desired_quantity: how many shares we want to trade
+    buy_side / sell_side: DepthBooks (asks of the buy venue, bids of the sell venue)
+    max_quantity: cap from order size and position room
     """
-    if not order_book_side:
-        return None, 0, 0
-    
-    total_quantity = 0
-    total_cost = 0
-    
-    for level in order_book_side:
-        available_at_level = level['quantity'] - level['quantity_filled']
-        
-        if available_at_level <= 0:
-            continue
-        
-        # How much can we take from this level?
-        quantity_from_level = min(available_at_level, desired_quantity - total_quantity)
-        
-        # Add to totals
-        total_quantity += quantity_from_level
-        total_cost += quantity_from_level * level['price']
-        
-        # If we've accumulated enough, stop
-        if total_quantity >= desired_quantity:
-            break
-    
-    if total_quantity == 0:
-        return None, 0, 0
-    
-    vwap = total_cost / total_quantity
-    return vwap, total_quantity, total_cost
+    return cross_depth(buy_side, sell_side, TRADING_FEES[buy_ticker], TRADING_FEES[sell_ticker], max_quantity)
 
-def submit_order(session, ticker, action, quantity):
-    """Submit a market order"""
-    params = {
-        'ticker': ticker,
-        'type': 'MARKET',
-        'quantity': quantity,
-        'action': action
-    }
+def submit_order(client, ticker, action, quantity):
+    """Submit a market order (waits for the rate limiter first)"""
+    global number_of_orders
     
-    resp = session.post(f'http://localhost:{Port}/v1/orders', params=params)
+    waited = order_limiter.acquire()
+    if waited > 0:
+        print(f"   ⏱️  Rate limiter held order for {waited:.3f}s")
+    number_of_orders += 1
+    resp = client.post_order(ticker, action, quantity)
     
     if resp.status_code == 429:
-        # Rate limited
+        # Rate limited - hold back the next orders instead of sleeping here
         wait_time = resp.json().get('wait', 1)
-        print(f"⚠ Rate limited! Waiting {wait_time:.2f} seconds...")
-        sleep(wait_time)
+        print(f"⚠ Rate limited! Pausing orders for {wait_time:.2f} seconds...")
+        order_limiter.penalize(wait_time)
         return None
     
     if resp.status_code != 200:
         print(f"⚠ Order failed: {resp.json()}")
         return None
     
-    return resp.json()
-
-def speedbump(transaction_time):
-    """Calculate and apply speed bump"""
-    global total_speedbumps
-    global number_of_orders
-    
-    # Calculate speed bump for current order
-    order_speedbump = -transaction_time + 1/ORDER_LIMIT
-    
-    # Only apply if positive (otherwise transaction was already slow enough)
-    if order_speedbump > 0:
-        # Add to total
-        total_speedbumps = total_speedbumps + order_speedbump
-        
-        # Increment order counter
-        number_of_orders = number_of_orders + 1
-        
-        # Sleep for average speed bump
-        avg_speedbump = total_speedbumps / number_of_orders
-        
-        print(f"   ⏱️  Speed bump: {avg_speedbump:.3f}s (txn: {transaction_time:.3f}s)")
-        sleep(avg_speedbump)
-    else:
-        # Transaction was slow, no need for additional delay
-        number_of_orders = number_of_orders + 1
-        print(f"   ⏱️  No speed bump needed (txn was slow: {transaction_time:.3f}s)")
+    return decode.order(resp.content)
 
-def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, expected_buy_vwap, expected_sell_vwap, expected_profit):
+def execute_arbitrage(client, buy_ticker, sell_ticker, quantity, expected_buy_vwap, expected_sell_vwap, expected_profit):
     """Execute arbitrage by buying on one exchange and selling on the other"""
     global expected_total_profit
     
@@ -186,32 +116,32 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, expected_buy_v
     print(f"{'='*70}")
     
     # Execute buy order
-    start_time = time.time()
-    buy_order = submit_order(session, buy_ticker, 'BUY', quantity)
-    buy_time = time.time() - start_time
+    buy_order = submit_order(client, buy_ticker, 'BUY', quantity)
     
     if buy_order is None:
         print("❌ BUY order failed!")
         return False
     
-    print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.4f} on {buy_ticker}")
-    speedbump(buy_time)
+    print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.4f} on {buy_ticker}")
     
     # Execute sell order
-    start_time = time.time()
-    sell_order = submit_order(session, sell_ticker, 'SELL', quantity)
-    sell_time = time.time() - start_time
+    sell_order = submit_order(client, sell_ticker, 'SELL', quantity)
     
-    if sell_order is None:
-        print("❌ SELL order failed!")
-        return False
+    # Uneven legs leave unhedged inventory; trade the difference away right now
+    if sell_order is None or sell_order.quantity_filled != buy_order.quantity_filled:
+        if sell_order is None:
+            print("❌ SELL order failed!")
+        balance_legs(lambda ticker, action, qty: submit_order(client, ticker, action, qty),
+                     buy_ticker, sell_ticker, buy_order.quantity_filled,
+                     sell_order.quantity_filled if sell_order else 0, quotes=client.quotes)
+        if sell_order is None:
+            return False
     
-    print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.4f} on {sell_ticker}")
-    speedbump(sell_time)
+    print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.4f} on {sell_ticker}")
     
     # Calculate actual profit
-    filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-    actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+    filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+    actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
     
     print(f"💰 Actual profit: ${actual_profit:.2f} (Expected: ${expected_profit:.2f})")
     
@@ -227,14 +157,14 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, expected_buy_v
     
     return True
 
-def wait_for_case_start(session):
+def wait_for_case_start(client):
     """Wait for the case to start (status = ACTIVE and ticks moving)"""
     print("⏳ Waiting for case to start...")
     
     last_tick = -1
     while not shutdown:
         try:
-            tick, status, period = get_tick(session)
+            tick, status, period = get_tick(client)
             
             if status == 'ACTIVE':
                 if tick > last_tick or tick == 0:
@@ -254,7 +184,7 @@ def wait_for_case_start(session):
     
     return False
 
-def print_period_stats(session, period):
+def print_period_stats(client, period):
     """Print statistics for the completed period"""
     print("\n" + "="*70)
     print(f"📊 PERIOD {period} COMPLETED - Statistics:")
@@ -267,7 +197,7 @@ def print_period_stats(session, period):
     
     # Get actual realized profit from server
     try:
-        actual_profit = get_realized_profits(session)
+        actual_profit = get_realized_profits(client)
         print(f"   💰 Actual realized profit: ${actual_profit:.2f}")
     except Exception as e:
         print(f"   💰 Could not retrieve actual profit from server: {e}")
@@ -277,8 +207,7 @@ def print_period_stats(session, period):
 def main():
     global shutdown, opportunities_found, opportunities_skipped, trades_executed, evaluations, expected_total_profit
     
-    with requests.Session() as s:
-        s.headers.update(API_KEY)
+    with RitClient(Port, API_KEY) as s:
         
         print("\n" + "="*70)
         print(" ALGORITHMIC ARBITRAGE BOT - ALGO1 Case (VWAP Edition)")
@@ -370,36 +299,16 @@ def main():
                 best_spread = 0
                 
                 # Opportunity 1: Buy on Main, Sell on Alternate (M ask < A bid)
-                buy_m_vwap, buy_m_qty, _ = calculate_vwap_and_quantity(crzy_m_book['asks'], max_quantity)
-                sell_a_vwap, sell_a_qty, _ = calculate_vwap_and_quantity(crzy_a_book['bids'], max_quantity)
-                
-                if buy_m_vwap is not None and sell_a_vwap is not None:
-                    available_quantity = min(buy_m_qty, sell_a_qty, max_quantity)
-                    price_spread = sell_a_vwap - buy_m_vwap
-                    
-                    if available_quantity > 0 and price_spread > 0:
-                        expected_profit = price_spread * available_quantity
-                        
-                        if expected_profit > best_profit:
-                            best_profit = expected_profit
-                            best_spread = price_spread
-                            best_opportunity = ('CRZY_M', 'CRZY_A', available_quantity, buy_m_vwap, sell_a_vwap, expected_profit)
-                
                 # Opportunity 2: Buy on Alternate, Sell on Main (A ask < M bid)
-                buy_a_vwap, buy_a_qty, _ = calculate_vwap_and_quantity(crzy_a_book['asks'], max_quantity)
-                sell_m_vwap, sell_m_qty, _ = calculate_vwap_and_quantity(crzy_m_book['bids'], max_quantity)
-                
-                if buy_a_vwap is not None and sell_m_vwap is not None:
-                    available_quantity = min(buy_a_qty, sell_m_qty, max_quantity)
-                    price_spread = sell_m_vwap - buy_a_vwap
+                for buy_tkr, sell_tkr, buy_book, sell_book in (('CRZY_M', 'CRZY_A', crzy_m_book, crzy_a_book),
+                                                               ('CRZY_A', 'CRZY_M', crzy_a_book, crzy_m_book)):
+                    quantity, buy_vwap, sell_vwap, expected_profit = size_arbitrage(
+                        buy_tkr, sell_tkr, buy_book['asks'], sell_book['bids'], max_quantity)
                     
-                    if available_quantity > 0 and price_spread > 0:
-                        expected_profit = price_spread * available_quantity
-                        
-                        if expected_profit > best_profit:
-                            best_profit = expected_profit
-                            best_spread = price_spread
-                            best_opportunity = ('CRZY_A', 'CRZY_M', available_quantity, buy_a_vwap, sell_m_vwap, expected_profit)
+                    if quantity > 0 and expected_profit > best_profit:
+                        best_profit = expected_profit
+                        best_spread = sell_vwap - buy_vwap
+                        best_opportunity = (buy_tkr, sell_tkr, quantity, buy_vwap, sell_vwap, expected_profit)
                 
                 # Print evaluation status and execute if spread is large enough
                 if best_opportunity:
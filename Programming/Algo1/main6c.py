@@ -1,8 +1,15 @@
+import os
+import sys
 import requests
 import signal
 import time
 from time import sleep
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.ledger import PositionLedger, start_reconciler
+from rit.legs import balance_legs
+
 Port = 10006
 
 class ApiException(Exception):
@@ -23,6 +30,9 @@ ORDER_LIMIT = 10  # orders per second (adjust based on actual rate limit)
 MAX_ORDER_SIZE = 10000
 POSITION_LIMIT = 25000
 
+# Positions from our own fills; /limits is only read by the background reconciler
+ledger = PositionLedger(('CRZY_M', 'CRZY_A'), POSITION_LIMIT, POSITION_LIMIT)
+
 # Speed bump tracking
 number_of_orders = 0
 total_speedbumps = 0
@@ -55,31 +65,39 @@ def get_limits(session):
     
     return 0, 0, POSITION_LIMIT, POSITION_LIMIT
 
+def fetch_positions():
+    """Positions and limits for the ledger's background reconcile (own session)"""
+    with requests.Session() as session:
+        session.headers.update(API_KEY)
+        resp = session.get(f'http://localhost:{Port}/v1/securities')
+        positions = {ticker: quote.position for ticker, quote in decode.quotes(resp.content).items()}
+        return positions, get_limits(session)
+
 def get_realized_profits(session):
     """Get actual realized profits from the server"""
     resp = session.get(f'http://localhost:{Port}/v1/securities')
     if resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    securities = resp.json()
+    quotes = decode.quotes(resp.content)
     total_realized = 0
     
-    for security in securities:
-        if security['ticker'] in ['CRZY_M', 'CRZY_A']:
-            total_realized += security.get('realized', 0)
+    for ticker in ['CRZY_M', 'CRZY_A']:
+        if ticker in quotes:
+            total_realized += quotes[ticker].realized
     
     return total_realized
 
 def get_order_books(session):
-    """Get order books for both exchanges - TOP OF BOOK ONLY"""
+    """Get order books for both exchanges - TOP OF BOOK ONLY, as (bids, asks) BookLevel lists"""
     crzy_m_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=CRZY_M&limit=1')
     crzy_a_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=CRZY_A&limit=1')
     
     if crzy_m_resp.status_code == 401 or crzy_a_resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    crzy_m_book = crzy_m_resp.json()
-    crzy_a_book = crzy_a_resp.json()
+    crzy_m_book = decode.levels(crzy_m_resp.content)
+    crzy_a_book = decode.levels(crzy_a_resp.content)
     
     return crzy_m_book, crzy_a_book
 
@@ -92,7 +110,11 @@ def submit_order(session, ticker, action, quantity):
         'action': action
     }
     
-    resp = session.post(f'http://localhost:{Port}/v1/orders', params=params)
+    try:
+        resp = session.post(f'http://localhost:{Port}/v1/orders', params=params)
+    except requests.RequestException:
+        ledger.unknown()
+        raise
     
     if resp.status_code == 429:
         # Rate limited
@@ -103,9 +125,12 @@ def submit_order(session, ticker, action, quantity):
     
     if resp.status_code != 200:
         print(f"⚠ Order failed: {resp.json()}")
+        ledger.unknown()
         return None
     
-    return resp.json()
+    order = decode.order(resp.content)
+    ledger.apply_order(order)
+    return order
 
 def speedbump(transaction_time):
     """Calculate and apply speed bump"""
@@ -126,6 +151,13 @@ def speedbump(transaction_time):
     if avg_speedbump > 0:
         sleep(avg_speedbump)
 
+def hedge_order(session, ticker, action, quantity):
+    """Submit an order that evens out the two legs, paying its speed bump like any other"""
+    start_time = time.time()
+    order = submit_order(session, ticker, action, quantity)
+    speedbump(time.time() - start_time)
+    return order
+
 def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sell_price):
     """Execute arbitrage by buying on one exchange and selling on the other"""
     global expected_total_profit
@@ -148,7 +180,7 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
         print("❌ BUY order failed!")
         return False
     
-    print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.2f} on {buy_ticker}")
+    print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.2f} on {buy_ticker}")
     speedbump(buy_time)
     
     # Execute sell order
@@ -156,16 +188,22 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
     sell_order = submit_order(session, sell_ticker, 'SELL', quantity)
     sell_time = time.time() - start_time
     
-    if sell_order is None:
-        print("❌ SELL order failed!")
-        return False
-    
-    print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.2f} on {sell_ticker}")
+    # Uneven legs leave unhedged inventory; trade the difference away right now
+    if sell_order is None or sell_order.quantity_filled != buy_order.quantity_filled:
+        if sell_order is None:
+            print("❌ SELL order failed!")
+        balance_legs(lambda ticker, action, qty: hedge_order(session, ticker, action, qty),
+                     buy_ticker, sell_ticker, buy_order.quantity_filled,
+                     sell_order.quantity_filled if sell_order else 0)
+        if sell_order is None:
+            return False
+    
+    print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.2f} on {sell_ticker}")
     speedbump(sell_time)
     
     # Calculate actual profit
-    filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-    actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+    filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+    actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
     
     # Add to expected total profit
     expected_total_profit += expected_profit
@@ -227,6 +265,7 @@ def main():
     
     with requests.Session() as s:
         s.headers.update(API_KEY)
+        stop_reconciler = start_reconciler(ledger, fetch_positions)
         
         print("\n" + "="*70)
         print(" ALGORITHMIC ARBITRAGE BOT - ALGO1 Case (Simple Edition)")
@@ -265,6 +304,7 @@ def main():
                         expected_total_profit = 0
                         number_of_orders = 0
                         total_speedbumps = 0
+                        ledger.reset()
                     
                     last_period = period
                 
@@ -281,14 +321,8 @@ def main():
                     sleep(0.5)
                     continue
                 
-                # Get current limits
-                gross_position, net_position, gross_limit, net_limit = get_limits(s)
-                
-                # Calculate remaining capacity
-                remaining_capacity = min(
-                    gross_limit - gross_position,
-                    net_limit - abs(net_position)
-                )
+                # Remaining capacity from the local ledger (no /limits round trip)
+                remaining_capacity = ledger.headroom()
                 
                 if remaining_capacity <= 0:
                     print(f"⚠ Position limit reached (Tick {tick}). Waiting...")
@@ -296,14 +330,14 @@ def main():
                     continue
                 
                 # Get order books (TOP OF BOOK ONLY - fast!)
-                crzy_m_book, crzy_a_book = get_order_books(s)
+                (crzy_m_bids, crzy_m_asks), (crzy_a_bids, crzy_a_asks) = get_order_books(s)
                 
                 # Check if books have valid data
-                if not crzy_m_book.get('bids') or not crzy_m_book.get('asks'):
+                if not crzy_m_bids or not crzy_m_asks:
                     sleep(0.1)
                     continue
                     
-                if not crzy_a_book.get('bids') or not crzy_a_book.get('asks'):
+                if not crzy_a_bids or not crzy_a_asks:
                     sleep(0.1)
                     continue
                 
@@ -311,15 +345,15 @@ def main():
                 evaluations += 1
                 
                 # Extract best bid/ask for both exchanges
-                crzy_m_bid = crzy_m_book['bids'][0]['price']
-                crzy_m_ask = crzy_m_book['asks'][0]['price']
-                crzy_m_bid_size = crzy_m_book['bids'][0]['quantity'] - crzy_m_book['bids'][0]['quantity_filled']
-                crzy_m_ask_size = crzy_m_book['asks'][0]['quantity'] - crzy_m_book['asks'][0]['quantity_filled']
+                crzy_m_bid = crzy_m_bids[0].price
+                crzy_m_ask = crzy_m_asks[0].price
+                crzy_m_bid_size = crzy_m_bids[0].remaining
+                crzy_m_ask_size = crzy_m_asks[0].remaining
                 
-                crzy_a_bid = crzy_a_book['bids'][0]['price']
-                crzy_a_ask = crzy_a_book['asks'][0]['price']
-                crzy_a_bid_size = crzy_a_book['bids'][0]['quantity'] - crzy_a_book['bids'][0]['quantity_filled']
-                crzy_a_ask_size = crzy_a_book['asks'][0]['quantity'] - crzy_a_book['asks'][0]['quantity_filled']
+                crzy_a_bid = crzy_a_bids[0].price
+                crzy_a_ask = crzy_a_asks[0].price
+                crzy_a_bid_size = crzy_a_bids[0].remaining
+                crzy_a_ask_size = crzy_a_asks[0].remaining
                 
                 # Check for arbitrage opportunities
                 
@@ -332,7 +366,7 @@ def main():
                         crzy_m_ask_size,      # Liquidity on Main ask
                         crzy_a_bid_size,      # Liquidity on Alternate bid
                         MAX_ORDER_SIZE,       # Per-order limit
-                        remaining_capacity    # Position limit
+                        ledger.pair_headroom('CRZY_M', 'CRZY_A')    # Position limit
                     )
                     
                     if max_quantity > 0:
@@ -348,7 +382,7 @@ def main():
                         crzy_a_ask_size,      # Liquidity on Alternate ask
                         crzy_m_bid_size,      # Liquidity on Main bid
                         MAX_ORDER_SIZE,       # Per-order limit
-                        remaining_capacity    # Position limit
+                        ledger.pair_headroom('CRZY_A', 'CRZY_M')    # Position limit
                     )
                     
                     if max_quantity > 0:
@@ -366,6 +400,8 @@ def main():
                 print(f"❌ Error: {e}")
                 sleep(0.5)
         
+        stop_reconciler.set()
+        
         # Final stats when manually stopped
         print("\n" + "="*70)
         print("🛑 Bot manually stopped.")
@@ -375,6 +411,7 @@ def main():
         print(f"   Trades executed: {trades_executed}")
         print(f"   Total orders submitted: {number_of_orders}")
         print(f"   Expected total profit: ${expected_total_profit:.2f}")
+        print(f"   Ledger reconciles: {ledger.reconciles}")
         
         # Get actual realized profit from server
         try:
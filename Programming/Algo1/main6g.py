@@ -1,8 +1,15 @@
+import os
+import sys
 import requests
 import signal
 import time
 from time import sleep
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit import decode
+from rit.book import depth_books
+from rit.legs import balance_legs
+
 Port = 10006
 
 class ApiException(Exception):
@@ -63,12 +70,12 @@ def get_realized_profits(session):
     if resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    securities = resp.json()
+    quotes = decode.quotes(resp.content)
     total_realized = 0
     
-    for security in securities:
-        if security['ticker'] in ['CRZY_M', 'CRZY_A']:
-            total_realized += security.get('realized', 0)
+    for ticker in ['CRZY_M', 'CRZY_A']:
+        if ticker in quotes:
+            total_realized += quotes[ticker].realized
     
     return total_realized
 
@@ -81,8 +88,8 @@ def get_order_books(session):
     if crzy_m_resp.status_code == 401 or crzy_a_resp.status_code == 401:
         raise ApiException('API key mismatch')
     
-    crzy_m_book = crzy_m_resp.json()
-    crzy_a_book = crzy_a_resp.json()
+    crzy_m_book = depth_books(crzy_m_resp.json())
+    crzy_a_book = depth_books(crzy_a_resp.json())
     
     return crzy_m_book, crzy_a_book
 
@@ -92,25 +99,8 @@ def get_best_price_and_quantity(order_book_side, desired_quantity):
     Replaces the complex VWAP calculation for speed.
     Returns: (price, available_quantity, total_cost)
     """
-    if not order_book_side:
-        return None, 0, 0
-    
     # Just grab the first level (Top of Book)
-    best_level = order_book_side[0]
-    price = best_level['price']
-    
-    # Calculate how much is actually available at this top price
-    available_at_level = best_level['quantity'] - best_level['quantity_filled']
-    
-    if available_at_level <= 0:
-        return None, 0, 0
-
-    # We can only trade what is available at the top level
-    quantity_to_trade = min(available_at_level, desired_quantity)
-    
-    total_cost = quantity_to_trade * price
-    
-    return price, quantity_to_trade, total_cost
+    return order_book_side.top(desired_quantity)
 
 def submit_order(session, ticker, action, quantity):
     """Submit a market order"""
@@ -134,7 +124,7 @@ def submit_order(session, ticker, action, quantity):
         print(f"⚠ Order failed: {resp.json()}")
         return None
     
-    return resp.json()
+    return decode.order(resp.content)
 
 def speedbump(transaction_time):
     """Calculate and apply speed bump"""
@@ -162,6 +152,13 @@ def speedbump(transaction_time):
         number_of_orders = number_of_orders + 1
         print(f"   ⏱️  No speed bump needed (txn was slow: {transaction_time:.3f}s)")
 
+def hedge_order(session, ticker, action, quantity):
+    """Submit an order that evens out the two legs, paying its speed bump like any other"""
+    start_time = time.time()
+    order = submit_order(session, ticker, action, quantity)
+    speedbump(time.time() - start_time)
+    return order
+
 def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sell_price, expected_profit):
     """Execute arbitrage by buying on one exchange and selling on the other"""
     global expected_total_profit
@@ -183,7 +180,7 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
         print("❌ BUY order failed!")
         return False
     
-    print(f"✅ BUY  executed: {buy_order['quantity_filled']:,} shares @ ${buy_order['vwap']:.2f} on {buy_ticker}")
+    print(f"✅ BUY  executed: {buy_order.quantity_filled:,} shares @ ${buy_order.vwap:.2f} on {buy_ticker}")
     speedbump(buy_time)
     
     # Execute sell order
@@ -191,16 +188,22 @@ def execute_arbitrage(session, buy_ticker, sell_ticker, quantity, buy_price, sel
     sell_order = submit_order(session, sell_ticker, 'SELL', quantity)
     sell_time = time.time() - start_time
     
-    if sell_order is None:
-        print("❌ SELL order failed!")
-        return False
-    
-    print(f"✅ SELL executed: {sell_order['quantity_filled']:,} shares @ ${sell_order['vwap']:.2f} on {sell_ticker}")
+    # Uneven legs leave unhedged inventory; trade the difference away right now
+    if sell_order is None or sell_order.quantity_filled != buy_order.quantity_filled:
+        if sell_order is None:
+            print("❌ SELL order failed!")
+        balance_legs(lambda ticker, action, qty: hedge_order(session, ticker, action, qty),
+                     buy_ticker, sell_ticker, buy_order.quantity_filled,
+                     sell_order.quantity_filled if sell_order else 0)
+        if sell_order is None:
+            return False
+    
+    print(f"✅ SELL executed: {sell_order.quantity_filled:,} shares @ ${sell_order.vwap:.2f} on {sell_ticker}")
     speedbump(sell_time)
     
     # Calculate actual profit
-    filled_quantity = min(buy_order['quantity_filled'], sell_order['quantity_filled'])
-    actual_profit = (sell_order['vwap'] - buy_order['vwap']) * filled_quantity
+    filled_quantity = min(buy_order.quantity_filled, sell_order.quantity_filled)
+    actual_profit = (sell_order.vwap - buy_order.vwap) * filled_quantity
     
     print(f"💰 Actual profit: ${actual_profit:.2f} (Expected: ${expected_profit:.2f})")
     
@@ -1,12 +1,16 @@
-import requests
+import os
 import signal
+import sys
 import time
 from time import sleep
 
-Port = 65535
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit.client import RitClient
+from rit.clock import CaseClock
+from rit.orders import ORDERS_INTERVAL, OrderTable, ladder, requote
+from rit.ratelimit import TokenBucket
 
-class ApiException(Exception):
-    pass
+Port = 65535
 
 # Signal handler for graceful shutdown
 def signal_handler(signum, frame):
@@ -25,9 +29,15 @@ POSITION_LIMIT = 25000  # position limit (gross and net)
 MAX_ORDERS = 5  # 25000 / 5000 = 5 orders to reach position limit
 SPREAD = 0.02  # minimum spread per side before we submit orders
 
-# Speed bump tracking
+# Send orders over raw keep-alive sockets with pre-built request bytes (rit/wire.py)
+RAW_ORDERS = False
+
+# Order rate limiting
+order_limiter = TokenBucket(ORDER_LIMIT)
 number_of_orders = 0
-total_speedbumps = 0
+
+# Our resting orders, kept from submission responses plus a periodic diff poll
+open_orders = OrderTable('ALGO')
 
 # Statistics tracking
 pairs_submitted = 0
@@ -35,215 +45,66 @@ spreads_captured = 0
 single_side_filled = False
 single_side_transaction_time = 0
 
-def get_tick(session):
+def get_tick(client):
     """Get current tick and case status"""
-    resp = session.get(f'http://localhost:{Port}/v1/case')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    case = resp.json()
-    return case['tick'], case['status'], case['period']
+    return client.tick()
 
-def get_security_info(session, ticker='ALGO'):
-    """Get security info including position, prices, and P&L"""
-    resp = session.get(f'http://localhost:{Port}/v1/securities', params={'ticker': ticker})
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    
-    securities = resp.json()
-    for security in securities:
-        if security['ticker'] == ticker:
-            return {
-                'position': security['position'],
-                'last': security['last'],
-                'bid': security['bid'],
-                'bid_size': security['bid_size'],
-                'ask': security['ask'],
-                'ask_size': security['ask_size'],
-                'realized': security['realized'],
-                'unrealized': security['unrealized']
-            }
-    
-    return None
+def get_security_info(client, ticker='ALGO'):
+    """Get security info including position, prices, and P&L (a Quote record, or None)"""
+    return client.quotes(ticker).get(ticker)
 
-def get_book(session, ticker='ALGO'):
+def get_book(client, ticker='ALGO'):
     """Get order book - returns best bid and ask prices"""
-    resp = session.get(f'http://localhost:{Port}/v1/securities/book', params={'ticker': ticker, 'limit': 1})
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    
-    if resp.ok:
-        book = resp.json()
-        bid_price = book['bids'][0]['price'] if book['bids'] else 0
-        ask_price = book['asks'][0]['price'] if book['asks'] else 0
-        return bid_price, ask_price
-    return 0, 0
-
-def get_open_orders(session, ticker='ALGO'):
-    """Get all open orders and separate them into buys and sells"""
-    resp = session.get(f'http://localhost:{Port}/v1/orders?status=OPEN')
-    if resp.status_code == 401:
-        raise ApiException('API key mismatch')
-    
-    open_buys_volume = 0
-    open_sells_volume = 0
-    buy_ids = []
-    buy_prices = []
-    buy_volumes = []
-    buy_filled = []
-    sell_ids = []
-    sell_prices = []
-    sell_volumes = []
-    sell_filled = []
-    
-    if resp.ok:
-        orders = resp.json()
-        for order in orders:
-            if order['ticker'] == ticker:
-                remaining = order['quantity'] - order['quantity_filled']
-                if order['action'] == 'BUY':
-                    open_buys_volume += remaining
-                    buy_ids.append(order['order_id'])
-                    buy_prices.append(order['price'])
-                    buy_volumes.append(order['quantity'])
-                    buy_filled.append(order['quantity_filled'])
-                elif order['action'] == 'SELL':
-                    open_sells_volume += remaining
-                    sell_ids.append(order['order_id'])
-                    sell_prices.append(order['price'])
-                    sell_volumes.append(order['quantity'])
-                    sell_filled.append(order['quantity_filled'])
-    
-    return {
-        'buys': {
-            'volume': open_buys_volume,
-            'ids': buy_ids,
-            'prices': buy_prices,
-            'order_volumes': buy_volumes,
-            'filled': buy_filled
-        },
-        'sells': {
-            'volume': open_sells_volume,
-            'ids': sell_ids,
-            'prices': sell_prices,
-            'order_volumes': sell_volumes,
-            'filled': sell_filled
-        }
-    }
-
-def submit_limit_order(session, ticker, action, quantity, price):
-    """Submit a limit order"""
-    params = {
-        'ticker': ticker,
-        'type': 'LIMIT',
-        'quantity': quantity,
-        'action': action,
-        'price': price
-    }
-    
-    resp = session.post(f'http://localhost:{Port}/v1/orders', params=params)
-    
-    if resp.status_code == 429:
-        wait_time = resp.json().get('wait', 1)
-        print(f"⚠️ Rate limited! Waiting {wait_time:.2f} seconds...")
-        sleep(wait_time)
-        return None
-    
-    if resp.status_code != 200:
-        error_msg = resp.json() if resp.content else "Unknown error"
-        print(f"⚠️ Order failed: {error_msg}")
-        return None
-    
-    return resp.json()
+    bids, asks = client.levels(ticker, 1)
+    bid_price = bids[0].price if bids else 0
+    ask_price = asks[0].price if asks else 0
+    return bid_price, ask_price
 
-def cancel_order(session, order_id):
-    """Cancel an order by ID"""
-    resp = session.delete(f'http://localhost:{Port}/v1/orders/{order_id}')
-    return resp.ok
+def sync_open_orders(client):
+    """Diff /orders?status=OPEN into the local order table (one request)"""
+    started = time.monotonic()
+    open_orders.sync(client.orders('OPEN'), started)
 
-def cancel_all_orders(session):
+def cancel_all_orders(client):
     """Cancel all open orders"""
-    resp = session.post(f'http://localhost:{Port}/v1/commands/cancel', params={'all': 1})
-    return resp.ok
+    return client.cancel_all(all=1)
 
-def speedbump(transaction_time):
-    """Calculate and apply speed bump"""
-    global total_speedbumps
-    global number_of_orders
-    
-    # Calculate speed bump for current order
-    order_speedbump = -transaction_time + 1/ORDER_LIMIT
-    
-    # Add to total
-    total_speedbumps = total_speedbumps + order_speedbump
+def buy_sell(client, sell_price, buy_price, quantity=MAX_ORDER_SIZE):
+    """Submit MAX_ORDERS pairs of buy and sell orders, all at once"""
+    global pairs_submitted, number_of_orders
     
-    # Increment order counter
-    number_of_orders = number_of_orders + 1
+    # Alternate sides so both are live even if the limiter has to space the tail
+    quotes = [('SELL', quantity, sell_price), ('BUY', quantity, buy_price)] * MAX_ORDERS
+    results = ladder(client, order_limiter, open_orders, quotes)
+    number_of_orders += len(results)
     
-    # Sleep for average speed bump (only if positive)
-    avg_speedbump = total_speedbumps / number_of_orders
-    if avg_speedbump > 0:
-        sleep(avg_speedbump)
+    sells = sum(1 for action, _, _, order in results if action == 'SELL' and order is not None)
+    buys = sum(1 for action, _, _, order in results if action == 'BUY' and order is not None)
+    pairs_submitted += min(buys, sells)
+    print(f"   ✅ Submitted {buys} BUY @ ${buy_price:.2f} | {sells} SELL @ ${sell_price:.2f}")
+    return results
 
-def buy_sell(session, sell_price, buy_price, quantity=MAX_ORDER_SIZE):
-    """Submit a pair of buy and sell orders"""
-    global pairs_submitted
+def re_order(client, price, action):
+    """Cancel and re-submit every open order on one side at a new price
     
-    start_time = time.time()
-    
-    # Submit MAX_ORDERS pairs to maximize position usage
-    for i in range(MAX_ORDERS):
-        # Submit sell order
-        session.post(f'http://localhost:{Port}/v1/orders', params={
-            'ticker': 'ALGO',
-            'type': 'LIMIT',
-            'quantity': quantity,
-            'price': sell_price,
-            'action': 'SELL'
-        })
-        
-        # Submit buy order
-        session.post(f'http://localhost:{Port}/v1/orders', params={
-            'ticker': 'ALGO',
-            'type': 'LIMIT',
-            'quantity': quantity,
-            'price': buy_price,
-            'action': 'BUY'
-        })
-    
-    transaction_time = time.time() - start_time
-    speedbump(transaction_time)
+    One bulk cancel, then the unfilled remainder of each order is re-posted
+    concurrently under the rate limiter.
+    """
+    global number_of_orders
     
-    pairs_submitted += MAX_ORDERS
-    print(f"   ✅ Submitted {MAX_ORDERS} pairs: BUY @ ${buy_price:.2f} | SELL @ ${sell_price:.2f}")
+    results = requote(client, order_limiter, open_orders, action, price)
+    number_of_orders += len(results)
+    placed = sum(1 for _, _, order in results if order is not None)
+    if placed < len(results):
+        print(f"   ⚠️ Re-posted {placed}/{len(results)} {action} orders")
+    return results
 
-def re_order(session, order_ids, volumes_filled, volumes, price, action):
-    """Cancel and re-submit orders at a new price"""
-    for i in range(len(order_ids)):
-        order_id = order_ids[i]
-        volume = volumes[i]
-        volume_filled = volumes_filled[i]
-        
-        # If order is partially filled, adjust volume
-        if volume_filled != 0:
-            volume = MAX_ORDER_SIZE - volume_filled
-        
-        # Delete then re-submit
-        deleted = session.delete(f'http://localhost:{Port}/v1/orders/{order_id}')
-        if deleted.ok:
-            session.post(f'http://localhost:{Port}/v1/orders', params={
-                'ticker': 'ALGO',
-                'type': 'LIMIT',
-                'quantity': volume,
-                'price': price,
-                'action': action
-            })
-
-def wait_for_case_start(session):
+def wait_for_case_start(client):
     print("⏳ Waiting for case to start...")
     last_tick = -1
     while not shutdown:
         try:
-            tick, status, period = get_tick(session)
+            tick, status, period = get_tick(client)
             if status == 'ACTIVE':
                 if tick > last_tick or tick == 0:
                     print(f"✅ Case is ACTIVE! Period {period}, Tick {tick}")
@@ -269,11 +130,10 @@ def print_period_stats(realized, period):
 
 def main():
     global shutdown, pairs_submitted, spreads_captured
-    global number_of_orders, total_speedbumps
+    global number_of_orders
     global single_side_filled, single_side_transaction_time
     
-    with requests.Session() as s:
-        s.headers.update(API_KEY)
+    with RitClient(Port, API_KEY, raw_orders=RAW_ORDERS) as s:
         
         print("\n" + "="*70)
         print("   MARKET MAKING BOT - ALGO2")
@@ -293,10 +153,16 @@ def main():
         last_period = 0
         last_status = 'ACTIVE'
         last_realized = 0
+        last_position = None
+        next_sync = 0.0
+        
+        # Tick/status/period from a local clock; /case is only read around tick boundaries
+        clock = CaseClock(s)
         
         while not shutdown:
             try:
-                tick, status, period = get_tick(s)
+                now = time.monotonic()
+                tick, status, period = clock.read()
                 
                 # Handle period changes
                 if period != last_period:
@@ -306,9 +172,10 @@ def main():
                         # Reset stats
                         pairs_submitted = 0
                         number_of_orders = 0
-                        total_speedbumps = 0
                         single_side_filled = False
                         single_side_transaction_time = 0
+                        open_orders.clear()
+                        last_position = None
                     last_period = period
                 
                 # Handle status changes
@@ -329,29 +196,24 @@ def main():
                 
                 # Get security info
                 security = get_security_info(s, 'ALGO')
-                if security is None or security['bid'] == 0 or security['ask'] == 0:
+                if security is None or security.bid == 0 or security.ask == 0:
+                    clock.poke()  # an empty book may mean the case stopped
                     sleep(0.1)
                     continue
                 
-                bid_price = security['bid']
-                ask_price = security['ask']
-                position = security['position']
-                last_realized = security['realized']
-                
-                # Get open orders
-                orders = get_open_orders(s, 'ALGO')
-                open_buys_volume = orders['buys']['volume']
-                open_sells_volume = orders['sells']['volume']
-                
-                buy_ids = orders['buys']['ids']
-                buy_prices = orders['buys']['prices']
-                buy_volumes = orders['buys']['order_volumes']
-                buy_filled = orders['buys']['filled']
+                bid_price = security.bid
+                ask_price = security.ask
+                position = security.position
+                last_realized = security.realized
                 
-                sell_ids = orders['sells']['ids']
-                sell_prices = orders['sells']['prices']
-                sell_volumes = orders['sells']['order_volumes']
-                sell_filled = orders['sells']['filled']
+                # Open orders come from the local table; a moved position means
+                # one of ours traded, so refresh it then (or every ORDERS_INTERVAL)
+                if position != last_position or now >= next_sync:
+                    sync_open_orders(s)
+                    next_sync = time.monotonic() + ORDERS_INTERVAL
+                    last_position = position
+                open_buys_volume = open_orders.volume('BUY')
+                open_sells_volume = open_orders.volume('SELL')
                 
                 # CASE 1: No open orders - submit new pairs
                 if open_sells_volume == 0 and open_buys_volume == 0:
@@ -371,7 +233,9 @@ def main():
                         print(f"\n[Tick {tick:3d}] Submitting market-making orders")
                         print(f"   Position: {position:,} | Spread: ${bid_ask_spread:.2f}")
                         
-                        buy_sell(s, sell_price, buy_price)
+                        results = buy_sell(s, sell_price, buy_price)
+                        if any(order is None for *_, order in results):
+                            clock.poke()  # refused orders may mean the case stopped
                     else:
                         if tick % 20 == 0:
                             print(f"[Tick {tick:3d}] Spread too tight: ${bid_ask_spread:.2f} < ${SPREAD*2:.2f}")
@@ -388,7 +252,7 @@ def main():
                     # CASE 2a: Ask side completely filled, buy orders remaining
                     if open_sells_volume == 0 and open_buys_volume > 0:
                         # Check if our buy orders are at the top of the book
-                        if buy_prices and buy_prices[0] == bid_price:
+                        if open_orders.top('BUY') == bid_price:
                             # Already at best price, wait
                             pass
                         # Wait at least 3 seconds before re-ordering
@@ -401,15 +265,12 @@ def main():
                             if potential_profit >= 0.01 or tick - single_side_transaction_time >= 6:
                                 print(f"[Tick {tick:3d}] Re-ordering BUY side at ${next_buy_price:.2f}")
                                 
-                                start_time = time.time()
-                                re_order(s, buy_ids, buy_filled, buy_volumes, next_buy_price, 'BUY')
-                                transaction_time = time.time() - start_time
-                                speedbump(transaction_time)
+                                re_order(s, next_buy_price, 'BUY')
                     
                     # CASE 2b: Bid side completely filled, sell orders remaining
                     elif open_buys_volume == 0 and open_sells_volume > 0:
                         # Check if our sell orders are at the top of the book
-                        if sell_prices and sell_prices[0] == ask_price:
+                        if open_orders.top('SELL') == ask_price:
                             # Already at best price, wait
                             pass
                         # Wait at least 3 seconds before re-ordering
@@ -422,15 +283,12 @@ def main():
                             if potential_profit >= 0.01 or tick - single_side_transaction_time >= 6:
                                 print(f"[Tick {tick:3d}] Re-ordering SELL side at ${next_sell_price:.2f}")
                                 
-                                start_time = time.time()
-                                re_order(s, sell_ids, sell_filled, sell_volumes, next_sell_price, 'SELL')
-                                transaction_time = time.time() - start_time
-                                speedbump(transaction_time)
+                                re_order(s, next_sell_price, 'SELL')
                     
                     # CASE 2c: Both sides have orders - show status periodically
                     else:
                         if tick % 30 == 0:
-                            total_pnl = security['realized'] + security['unrealized']
+                            total_pnl = security.realized + security.unrealized
                             print(f"[Tick {tick:3d}] Orders active | Pos: {position:,} | P&L: ${total_pnl:.2f}")
                 
             except KeyboardInterrupt:
@@ -446,10 +304,10 @@ def main():
             if security:
                 print(f"\n{'='*70}")
                 print(f"   BOT STOPPED")
-                print(f"   Final Position: {security['position']:,}")
-                print(f"   Realized P&L: ${security['realized']:.2f}")
-                print(f"   Unrealized P&L: ${security['unrealized']:.2f}")
-                print(f"   Total P&L: ${security['realized'] + security['unrealized']:.2f}")
+                print(f"   Final Position: {security.position:,}")
+                print(f"   Realized P&L: ${security.realized:.2f}")
+                print(f"   Unrealized P&L: ${security.unrealized:.2f}")
+                print(f"   Total P&L: ${security.realized + security.unrealized:.2f}")
                 print(f"{'='*70}\n")
         except:
             pass
@@ -1,13 +1,18 @@
-import requests
+import os
 import signal
+import time
 from time import sleep
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from rit.client import RitClient
+from rit.clock import CaseClock
+from rit.orders import ORDERS_INTERVAL, OrderTable, ladder, requote
+from rit.ratelimit import TokenBucket
+
 # This is a python example algorithm using REST API for the RIT ALGO2 Case
 
-# this class definition allows us to print error messages and stop the program
-class ApiException(Exception):
-    pass
+Port = 65535
 
 # this signal handler allows for a graceful shutdown when CTRL+C is pressed
 def signal_handler(signum, frame):
@@ -29,119 +34,52 @@ MAX_ORDERS = 5
 # allowed spread before we sell or buy shares
 SPREAD = .05
 
-# This helper method returns the current 'tick' of the running case.
-def get_tick(session):
-    resp = session.get('http://localhost:65535/v1/case')
-    if resp.ok:
-        case = resp.json()
-        return case['tick']
-    raise ApiException('Authorization error Please check API key.')
+# our resting orders, from submission responses plus a periodic diff poll
+open_orders = OrderTable('ALGO')
+# the API allows 10 orders per second
+order_limiter = TokenBucket(10)
 
 # This helper method returns the bid and ask first row for a given security.
-def ticker_bid_ask(session, ticker):
-    payload = {'ticker': ticker}
-    resp = session.get('http://localhost:65535/v1/securities/book', params=payload)
-    if resp.ok:
-        book = resp.json()
-        return book['bids'][0]['price'], book['asks'][0]['price']
-    raise ApiException('Authorization error Please check API key.')
+def ticker_bid_ask(client, ticker):
+    bids, asks = client.levels(ticker, 1)
+    return bids[0].price, asks[0].price
 
-# This helper method returns information about all the open sell orders
-def open_sells(session):
-    resp = session.get('http://localhost:65535/v1/orders?status=OPEN')
-    if resp.ok:
-        open_sells_volume = 0  # total combined volume of all open sells
-        ids = []               # all open sell ids
-        prices = []            # all open sell prices
-        order_volumes = []     # all open sell volumes
-        volume_filled = []     # volume filled for each open sell order
-        
-        open_orders = resp.json()
-        for order in open_orders:
-            if order['action'] == 'SELL':
-                volume_filled.append(order['quantity_filled'])
-                order_volumes.append(order['quantity'])
-                open_sells_volume = open_sells_volume + order['quantity']
-                prices.append(order['price'])
-                ids.append(order['order_id'])
-        return volume_filled, open_sells_volume, ids, prices, order_volumes
-    raise ApiException('Authorization error Please check API key.')
+# This helper method refreshes the local table of our open orders with a single request
+def sync_open_orders(client):
+    started = time.monotonic()
+    open_orders.sync(client.orders('OPEN'), started)
 
-# this helper method returns information about all open buy orders
-def open_buys(session):
-    resp = session.get('http://localhost:65535/v1/orders?status=OPEN')
-    if resp.ok:
-        open_buys_volume = 0  # total combined volume of all open buys
-        ids = []              # all open buy ids
-        prices = []           # all open buy prices
-        order_volumes = []    # all open buy volumes
-        volume_filled = []    # volume filled of each open buy order
-        
-        open_orders = resp.json()
-        for order in open_orders:
-            if order['action'] == 'BUY':
-                open_buys_volume = open_buys_volume + order['quantity']
-                volume_filled.append(order['quantity_filled'])
-                order_volumes.append(order['quantity'])
-                prices.append(order['price'])
-                ids.append(order['order_id'])
-        
-        return volume_filled, open_buys_volume, ids, prices, order_volumes
-    raise ApiException('Authorization error Please check API key.')
+# this helper method will buy and sell the maximum number of shares, all posted at once
+def buy_sell(client, sell_price, buy_price):
+    ladder(client, order_limiter, open_orders, [('SELL', MAX_VOLUME, sell_price), ('BUY', MAX_VOLUME, buy_price)] * MAX_ORDERS)
 
-# this helper method will buy and sell the maximum number of shares
-def buy_sell(session, sell_price, buy_price):
-    for i in range(MAX_ORDERS):
-        session.post('http://localhost:65535/v1/orders', params={'ticker': 'ALGO',
-            'type': 'LIMIT', 'quantity': MAX_VOLUME, 'price': sell_price, 'action': 'SELL'})
-        session.post('http://localhost:65535/v1/orders', params={'ticker': 'ALGO',
-            'type': 'LIMIT', 'quantity': MAX_VOLUME, 'price': buy_price, 'action': 'BUY'})
-
-# this helper method re-orders all open buys or sells
-def re_order(session, number_of_orders, ids, volumes_filled, volumes, price, action):
-    for i in range(number_of_orders):
-        id = ids[i]
-        volume = volumes[i]
-        volume_filled = volumes_filled[i]
-        # if the order is partially filled.
-        if volume_filled != 0:
-            volume = MAX_VOLUME - volume_filled
-        
-        # delete then re-purchase.
-        deleted = session.delete('http://localhost:65535/v1/orders/{}'.format(id))
-        if deleted.ok:
-            session.post('http://localhost:65535/v1/orders', params={'ticker': 'ALGO',
-                'type': 'LIMIT', 'quantity': volume, 'price': price, 'action': action})
+# this helper method re-orders all open buys or sells: one bulk cancel, then
+# whatever was left of each order is re-posted at the new price
+def re_order(client, price, action):
+    requote(client, order_limiter, open_orders, action, price)
 
 def main():
-    # instantiate variables about all the open buy orders
-    buy_ids = []                # order ids
-    buy_prices = []             # order prices
-    buy_volumes = []            # order volumes
-    volume_filled_buys = []     # amount of volume filled for each order
-    open_buys_volume = 0        # combined volume from all open buy orders
-    
-    # instantiate variables about all the open sell orders
-    sell_ids = []
-    sell_prices = []
-    sell_volumes = []
-    volume_filled_sells = []
-    open_sells_volume = 0
+    # when the order table was last refreshed from the server
+    next_sync = 0
     
     # instantiated variables when just one side of the book has been completely filled
     single_side_filled = False
     single_side_transaction_time = 0
     
-    # creates a session to manage connections and requests to the RIT Client
-    with requests.Session() as s:
-        s.headers.update(API_KEY)
-        tick = get_tick(s)
+    # creates a client to manage connections and requests to the RIT Client
+    with RitClient(Port, API_KEY) as s:
+        # the tick comes from a local clock; /case is only read around tick boundaries
+        clock = CaseClock(s)
+        tick = clock.read()[0]
         
         # while the time is between 5 and 295, do the following
         while tick > 5 and tick < 295 and not shutdown:
-            # update information about the case
-            volume_filled_sells, open_sells_volume, sell_ids, sell_prices, sell_volumes = open_sells(s)
-            volume_filled_buys, open_buys_volume, buy_ids, buy_prices, buy_volumes = open_buys(s)
+            # update information about the case (open orders only every ORDERS_INTERVAL)
+            if time.monotonic() >= next_sync:
+                sync_open_orders(s)
+                next_sync = time.monotonic() + ORDERS_INTERVAL
+            open_sells_volume = open_orders.volume('SELL')
+            open_buys_volume = open_orders.volume('BUY')
             bid_price, ask_price = ticker_bid_ask(s, 'ALGO')
             
             # check if you have 0 open orders
@@ -172,7 +110,7 @@ def main():
                 # ask side has been completely filled
                 if open_sells_volume == 0:
                     # current buy orders are at the top of the book
-                    if buy_prices and buy_prices[0] == bid_price:
+                    if open_orders.top('BUY') == bid_price:
                         pass  # next iteration of loop
                     
                     # its been more than 3 seconds since a single side has been completely filled
@@ -183,22 +121,16 @@ def main():
                         
                         # potential profit is greater than or equal to a cent or its been more than 6 seconds
                         if potential_profit >= .01 or tick - single_side_transaction_time >= 6:
-                            action = 'BUY'
-                            number_of_orders = len(buy_ids)
                             buy_price = bid_price + .01
-                            price = buy_price
-                            ids = buy_ids
-                            volumes = buy_volumes
-                            volumes_filled = volume_filled_buys
                             
                             # delete buys and re-buy
-                            re_order(s, number_of_orders, ids, volumes_filled, volumes, price, action)
+                            re_order(s, buy_price, 'BUY')
                             sleep(SPEEDBUMP)
                 
                 # bid side has been completely filled
                 elif open_buys_volume == 0:
                     # current sell orders are at the top of the book
-                    if sell_prices and sell_prices[0] == ask_price:
+                    if open_orders.top('SELL') == ask_price:
                         pass  # next iteration of loop
                     
                     # its been more than 3 seconds since a single side has been completely filled
@@ -209,20 +141,14 @@ def main():
                         
                         # potential profit is greater than or equal to a cent or its been more than 6 seconds
                         if potential_profit >= .01 or tick - single_side_transaction_time >= 6:
-                            action = 'SELL'
-                            number_of_orders = len(sell_ids)
                             sell_price = ask_price - .01
-                            price = sell_price
-                            ids = sell_ids
-                            volumes = sell_volumes
-                            volumes_filled = volume_filled_sells
                             
                             # delete sells then re-sell
-                            re_order(s, number_of_orders, ids, volumes_filled, volumes, price, action)
+                            re_order(s, sell_price, 'SELL')
                             sleep(SPEEDBUMP)
             
             # refresh the case time. THIS IS IMPORTANT FOR THE WHILE LOOP
-            tick = get_tick(s)
+            tick = clock.read()[0]
 
 if __name__ == '__main__':
     signal.signal(signal.SIGINT, signal_handler)
@@ -0,0 +1,85 @@
+"""
+Time calculate_cumulatives on 20-, 100- and 1000-level books.
+
+Compares the old per-level slice-and-resum version (copied from lt3.py /
+Initial.py) with the single-pass prefix sums in rit.book, and the NumPy path
+when NumPy is installed. Also checks that all versions agree.
+
+    python benchmarks/bench_cumulatives.py
+    python benchmarks/bench_cumulatives.py --levels 20 100 1000 5000
+"""
+import argparse
+import functools
+import operator
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rit import book as rit_book
+
+
+def calculate_cumulatives_old(book):
+    """The original O(n^2) version"""
+    for level in book:
+        slice = book[:book.index(level) + 1]
+        level['cumulative_vol'] = int(sum(s['quantity'] - s['quantity_filled'] for s in slice))
+        level['cumulative_vwap'] = sum(functools.reduce(operator.mul, data) for data in zip((s['quantity'] - s['quantity_filled'] for s in slice), (s['price'] for s in slice))) / level['cumulative_vol']
+
+
+def make_side(levels, seed=0):
+    """One book side shaped like a /securities/book response"""
+    rng = random.Random(seed)
+    price = 25.00
+    side = []
+    for _ in range(levels):
+        quantity = rng.randrange(100, 20000, 100)
+        side.append({'price': round(price, 2), 'quantity': quantity,
+                     'quantity_filled': rng.choice((0, 0, 0, rng.randrange(0, quantity, 100)))})
+        price += 0.01
+    return side
+
+
+def check(side):
+    expected = [dict(level) for level in side]
+    calculate_cumulatives_old(expected)
+    versions = [False] + ([True] if rit_book.np is not None else [])
+    for use_numpy in versions:
+        got = [dict(level) for level in side]
+        rit_book.calculate_cumulatives(got, use_numpy=use_numpy)
+        for a, b in zip(expected, got):
+            assert a['cumulative_vol'] == b['cumulative_vol']
+            assert abs(a['cumulative_vwap'] - b['cumulative_vwap']) < 1e-9
+
+
+def best_us(func, side, repeat=5):
+    """Best-of-repeat microseconds per call"""
+    number = max(1, 20000 // len(side))
+    return min(timeit.repeat(lambda: func(side), number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', type=int, nargs='+', default=[20, 100, 1000])
+    args = parser.parse_args()
+
+    header = f"{'levels':>7}{'old us':>12}{'python us':>12}{'speedup':>9}"
+    if rit_book.np is not None:
+        header += f"{'numpy us':>12}{'speedup':>9}"
+    print(header)
+    for levels in args.levels:
+        side = make_side(levels)
+        check(side)
+        old = best_us(calculate_cumulatives_old, side, repeat=3)
+        new = best_us(lambda s: rit_book.calculate_cumulatives(s, use_numpy=False), side)
+        line = f"{levels:>7}{old:>12.1f}{new:>12.1f}{old / new:>8.0f}x"
+        if rit_book.np is not None:
+            vec = best_us(lambda s: rit_book.calculate_cumulatives(s, use_numpy=True), side)
+            line += f"{vec:>12.1f}{old / vec:>8.0f}x"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
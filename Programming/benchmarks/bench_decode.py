@@ -0,0 +1,115 @@
+"""
+Time decoding one /securities snapshot and one /securities/book snapshot.
+
+Payloads come from the stand-in market (rit.server), so they carry the full
+RIT field set. Compares what the bots used to do - resp.json() then dict
+lookups for the fields they trade on - with rit.decode building Quote /
+BookLevel records on the stdlib parser and on orjson when it is installed.
+Also checks all paths agree.
+
+    python benchmarks/bench_decode.py
+    python benchmarks/bench_decode.py --levels 20 100 --tickers 2
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rit import decode
+from rit.server import ALGO1, Market
+
+try:
+    import requests
+except ImportError:  # the resp.json() baseline needs requests
+    requests = None
+
+
+def make_payloads(levels, tickers):
+    """Raw /securities and /securities/book bodies from a stand-in market"""
+    case = dict(ALGO1, securities=[dict(ALGO1['securities'][i % 2], ticker=f'CRZY_{i}') for i in range(tickers)])
+    market = Market(case, seed=1, warmup=0)
+    _, securities = market.handle('GET', '/v1/securities', {}, 0)
+    _, book = market.handle('GET', '/v1/securities/book', {'ticker': 'CRZY_0', 'limit': str(levels)}, 0)
+    # Deeper than the stand-in draws: repeat its levels further out
+    while len(book['bids']) < levels:
+        book['bids'] += book['bids'][:levels - len(book['bids'])]
+        book['asks'] += book['asks'][:levels - len(book['asks'])]
+    return json.dumps(securities).encode(), json.dumps(book).encode()
+
+
+def response(body):
+    resp = requests.models.Response()
+    resp._content = body
+    resp.status_code = 200
+    resp.headers['Content-Type'] = 'application/json'
+    return resp
+
+
+def securities_dicts(resp):
+    """The old hot path: resp.json() and a dict lookup per field"""
+    quotes = {}
+    for s in resp.json():
+        quotes[s['ticker']] = (s['bid'], s['ask'], s['bid_size'], s['ask_size'],
+                               s['position'], s['realized'], s['unrealized'])
+    return quotes
+
+
+def book_dicts(resp):
+    book = resp.json()
+    return ([(level['price'], level['quantity'] - level['quantity_filled']) for level in book['bids']],
+            [(level['price'], level['quantity'] - level['quantity_filled']) for level in book['asks']])
+
+
+def as_tuples(decoded):
+    """Records from rit.decode in the old paths' tuple shape, for the agreement check"""
+    if isinstance(decoded, dict):
+        return {ticker: (q.bid, q.ask, q.bid_size, q.ask_size, q.position, q.realized, q.unrealized)
+                for ticker, q in decoded.items()}
+    return tuple([(level.price, level.remaining) for level in side] for side in decoded)
+
+
+def best_us(func, arg, repeat=5):
+    number = 2000
+    return min(timeit.repeat(lambda: func(arg), number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', type=int, nargs='+', default=[20, 100])
+    parser.add_argument('--tickers', type=int, default=2, help='securities in the /securities payload')
+    args = parser.parse_args()
+
+    parsers = sorted(decode.LOADERS)
+    print(f"parsers: {', '.join(parsers)}" + ("" if requests else " (requests missing: no resp.json() baseline)"))
+    header = f"{'payload':>16}{'bytes':>8}" + (f"{'resp.json us':>14}" if requests else "")
+    header += ''.join(f"{name + ' us':>12}" for name in parsers)
+    print(header)
+
+    securities_body, _ = make_payloads(args.levels[0], args.tickers)
+    rows = [(f'securities x{args.tickers}', securities_body, securities_dicts, decode.quotes)]
+    for levels in args.levels:
+        _, book_body = make_payloads(levels, args.tickers)
+        rows.append((f'book {levels}', book_body, book_dicts, decode.levels))
+
+    for name, body, old, new in rows:
+        line = f"{name:>16}{len(body):>8}"
+        expected = None
+        if requests:
+            resp = response(body)
+            expected = old(resp)
+            line += f"{best_us(old, resp):>14.1f}"
+        for parser_name in parsers:
+            decode.use(parser_name)
+            got = as_tuples(new(body))
+            if expected is not None:
+                assert got == expected, f'{parser_name} disagrees on {name}'
+            expected = got
+            line += f"{best_us(new, body):>12.1f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
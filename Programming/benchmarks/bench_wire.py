@@ -0,0 +1,91 @@
+"""
+Time order submission through requests and through rit.wire on the stand-in.
+
+Two numbers per transport:
+
+  * build: client-side Python work to turn (ticker, action, quantity, price)
+    into what goes on the socket, with no network involved
+  * round trip: POST /v1/orders to an in-process stand-in and back, with
+    the two transports interleaved so both see the same server load
+
+Past the stand-in's 10 orders/s the API answers 429, which is the same
+amount of server work for both transports, so the round trips stay
+comparable. The first order through each transport is checked to come back
+with the same fields.
+
+    python benchmarks/bench_wire.py
+    python benchmarks/bench_wire.py --orders 5000 --type LIMIT
+"""
+import argparse
+import os
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from rit import decode
+from rit.client import RitClient
+from rit.server import ALGO2, StandInServer, percentiles
+from rit.wire import OrderWire
+
+PORT = 10099
+API_KEY = {'X-API-Key': 'BENCH'}
+
+
+def best_us(func, repeat=5, number=5000):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def build_requests(client, ticker, action, quantity, order_type, price):
+    """What RitClient.post_order does before Session.send"""
+    url = f'{client.url_orders}?ticker={ticker}&type={order_type}&quantity={quantity}&action={action}'
+    if price is not None:
+        url = f'{url}&price={price}'
+    return client._with_url(client._post, url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--orders', type=int, default=2000, help='round trips per transport')
+    parser.add_argument('--type', default='LIMIT', choices=['MARKET', 'LIMIT'])
+    args = parser.parse_args()
+
+    price = 24.95 if args.type == 'LIMIT' else None
+    order = ('ALGO', 'BUY', 5000, args.type, price)
+
+    with StandInServer(PORT, case=ALGO2, warmup=0, enforce_limits=False), \
+            RitClient(PORT, API_KEY) as client:
+        wire = OrderWire(PORT, API_KEY)
+
+        # Both transports must get the same answer for the same order
+        first = decode.loads(client.post_order(*order).content)
+        second = decode.loads(wire.post_order(*order).content)
+        for key in ('ticker', 'type', 'action', 'quantity', 'price', 'status'):
+            assert first[key] == second[key], f'transports disagree on {key}: {first[key]} vs {second[key]}'
+
+        build = {
+            'requests': best_us(lambda: build_requests(client, *order)),
+            'wire': best_us(lambda: wire.request_bytes(*order)),
+        }
+
+        rtt = {'requests': [], 'wire': []}
+        for _ in range(args.orders):
+            start = time.perf_counter_ns()
+            client.post_order(*order)
+            middle = time.perf_counter_ns()
+            wire.post_order(*order)
+            end = time.perf_counter_ns()
+            rtt['requests'].append((middle - start) / 1000)
+            rtt['wire'].append((end - middle) / 1000)
+        wire.close()
+
+    print(f"{args.orders} {args.type} orders per transport")
+    print(f"{'transport':>10}{'build us':>10}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}")
+    for name in ('requests', 'wire'):
+        points = percentiles(rtt[name])
+        print(f"{name:>10}{build[name]:>10.1f}{points['p50']:>10.1f}{points['p90']:>10.1f}{points['p99']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
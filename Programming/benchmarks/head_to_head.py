@@ -0,0 +1,108 @@
+"""
+Run Algo1 bots one after another against the local RIT stand-in and compare them.
+
+Each bot is started unmodified on its own hardcoded port, sees the same seeded
+market, and is stopped with Ctrl+C once the period has ended. The table is
+ranked by P&L (realized + unrealized marked to mid).
+
+    python benchmarks/head_to_head.py --speed 5 --ticks 60
+    python benchmarks/head_to_head.py Algo1/Algo1_Code_Final.py Algo1/algo1_race.py
+"""
+import argparse
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+
+PROGRAMMING = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, PROGRAMMING)
+
+from rit.server import ALGO1, StandInServer
+
+# Initial.py only draws the depth view, it never trades
+DEFAULT_BOTS = sorted(
+    os.path.join(PROGRAMMING, 'Algo1', name)
+    for name in os.listdir(os.path.join(PROGRAMMING, 'Algo1'))
+    if name.endswith('.py') and name != 'Initial.py'
+)
+
+PORT_PATTERN = re.compile(r'^\s*(?:Port|PORT)\s*=\s*(\d+)', re.MULTILINE)
+
+
+def bot_port(path):
+    """Read the hardcoded port from a bot's source"""
+    with open(path, encoding='utf-8') as f:
+        match = PORT_PATTERN.search(f.read())
+    if match is None:
+        raise ValueError(f'No Port = ... line in {path}')
+    return int(match.group(1))
+
+
+def run_bot(path, args):
+    """Serve one seeded period to a bot and return the stand-in's statistics"""
+    port = bot_port(path)
+    name = os.path.basename(path)
+    log = open(os.path.join(args.logs, name + '.log'), 'w', encoding='utf-8') if args.logs else subprocess.DEVNULL
+    env = dict(os.environ, PYTHONIOENCODING='utf-8')
+
+    with StandInServer(port, case=ALGO1, seed=args.seed, speed=args.speed,
+                       ticks_per_period=args.ticks, warmup=args.warmup) as server:
+        proc = subprocess.Popen([sys.executable, '-u', path], cwd=os.path.dirname(path),
+                                stdout=log, stderr=subprocess.STDOUT, env=env)
+        try:
+            # Let the period run out, then give the bot a moment to notice
+            time.sleep(args.warmup + args.ticks / args.speed + 0.5)
+        finally:
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            if log is not subprocess.DEVNULL:
+                log.close()
+        stats = server.market.snapshot()
+
+    stats['bot'] = name
+    stats['port'] = port
+    return stats
+
+
+def print_table(results):
+    print()
+    print(f"{'bot':<32}{'orders':>8}{'429s':>7}{'rej':>6}{'q->o p50':>11}{'q->o p99':>11}{'P&L':>12}{'captured':>10}")
+    print('-' * 97)
+    for r in sorted(results, key=lambda r: r['pnl'], reverse=True):
+        captured = r['pnl'] / r['available'] * 100 if r['available'] else 0
+        latency = r['quote_to_order_ms']
+        print(f"{r['bot']:<32}{r['orders']:>8}{r['rate_limited']:>7}{r['rejected']:>6}"
+              f"{latency['p50']:>9.2f}ms{latency['p99']:>9.2f}ms{r['pnl']:>12.2f}{captured:>9.1f}%")
+    if results:
+        print(f"\nTop-of-book arbitrage on offer: ${results[0]['available']:.2f} "
+              f"over {results[0]['crossed_steps']} crossed book steps")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Head-to-head latency and P&L comparison of the Algo1 bots')
+    parser.add_argument('bots', nargs='*', help='bot scripts to run (default: every Algo1 bot)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--speed', type=float, default=5.0, help='ticks per second')
+    parser.add_argument('--ticks', type=int, default=ALGO1['ticks_per_period'])
+    parser.add_argument('--warmup', type=float, default=1.0)
+    parser.add_argument('--logs', default=None, help='directory for each bot\'s stdout')
+    args = parser.parse_args()
+
+    if args.logs:
+        os.makedirs(args.logs, exist_ok=True)
+
+    results = []
+    for path in [os.path.abspath(b) for b in args.bots] or DEFAULT_BOTS:
+        print(f"Running {os.path.basename(path)} ...")
+        results.append(run_bot(path, args))
+    print_table(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+"""
+Shared helpers for the RIT bots in Algo1 and Algo2.
+
+The bots are run as plain scripts, so they put this folder's parent on
+sys.path before importing from here.
+"""
@@ -0,0 +1,382 @@
+"""
+Backtest the Algo1 arbitrage rule on recorded tick tapes (rit/tape.py).
+
+load_periods() turns a tape into one Period per ACTIVE case period: the book
+snapshots of CRZY_M and CRZY_A in receive order, plus the list of decision
+points (every new snapshot of either venue, paired with the latest one of the
+other). run() then replays the rule from Algo1_Code_Final.main - buy on the
+venue whose ask is below the other's bid, size by the top-of-book sizes and
+MAX_ORDER_SIZE - with:
+
+  * market orders filled by walking the recorded depth of the snapshot that was
+    current when the order reached the exchange (latency_ms after the quote),
+    with our own earlier fills against the same snapshot taken out first
+  * the second leg sent leg_gap_ms after the first (0 for bots that send both
+    legs at once), and at most ORDER_LIMIT orders per second
+  * the bot busy until its last order is acknowledged, like the blocking bots
+  * gross/net limits enforced the way the RIT API does (orders that add risk
+    past the limit are rejected); limit_check_every > 0 makes the bot size by
+    the position it saw at its last /limits check
+
+A 300-tick period replays in well under a second, so parameters can be swept
+across many sessions.
+
+    python -m rit.backtest tapes/run1
+    python -m rit.backtest tapes/run1 --latency-ms 2 --leg-gap-ms 0 --min-spread 0.01
+"""
+import argparse
+import os
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # signals() falls back to a Python scan
+    np = None
+
+from rit import tape
+from rit.book import DepthBook, cross_depth
+from rit.ratelimit import ORDER_LIMIT
+
+TICKERS = ('CRZY_M', 'CRZY_A')
+MAX_ORDER_SIZE = 10000
+GROSS_LIMIT = 25000
+NET_LIMIT = 25000
+EPSILON = 1e-9  # price comparisons on two-decimal floats
+
+
+class Venue:
+    """Book snapshots of one ticker as parallel lists, depth built on demand"""
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.times = []
+        self.levels = []  # (bid prices, bid remaining, ask prices, ask remaining)
+        self.best_bid = []
+        self.best_ask = []
+        self.bid_size = []
+        self.ask_size = []
+        self._depth = {}
+
+    def add(self, recv_ns, bid_prices, bid_remaining, ask_prices, ask_remaining):
+        self.times.append(recv_ns)
+        self.levels.append((bid_prices, bid_remaining, ask_prices, ask_remaining))
+        # /securities reports the size at the best price only
+        self.best_bid.append(bid_prices[0] if bid_prices else 0.0)
+        self.best_ask.append(ask_prices[0] if ask_prices else 0.0)
+        self.bid_size.append(bid_remaining[0] if bid_remaining else 0)
+        self.ask_size.append(ask_remaining[0] if ask_remaining else 0)
+
+    def depth(self, index, side):
+        """DepthBook of one side of snapshot `index`"""
+        key = (index, side)
+        book = self._depth.get(key)
+        if book is None:
+            bid_prices, bid_remaining, ask_prices, ask_remaining = self.levels[index]
+            if side == 'bids':
+                book = DepthBook.from_arrays(bid_prices, bid_remaining, 'bids')
+            else:
+                book = DepthBook.from_arrays(ask_prices, ask_remaining, 'asks')
+            self._depth[key] = book
+        return book
+
+    def at(self, t):
+        """Index of the snapshot current at time t (the first one if t is earlier)"""
+        return max(0, bisect_right(self.times, t) - 1)
+
+    def mid(self, index):
+        return (self.best_bid[index] + self.best_ask[index]) / 2
+
+
+class Period:
+    """One ACTIVE period of a tape: both venues and the decision points"""
+
+    def __init__(self, number, venues):
+        self.number = number
+        self.venues = venues
+        self.events = self._events()
+        self._quotes = None
+        self._ranks = None
+
+    def _events(self):
+        """(time, index of M snapshot, index of A snapshot) whenever either venue updates"""
+        m, a = (self.venues[t] for t in TICKERS)
+        times, m_index, a_index = [], [], []
+        i = j = 0
+        while i < len(m.times) or j < len(a.times):
+            if j >= len(a.times) or (i < len(m.times) and m.times[i] <= a.times[j]):
+                t = m.times[i]
+                i += 1
+            else:
+                t = a.times[j]
+                j += 1
+            if i and j:
+                times.append(t)
+                m_index.append(i - 1)
+                a_index.append(j - 1)
+        return times, m_index, a_index
+
+    def quotes(self):
+        """(M bid, M ask, A bid, A ask) at every decision point, as NumPy arrays when available"""
+        if self._quotes is None:
+            m, a = (self.venues[t] for t in TICKERS)
+            _, m_index, a_index = self.events
+            if np is not None:
+                m_index, a_index = np.asarray(m_index), np.asarray(a_index)
+                self._quotes = (np.asarray(m.best_bid)[m_index], np.asarray(m.best_ask)[m_index],
+                                np.asarray(a.best_bid)[a_index], np.asarray(a.best_ask)[a_index])
+            else:
+                self._quotes = ([m.best_bid[i] for i in m_index], [m.best_ask[i] for i in m_index],
+                                [a.best_bid[i] for i in a_index], [a.best_ask[i] for i in a_index])
+        return self._quotes
+
+    def ranks(self):
+        """Evaluation number at each decision point (how many two-sided quotes seen so far)"""
+        if self._ranks is None:
+            count = 0
+            self._ranks = []
+            for quote in zip(*self.quotes()):
+                if all(quote):
+                    count += 1
+                self._ranks.append(count)
+        return self._ranks
+
+    @property
+    def seconds(self):
+        times = self.events[0]
+        return (times[-1] - times[0]) / 1e9 if times else 0.0
+
+
+def _snapshots(directory, tickers):
+    """{ticker: [(recv_ns, bid prices, bid remaining, ask prices, ask remaining), ...]}"""
+    snapshots = {ticker: [] for ticker in tickers}
+    book_path = os.path.join(directory, 'book.bin')
+    current_seq = None
+    if os.path.exists(book_path):
+        for recv_ns, seq, ticker, side, _, price, remaining in tape.records(book_path):
+            if ticker not in snapshots:
+                continue
+            if seq != current_seq:
+                current_seq = seq
+                current = (recv_ns, [], [], [], [])
+                snapshots[ticker].append(current)
+            if side == tape.BID:
+                current[1].append(price)
+                current[2].append(remaining)
+            else:
+                current[3].append(price)
+                current[4].append(remaining)
+    if all(snapshots.values()):
+        return snapshots
+
+    # No books on the tape: top of book from /securities only
+    snapshots = {ticker: [] for ticker in tickers}
+    for row in tape.records(os.path.join(directory, 'securities.bin')):
+        recv_ns, _, ticker, bid, ask, bid_size, ask_size = row[:7]
+        if ticker in snapshots:
+            snapshots[ticker].append((recv_ns, [bid] if bid else [], [bid_size] if bid else [],
+                                      [ask] if ask else [], [ask_size] if ask else []))
+    return snapshots
+
+
+def load_periods(directory, tickers=TICKERS):
+    """Periods of a tape directory, in order, keeping only snapshots taken while ACTIVE"""
+    case = list(tape.records(os.path.join(directory, 'case.bin')))
+    case_times = [row[0] for row in case]
+    active = tape.STATUS_CODES['ACTIVE']
+
+    periods = {}
+    for ticker, rows in _snapshots(directory, tickers).items():
+        for recv_ns, *levels in rows:
+            k = bisect_right(case_times, recv_ns) - 1
+            if k < 0 or case[k][4] != active:
+                continue
+            number = case[k][3]
+            if number not in periods:
+                periods[number] = {t: Venue(t) for t in tickers}
+            periods[number][ticker].add(recv_ns, *levels)
+    return [Period(number, venues) for number, venues in sorted(periods.items())
+            if all(venue.times for venue in venues.values())]
+
+
+def signals(period, min_spread=0.0):
+    """Indices of the decision points where the books cross by more than min_spread"""
+    mb, ma, ab, aa = period.quotes()
+    threshold = min_spread + EPSILON
+    if np is not None:
+        valid = (mb > 0) & (ma > 0) & (ab > 0) & (aa > 0)
+        return np.flatnonzero(valid & ((ab - ma > threshold) | (mb - aa > threshold))).tolist()
+    return [k for k, (b1, a1, b2, a2) in enumerate(zip(mb, ma, ab, aa))
+            if b1 and a1 and b2 and a2 and (b2 - a1 > threshold or b1 - a2 > threshold)]
+
+
+def _depth_size(buy, sell, max_quantity, min_spread, buy_fee=0.0, sell_fee=0.0):
+    """Quantity main4 would trade: rit.book.cross_depth, if its VWAP spread beats min_spread"""
+    quantity, buy_vwap, sell_vwap, _ = cross_depth(buy, sell, buy_fee, sell_fee, max_quantity)
+    if quantity and sell_vwap - buy_vwap > min_spread + EPSILON:
+        return quantity
+    return 0
+
+
+def run(period, min_spread=0.0, max_order_size=MAX_ORDER_SIZE, latency_ms=1.0, leg_gap_ms=1.0,
+        limit_check_every=0, sizing='top', order_limit=ORDER_LIMIT, gross_limit=GROSS_LIMIT,
+        net_limit=NET_LIMIT, fees=None, indices=None):
+    """Replay one period and return its statistics
+
+    sizing is 'top' (top-of-book sizes, as Algo1_Code_Final) or 'depth' (as
+    main4: the profit-maximizing quantity after fees from rit.book.cross_depth,
+    taken if its VWAP spread beats min_spread). fees maps
+    ticker -> $/share for market orders. Only the decision points in indices
+    (default signals(period, min_spread)) are visited; the rest cannot trade.
+    limit_check_every counts evaluations, i.e. two-sided quotes seen.
+    """
+    m, a = (period.venues[t] for t in TICKERS)
+    times, m_index, a_index = period.events
+    fees = fees or {}
+    latency = int(latency_ms * 1e6)
+    leg_gap = int(leg_gap_ms * 1e6)
+
+    position = {t: 0 for t in TICKERS}
+    cash = 0.0
+    paid_fees = 0.0
+    consumed = {}
+    window = deque(maxlen=order_limit)
+    # Position after each trade, keyed by evaluation number, for the stale /limits view
+    trade_evals = []
+    history = []
+
+    stats = {'evaluations': 0, 'opportunities': 0, 'trades': 0, 'orders': 0, 'rejected': 0,
+             'requested': 0, 'filled': 0}
+
+    def send(t):
+        """Earliest send time at or after t that keeps order_limit orders per second"""
+        if len(window) == order_limit and t < window[0] + 1_000_000_000:
+            t = window[0] + 1_000_000_000
+        window.append(t)
+        return t
+
+    def execute(venue, action, quantity, arrival):
+        nonlocal cash, paid_fees
+        stats['orders'] += 1
+        stats['requested'] += quantity
+        ticker = venue.ticker
+        signed = quantity if action == 'BUY' else -quantity
+        gross_now = sum(abs(p) for p in position.values())
+        net_now = sum(position.values())
+        gross = gross_now - abs(position[ticker]) + abs(position[ticker] + signed)
+        net = net_now + signed
+        if (gross > gross_limit and gross > gross_now) or (abs(net) > net_limit and abs(net) > abs(net_now)):
+            stats['rejected'] += 1
+            return 0
+
+        index = venue.at(arrival)
+        side = 'asks' if action == 'BUY' else 'bids'
+        book = venue.depth(index, side)
+        key = (ticker, side, index)
+        used = consumed.get(key, 0)
+        before, notional_before = book.notional(used)
+        after, notional_after = book.notional(used + quantity)
+        consumed[key] = after
+        filled = after - before
+        if filled:
+            notional = notional_after - notional_before
+            fee = fees.get(ticker, 0.0) * filled
+            position[ticker] += filled if action == 'BUY' else -filled
+            cash += -notional if action == 'BUY' else notional
+            cash -= fee
+            paid_fees += fee
+            stats['filled'] += filled
+        return filled
+
+    m_bid, m_ask, m_bid_size, m_ask_size = m.best_bid, m.best_ask, m.bid_size, m.ask_size
+    a_bid, a_ask, a_bid_size, a_ask_size = a.best_bid, a.best_ask, a.bid_size, a.ask_size
+    threshold = min_spread + EPSILON
+    busy_until = 0
+    ranks = period.ranks()
+    if indices is None:
+        indices = signals(period, min_spread)
+
+    for k in indices:
+        t = times[k]
+        if t < busy_until:
+            continue
+        im, ia = m_index[k], a_index[k]
+        mb, ma, ab, aa = m_bid[im], m_ask[im], a_bid[ia], a_ask[ia]
+        if not (mb and ma and ab and aa):
+            continue
+
+        if ab - ma > threshold:
+            buy, sell, bi, si = m, a, im, ia
+            quantity = min(m_ask_size[im], a_bid_size[ia], max_order_size)
+        elif mb - aa > threshold:
+            buy, sell, bi, si = a, m, ia, im
+            quantity = min(a_ask_size[ia], m_bid_size[im], max_order_size)
+        else:
+            continue
+        stats['opportunities'] += 1
+
+        if sizing == 'depth':
+            quantity = _depth_size(buy.depth(bi, 'asks'), sell.depth(si, 'bids'), max_order_size, min_spread,
+                                   fees.get(buy.ticker, 0.0), fees.get(sell.ticker, 0.0))
+        if limit_check_every:
+            # What /limits said at the last check, before any trade made since
+            check = (ranks[k] - 1) // limit_check_every * limit_check_every + 1
+            j = bisect_left(trade_evals, check)
+            seen = history[j - 1] if j else {t: 0 for t in TICKERS}
+            capacity = min(gross_limit - sum(abs(p) for p in seen.values()), net_limit - abs(sum(seen.values())))
+            quantity = min(quantity, capacity)
+        if quantity <= 0:
+            continue
+
+        first = send(t)
+        second = send(first + leg_gap)
+        execute(buy, 'BUY', quantity, first + latency)
+        execute(sell, 'SELL', quantity, second + latency)
+        stats['trades'] += 1
+        busy_until = second + 2 * latency
+        trade_evals.append(ranks[k])
+        history.append(dict(position))
+
+    # Whatever is left is marked to the last mid (RIT closes positions out at period end)
+    marks = {m.ticker: m.mid(len(m.times) - 1), a.ticker: a.mid(len(a.times) - 1)}
+    pnl = cash + sum(position[t] * marks[t] for t in TICKERS)
+    stats.update(
+        evaluations=ranks[-1] if ranks else 0,
+        period=period.number,
+        pnl=round(pnl, 2),
+        fees=round(paid_fees, 2),
+        fill_rate=round(stats['filled'] / stats['requested'], 4) if stats['requested'] else 0.0,
+        unhedged=abs(sum(position.values())),
+        positions=dict(position),
+    )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay the Algo1 arbitrage rule on a recorded tape')
+    parser.add_argument('tapes', nargs='+', help='tape directories (python -m rit.tape record)')
+    parser.add_argument('--min-spread', type=float, default=0.0)
+    parser.add_argument('--max-order-size', type=int, default=MAX_ORDER_SIZE)
+    parser.add_argument('--latency-ms', type=float, default=1.0, help='quote receipt to order at the exchange')
+    parser.add_argument('--leg-gap-ms', type=float, default=1.0, help='delay of the second leg (0 = both at once)')
+    parser.add_argument('--limit-check-every', type=int, default=0, help='evaluations between /limits checks')
+    parser.add_argument('--sizing', choices=('top', 'depth'), default='top')
+    args = parser.parse_args()
+
+    print(f"{'tape':<24}{'period':>7}{'events':>9}{'trades':>8}{'orders':>8}{'rej':>6}"
+          f"{'fill %':>8}{'P&L':>12}{'run ms':>9}")
+    for directory in args.tapes:
+        for period in load_periods(directory):
+            start = time.perf_counter()
+            result = run(period, min_spread=args.min_spread, max_order_size=args.max_order_size,
+                         latency_ms=args.latency_ms, leg_gap_ms=args.leg_gap_ms,
+                         limit_check_every=args.limit_check_every, sizing=args.sizing)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{os.path.basename(os.path.normpath(directory)):<24}{period.number:>7}{len(period.events[0]):>9}"
+                  f"{result['trades']:>8}{result['orders']:>8}{result['rejected']:>6}"
+                  f"{result['fill_rate'] * 100:>7.1f}%{result['pnl']:>12.2f}{elapsed:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
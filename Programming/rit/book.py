@@ -0,0 +1,295 @@
+"""
+Order book helpers shared by the bots.
+
+calculate_cumulatives() adds running 'cumulative_vol' and 'cumulative_vwap'
+fields to every level of one side of a /securities/book response, the way the
+tender and depth-view scripts print and price them. It is one pass of prefix
+sums; deep books can take a NumPy path (used automatically when NumPy is
+installed and the side has at least NUMPY_MIN_LEVELS levels).
+
+    book = client.book('CRZY')
+    calculate_cumulatives(book['bids'])
+    calculate_cumulatives(book['asks'])
+
+DepthBook is the compact form of one side for sizing: parallel lists of price,
+remaining quantity and running quantity/notional, built once per snapshot, so
+"VWAP to fill Q", "notional for Q" and "how much can I trade before price P"
+are a binary search instead of a walk over JSON dicts.
+
+    book = depth_books(client.book('CRZY_M', 20))
+    vwap, quantity, cost = book['asks'].vwap(10000)
+    book['bids'].quantity_within(24.95)
+
+cross_depth() sizes a cross-venue arbitrage from two DepthBooks: it walks
+one venue's asks against the other's bids and returns the quantity that
+maximizes profit after per-venue fees.
+
+    quantity, buy_vwap, sell_vwap, profit = cross_depth(m['asks'], a['bids'], max_quantity=10000)
+
+BookCache keeps the last processed snapshot per ticker (cumulatives on both
+sides plus depth_books under 'depth') and only refetches once it is older
+than `ttl` seconds or from an earlier tick, so helpers that each want "the
+book" in the same cycle share one request and one pass.
+
+    cache = BookCache(ttl=0.1)
+    book = cache.get(client, 'CRZY', tick)
+    cache.invalidate('CRZY')   # after we traded against it
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the pure Python pass is exact anyway
+    np = None
+
+NUMPY_MIN_LEVELS = 500  # below this the array round trip costs more than it saves
+BOOK_TTL = 0.1          # seconds a cached book snapshot is reused
+
+
+def _cumulatives_python(book):
+    volume = 0
+    notional = 0.0
+    for level in book:
+        remaining = level['quantity'] - level['quantity_filled']
+        volume += remaining
+        notional += remaining * level['price']
+        level['cumulative_vol'] = int(volume)
+        level['cumulative_vwap'] = notional / volume if volume else level['price']
+
+
+def _cumulatives_numpy(book):
+    n = len(book)
+    remaining = np.fromiter((level['quantity'] - level['quantity_filled'] for level in book), dtype=np.float64, count=n)
+    prices = np.fromiter((level['price'] for level in book), dtype=np.float64, count=n)
+    volume = np.cumsum(remaining)
+    notional = np.cumsum(remaining * prices)
+    vwap = np.divide(notional, volume, out=prices.copy(), where=volume != 0)
+    for level, vol, price in zip(book, volume.astype(np.int64).tolist(), vwap.tolist()):
+        level['cumulative_vol'] = vol
+        level['cumulative_vwap'] = price
+
+
+def calculate_cumulatives(book, use_numpy=None):
+    """Add cumulative_vol and cumulative_vwap to each level of one book side, in place
+
+    use_numpy=None picks NumPy for deep books when it is installed.
+    """
+    if use_numpy is None:
+        use_numpy = np is not None and len(book) >= NUMPY_MIN_LEVELS
+    if use_numpy:
+        _cumulatives_numpy(book)
+    else:
+        _cumulatives_python(book)
+    return book
+
+
+class DepthBook:
+    """One side of a book snapshot as parallel lists with prefix sums
+
+    side is 'bids' (prices falling) or 'asks' (prices rising). Levels with
+    nothing left (quantity_filled == quantity) are dropped.
+    """
+
+    __slots__ = ('side', 'prices', 'remaining', 'cum_qty', 'cum_notional', '_keys')
+
+    def __init__(self, levels, side):
+        self.side = side
+        sign = -1 if side == 'bids' else 1
+        self.prices = []
+        self.remaining = []
+        self.cum_qty = []
+        self.cum_notional = []
+        # Prices in "worse for the taker" order so bisect works on both sides
+        self._keys = []
+
+        quantity = 0
+        notional = 0.0
+        for level in levels:
+            left = level['quantity'] - level['quantity_filled']
+            if left <= 0:
+                continue
+            price = level['price']
+            quantity += left
+            notional += left * price
+            self.prices.append(price)
+            self.remaining.append(left)
+            self.cum_qty.append(quantity)
+            self.cum_notional.append(notional)
+            self._keys.append(sign * price)
+
+    @classmethod
+    def from_arrays(cls, prices, remaining, side):
+        """Build from parallel price / remaining lists (e.g. a recorded tape), best level first"""
+        book = cls((), side)
+        sign = -1 if side == 'bids' else 1
+        quantity = 0
+        notional = 0.0
+        for price, left in zip(prices, remaining):
+            if left <= 0:
+                continue
+            quantity += left
+            notional += left * price
+            book.prices.append(price)
+            book.remaining.append(left)
+            book.cum_qty.append(quantity)
+            book.cum_notional.append(notional)
+            book._keys.append(sign * price)
+        return book
+
+    def __len__(self):
+        return len(self.prices)
+
+    @property
+    def total_quantity(self):
+        return self.cum_qty[-1] if self.cum_qty else 0
+
+    @property
+    def best_price(self):
+        return self.prices[0] if self.prices else None
+
+    def notional(self, quantity):
+        """(quantity filled, cost) of taking up to `quantity` from the top"""
+        if not self.cum_qty or quantity <= 0:
+            return 0, 0.0
+        i = bisect_left(self.cum_qty, quantity)
+        if i == len(self.cum_qty):
+            return self.cum_qty[-1], self.cum_notional[-1]
+        before_qty = self.cum_qty[i - 1] if i else 0
+        before_notional = self.cum_notional[i - 1] if i else 0.0
+        return quantity, before_notional + (quantity - before_qty) * self.prices[i]
+
+    def vwap(self, quantity):
+        """(vwap, quantity filled, cost) of taking up to `quantity`; (None, 0, 0) if empty"""
+        filled, cost = self.notional(quantity)
+        if filled == 0:
+            return None, 0, 0
+        return cost / filled, filled, cost
+
+    def last_price(self, quantity):
+        """Price of the deepest level taking `quantity` from the top reaches; None if empty"""
+        if not self.cum_qty or quantity <= 0:
+            return None
+        return self.prices[min(bisect_left(self.cum_qty, quantity), len(self.prices) - 1)]
+
+    def quantity_within(self, price):
+        """Shares on offer at `price` or better (bids >= price, asks <= price)"""
+        sign = -1 if self.side == 'bids' else 1
+        i = bisect_right(self._keys, sign * price)
+        return self.cum_qty[i - 1] if i else 0
+
+    def top(self, quantity):
+        """(price, quantity, cost) using the best level only; (None, 0, 0) if empty"""
+        if not self.prices:
+            return None, 0, 0
+        price = self.prices[0]
+        filled = min(self.remaining[0], quantity)
+        return price, filled, filled * price
+
+
+def cross_depth(asks, bids, buy_fee=0.0, sell_fee=0.0, max_quantity=None):
+    """Profit-maximizing quantity to buy from one venue's asks and sell into another's bids
+
+    asks and bids are DepthBooks; buy_fee / sell_fee are per share on each
+    venue. One pointer walks each book from the top and the overlap is taken
+    level by level while the bid still pays more than the ask costs after
+    fees. Asks only rise and bids only fall, so the edge per share only shrinks
+    and the first pair without one is where profit peaks. O(levels).
+
+    Returns (quantity, buy vwap, sell vwap, profit after fees); quantity is 0
+    (and the vwaps None) when the books do not cross.
+    """
+    n_asks, n_bids = len(asks.prices), len(bids.prices)
+    if not n_asks or not n_bids:
+        return 0, None, None, 0.0
+    cap = max_quantity if max_quantity is not None else asks.total_quantity
+    fees = buy_fee + sell_fee
+
+    i = j = 0
+    ask_left, bid_left = asks.remaining[0], bids.remaining[0]
+    quantity = 0
+    cost = proceeds = 0.0
+    while quantity < cap:
+        ask, bid = asks.prices[i], bids.prices[j]
+        if bid - ask - fees <= 0:
+            break
+        take = min(ask_left, bid_left, cap - quantity)
+        quantity += take
+        cost += take * ask
+        proceeds += take * bid
+        ask_left -= take
+        bid_left -= take
+        if ask_left == 0:
+            i += 1
+            if i == n_asks:
+                break
+            ask_left = asks.remaining[i]
+        if bid_left == 0:
+            j += 1
+            if j == n_bids:
+                break
+            bid_left = bids.remaining[j]
+
+    if quantity == 0:
+        return 0, None, None, 0.0
+    return quantity, cost / quantity, proceeds / quantity, proceeds - cost - quantity * fees
+
+
+def depth_books(book):
+    """{'bids': DepthBook, 'asks': DepthBook} for a /securities/book response"""
+    return {'bids': DepthBook(book.get('bids') or [], 'bids'),
+            'asks': DepthBook(book.get('asks') or [], 'asks')}
+
+
+class BookCache:
+    """Latest processed book per ticker, shared by every caller until it goes stale"""
+
+    def __init__(self, ttl=BOOK_TTL, limit=None):
+        self.ttl = ttl
+        self.limit = limit
+        self.books = {}  # ticker -> (fetched at, tick, book)
+        self.locks = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+
+    def _lock(self, ticker):
+        with self.lock:
+            lock = self.locks.get(ticker)
+            if lock is None:
+                lock = self.locks[ticker] = threading.Lock()
+            return lock
+
+    def _fresh(self, entry, tick):
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            return False
+        return tick is None or entry[1] is None or entry[1] >= tick
+
+    def get(self, client, ticker, tick=None):
+        """Book with cumulatives and 'depth'; fetched at most once per ttl (and per tick)"""
+        entry = self.books.get(ticker)
+        if self._fresh(entry, tick):
+            self.hits += 1
+            return entry[2]
+        # One fetch per ticker at a time; threads asking meanwhile get its result
+        with self._lock(ticker):
+            entry = self.books.get(ticker)
+            if self._fresh(entry, tick):
+                self.hits += 1
+                return entry[2]
+            fetched = time.monotonic()
+            book = client.book(ticker, self.limit)
+            calculate_cumulatives(book['bids'])
+            calculate_cumulatives(book['asks'])
+            book['depth'] = depth_books(book)
+            self.books[ticker] = (fetched, tick, book)
+            self.fetches += 1
+            return book
+
+    def invalidate(self, ticker=None):
+        """Drop one ticker's snapshot (or all of them) so the next get refetches"""
+        if ticker is None:
+            self.books.clear()
+        else:
+            self.books.pop(ticker, None)
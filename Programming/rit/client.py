@@ -0,0 +1,251 @@
+"""
+Pooled RIT REST client shared by the bots.
+
+Replaces the get_tick / get_limits / get_securities / submit_order helpers that
+were copy-pasted into every bot. URLs and the fixed GET requests are prepared
+once, the session keeps a pool of keep-alive sockets with TCP_NODELAY set, and
+every call goes straight to Session.send so the per-request Python work is
+limited to what actually changes.
+
+    from rit.client import RitClient
+    with RitClient(10010, {'X-API-Key': 'HCYA2KPW'}) as client:
+        tick, status, period = client.tick()
+
+Pass recorder=TapeRecorder(...) (rit.tape) to write every case, securities
+and book response to a tick tape as it arrives.
+
+Pass raw_orders=True to send post_order() over rit.wire raw sockets with
+pre-serialized request bytes instead of through requests.
+
+Bodies are decoded with rit.decode (orjson when installed). quotes(),
+levels(), orders() and tenders() return rit.records objects (Quote,
+BookLevel, Order, Tender) instead of the raw dicts.
+"""
+import socket
+import time
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from rit import decode
+from rit.wire import OrderWire
+
+POOL_SIZE = 10  # keep-alive sockets kept open to the RIT client
+
+
+class ApiException(Exception):
+    pass
+
+
+class _NoDelayAdapter(HTTPAdapter):
+    """HTTPAdapter whose sockets disable Nagle and keep the connection alive"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+class RitClient:
+    """One pooled session to the RIT client with pre-built URLs and requests"""
+
+    def __init__(self, port, headers, host='localhost', pool_size=POOL_SIZE, timeout=None, recorder=None,
+                 raw_orders=False):
+        self.base = f'http://{host}:{port}/v1'
+        self.timeout = timeout
+        self.recorder = recorder
+        self.wire = OrderWire(port, headers, host, pool_size, timeout) if raw_orders else None
+
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+        # No proxies or .netrc on localhost; skips an environment scan per call
+        self.session.trust_env = False
+        adapter = _NoDelayAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self._send = self.session.send
+
+        self.url_case = f'{self.base}/case'
+        self.url_securities = f'{self.base}/securities'
+        self.url_book = f'{self.base}/securities/book'
+        self.url_limits = f'{self.base}/limits'
+        self.url_orders = f'{self.base}/orders'
+        self.url_tenders = f'{self.base}/tenders'
+        self.url_cancel = f'{self.base}/commands/cancel'
+
+        self._get_case = self._prepare('GET', self.url_case)
+        self._get_securities = self._prepare('GET', self.url_securities)
+        self._get_limits = self._prepare('GET', self.url_limits)
+        self._get_tenders = self._prepare('GET', self.url_tenders)
+        self._post = self._prepare('POST', self.url_orders)
+        self._delete = self._prepare('DELETE', self.url_orders)
+        self._prepared = {}
+
+        # Per-endpoint call count and total wall time, see overhead()
+        self.calls = Counter()
+        self.call_ns = Counter()
+
+    def _prepare(self, method, url):
+        return self.session.prepare_request(requests.Request(method, url))
+
+    def _cached(self, method, url):
+        """Prepared request for a URL that is reused (book per ticker, order filters)"""
+        key = (method, url)
+        prepared = self._prepared.get(key)
+        if prepared is None:
+            prepared = self._prepared[key] = self._prepare(method, url)
+        return prepared
+
+    def _with_url(self, template, url):
+        prepared = template.copy()
+        prepared.url = url
+        return prepared
+
+    def send(self, prepared, name):
+        """Send a prepared request; raises ApiException on a key mismatch"""
+        start = time.perf_counter_ns()
+        resp = self._send(prepared, timeout=self.timeout)
+        if self.recorder is not None:
+            # Stamped on arrival, before any decoding, for the tape's latency replay
+            resp.recv_ns = time.time_ns()
+        return self._finish(resp, name, start)
+
+    def _finish(self, resp, name, start):
+        self.call_ns[name] += time.perf_counter_ns() - start
+        self.calls[name] += 1
+        if resp.status_code == 401:
+            raise ApiException('The API key provided must match the one in the RIT client')
+        return resp
+
+    # ---- market data -------------------------------------------------
+
+    def case(self):
+        """Raw /case payload"""
+        resp = self.send(self._get_case, 'case')
+        case = decode.loads(resp.content)
+        if self.recorder is not None:
+            self.recorder.case(case, resp.recv_ns)
+        return case
+
+    def tick(self):
+        """Current (tick, status, period) of the case"""
+        case = self.case()
+        return case['tick'], case['status'], case['period']
+
+    def securities(self, ticker=None):
+        """List of security dicts, optionally for one ticker only"""
+        if ticker is None:
+            prepared = self._get_securities
+        else:
+            prepared = self._cached('GET', f'{self.url_securities}?ticker={ticker}')
+        resp = self.send(prepared, 'securities')
+        securities = decode.loads(resp.content)
+        if self.recorder is not None:
+            self.recorder.securities(securities, resp.recv_ns)
+        return securities
+
+    def quotes(self, ticker=None):
+        """{ticker: Quote}, optionally for one ticker only"""
+        if self.recorder is not None:
+            return decode.project_quotes(self.securities(ticker))
+        if ticker is None:
+            prepared = self._get_securities
+        else:
+            prepared = self._cached('GET', f'{self.url_securities}?ticker={ticker}')
+        return decode.quotes(self.send(prepared, 'securities').content)
+
+    def book(self, ticker, limit=None):
+        """Order book {'bids': [...], 'asks': [...]} for a ticker"""
+        url = f'{self.url_book}?ticker={ticker}' if limit is None else f'{self.url_book}?ticker={ticker}&limit={limit}'
+        resp = self.send(self._cached('GET', url), 'book')
+        book = decode.loads(resp.content)
+        if self.recorder is not None:
+            self.recorder.book(ticker, book, resp.recv_ns)
+        return book
+
+    def levels(self, ticker, limit=None):
+        """(bids, asks) lists of BookLevel, best first"""
+        if self.recorder is not None:
+            return decode.project_levels(self.book(ticker, limit))
+        url = f'{self.url_book}?ticker={ticker}' if limit is None else f'{self.url_book}?ticker={ticker}&limit={limit}'
+        return decode.levels(self.send(self._cached('GET', url), 'book').content)
+
+    def limits(self):
+        """Raw /limits payload"""
+        return decode.loads(self.send(self._get_limits, 'limits').content)
+
+    def stock_limit(self, name='LIMIT-STOCK'):
+        """(gross, net, gross_limit, net_limit) of a named limit, or None"""
+        for limit in self.limits():
+            if limit['name'] == name:
+                return limit['gross'], limit['net'], limit['gross_limit'], limit['net_limit']
+        return None
+
+    def orders(self, status='OPEN'):
+        """Our orders with the given status, as Order records"""
+        prepared = self._cached('GET', f'{self.url_orders}?status={status}')
+        return decode.orders(self.send(prepared, 'orders').content)
+
+    def tenders(self):
+        """Tender offers currently available, as Tender records"""
+        return decode.tenders(self.send(self._get_tenders, 'tenders').content)
+
+    # ---- order entry -------------------------------------------------
+
+    def post_order(self, ticker, action, quantity, order_type='MARKET', price=None):
+        """Submit an order and return the raw response (the caller handles 429s)"""
+        if self.wire is not None:
+            start = time.perf_counter_ns()
+            return self._finish(self.wire.post_order(ticker, action, quantity, order_type, price), 'order', start)
+        url = f'{self.url_orders}?ticker={ticker}&type={order_type}&quantity={quantity}&action={action}'
+        if price is not None:
+            url = f'{url}&price={price}'
+        return self.send(self._with_url(self._post, url), 'order')
+
+    def cancel_order(self, order_id):
+        """Cancel one order; True if the API accepted the cancel"""
+        resp = self.send(self._with_url(self._delete, f'{self.url_orders}/{order_id}'), 'cancel')
+        return resp.ok
+
+    def cancel_all(self, **query):
+        """Bulk cancel via /commands/cancel (all=1, ticker=..., ids=... or query=...)"""
+        params = '&'.join(f'{key}={value}' for key, value in query.items()) or 'all=1'
+        resp = self.send(self._with_url(self._post, f'{self.url_cancel}?{params}'), 'cancel')
+        return resp.ok
+
+    def cancel_orders(self, order_ids):
+        """Cancel several orders with one /commands/cancel?ids=...; returns the ids the API cancelled"""
+        ids = ','.join(str(order_id) for order_id in order_ids)
+        resp = self.send(self._with_url(self._post, f'{self.url_cancel}?ids={ids}'), 'cancel')
+        if not resp.ok:
+            return []
+        return decode.loads(resp.content).get('cancelled_order_ids', [])
+
+    def accept_tender(self, tender_id, price=None):
+        url = f'{self.url_tenders}/{tender_id}' if price is None else f'{self.url_tenders}/{tender_id}?price={price}'
+        return self.send(self._with_url(self._post, url), 'tender')
+
+    def decline_tender(self, tender_id):
+        return self.send(self._with_url(self._delete, f'{self.url_tenders}/{tender_id}'), 'tender')
+
+    # ---- housekeeping ------------------------------------------------
+
+    def overhead(self):
+        """{endpoint: (calls, mean microseconds per call)} since the client was made"""
+        return {name: (count, self.call_ns[name] / count / 1000) for name, count in self.calls.items()}
+
+    def close(self):
+        self.session.close()
+        if self.wire is not None:
+            self.wire.close()
+        if self.recorder is not None:
+            self.recorder.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
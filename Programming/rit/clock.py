@@ -0,0 +1,101 @@
+"""
+Local case clock so the bots stop reading /case on every loop.
+
+The case only changes tick once a second, yet every hot loop paid a /case
+round trip per iteration just to read tick, status and period. CaseClock
+keeps the last /case answer plus the moment the tick was last seen to
+change, and answers read() from that. It polls /case only when the answer
+could actually be different:
+
+  * shortly before the next tick boundary is due, and then every POLL_STEP
+    until the new tick shows up (that pins the boundary to within POLL_STEP)
+  * when the estimate reaches ticks_per_period (the period is about to end)
+  * every STOPPED_INTERVAL while the case is not ACTIVE
+  * right away after poke(), which callers use when another response hints
+    at a state change (an order refused with CASE_NOT_ACTIVE, empty quotes)
+  * at least every MAX_INTERVAL seconds regardless
+
+The seconds per tick are measured between the first and the latest pinned
+boundary of the period, so a case run faster than real time is tracked too.
+
+    clock = CaseClock(client)
+    tick, status, period = clock.read()
+"""
+import time
+
+TICK_SECONDS = 1.0       # seconds per tick until measured
+MARGIN = 0.05            # start polling this long before a boundary is due
+POLL_STEP = 0.02         # seconds between polls while waiting for a boundary
+STOPPED_INTERVAL = 0.25  # seconds between polls while the case is not ACTIVE
+MAX_INTERVAL = 2.0       # never trust the estimate for longer than this
+
+
+class CaseClock:
+    """(tick, status, period) from a local estimate, refreshed from /case only when due"""
+
+    def __init__(self, client, tick_seconds=TICK_SECONDS):
+        self.client = client
+        self.tick_seconds = tick_seconds
+        self.tick = 0
+        self.status = None
+        self.period = 0
+        self.ticks_per_period = None
+        self.boundary = None   # monotonic time the current tick started (estimated)
+        self.anchor = None     # (time, tick) of the first boundary pinned this period
+        self.polled = 0.0      # when the server answered the last poll (request midpoint)
+        self.next_poll = 0.0
+        self.polls = 0
+        self.reads = 0
+
+    def poll(self):
+        """Read /case now and re-plan the next poll"""
+        before = time.monotonic()
+        case = self.client.case()
+        now = time.monotonic()
+        answered = (before + now) / 2
+        self.polls += 1
+        tick, status, period = case['tick'], case['status'], case['period']
+        self.ticks_per_period = case.get('ticks_per_period', self.ticks_per_period)
+
+        if period != self.period or status != self.status or self.boundary is None:
+            self.boundary = answered
+            self.anchor = None
+        elif tick != self.tick:
+            # The tick changed between the previous answer and this one
+            boundary = (self.polled + answered) / 2
+            if answered - self.polled <= 3 * POLL_STEP:
+                # Pinned to within a couple of POLL_STEPs: measure the rate from the anchor
+                if self.anchor is None or tick <= self.anchor[1]:
+                    self.anchor = (boundary, tick)
+                else:
+                    self.tick_seconds = (boundary - self.anchor[0]) / (tick - self.anchor[1])
+            elif tick - self.tick > 1:
+                # Slept through whole ticks: the case runs faster than we assumed
+                self.tick_seconds = min(self.tick_seconds, (answered - self.polled) / (tick - self.tick))
+            self.boundary = boundary
+        self.tick, self.status, self.period = tick, status, period
+        self.polled = answered
+
+        if status != 'ACTIVE':
+            self.next_poll = now + STOPPED_INTERVAL
+        else:
+            due = self.boundary + self.tick_seconds - MARGIN
+            self.next_poll = max(now + POLL_STEP, min(due, now + MAX_INTERVAL))
+        return tick, status, period
+
+    def poke(self):
+        """Something suggests the case changed state; poll on the next read"""
+        self.next_poll = 0.0
+
+    def read(self):
+        """(tick, status, period), polling /case only when the estimate may be stale"""
+        self.reads += 1
+        now = time.monotonic()
+        if now >= self.next_poll:
+            return self.poll()
+        tick = self.tick + int((now - self.boundary) / self.tick_seconds)
+        if self.ticks_per_period is not None and tick >= self.ticks_per_period:
+            # The last tick ends the period; confirm with the server
+            self.poke()
+            tick = self.ticks_per_period
+        return tick, self.status, self.period
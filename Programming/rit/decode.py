@@ -0,0 +1,75 @@
+"""
+Fast decoding of RIT responses.
+
+loads() is orjson's when it is installed and the stdlib's otherwise (use()
+switches explicitly). quotes(), levels(), orders() and tenders() go from the
+raw response body straight to rit.records objects holding only the fields
+the bots trade on, so the hot loop never keeps or probes the full dicts:
+
+    quotes = client.quotes()                    # {ticker: Quote}
+    quotes['CRZY_M'].bid, quotes['CRZY_M'].ask_size
+    bids, asks = client.levels('CRZY_M', 20)    # [BookLevel, ...] best first
+
+benchmarks/bench_decode.py times these against resp.json() on realistic
+payloads.
+"""
+import json
+
+from rit.records import BookLevel, Order, Quote, Tender
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib parser gives the same result
+    orjson = None
+
+LOADERS = {'json': json.loads}
+if orjson is not None:
+    LOADERS['orjson'] = orjson.loads
+
+PARSER = 'orjson' if orjson is not None else 'json'
+loads = LOADERS[PARSER]
+
+
+def use(name):
+    """Switch the parser used by loads/quotes/levels ('orjson' or 'json')"""
+    global loads, PARSER
+    loads = LOADERS[name]
+    PARSER = name
+
+
+def project_quotes(securities):
+    """{ticker: Quote} from decoded /securities rows"""
+    return {s['ticker']: Quote(s['ticker'], s['bid'], s['ask'], s['bid_size'], s['ask_size'],
+                               s['position'], s['realized'], s['unrealized'], s['last'])
+            for s in securities}
+
+
+def project_levels(book):
+    """(bids, asks) lists of BookLevel from a decoded /securities/book"""
+    return ([BookLevel(level['price'], level['quantity'], level['quantity_filled']) for level in book['bids']],
+            [BookLevel(level['price'], level['quantity'], level['quantity_filled']) for level in book['asks']])
+
+
+def quotes(body):
+    """{ticker: Quote} from a /securities body"""
+    return project_quotes(loads(body))
+
+
+def levels(body):
+    """(bids, asks) lists of BookLevel from a /securities/book body"""
+    return project_levels(loads(body))
+
+
+def order(body):
+    """Order from an order submission (or /orders/{id}) body"""
+    return Order.from_json(loads(body))
+
+
+def orders(body):
+    """[Order, ...] from an /orders body"""
+    return [Order.from_json(o) for o in loads(body)]
+
+
+def tenders(body):
+    """[Tender, ...] from a /tenders body"""
+    return [Tender.from_json(t) for t in loads(body)]
@@ -0,0 +1,110 @@
+"""
+Hedged requests: race a second copy of a slow call and take whichever answers first.
+
+Most /securities calls come back fast, but now and then one stalls, and a bot
+waiting on it misses the window it was polling for. QuoteHedger sends the call
+on a worker thread and waits up to a deadline (the p90 of the calls seen so
+far). If no answer has come by then, it fires the same call again on a second
+worker - requests hands it a different pooled connection - and returns
+whichever finishes first. The loser finishes in the background and is
+ignored. Only about one call in ten gets hedged, so the extra load stays small.
+
+    hedger = QuoteHedger()
+    quotes = hedger.call(client.quotes)
+    print(hedger.report())
+
+Two histograms back the report: 'primary' is how long the first request
+took on its own (what the bot would have waited without hedging), and
+'hedged' is how long call() actually took. The p99 gap between them is what
+hedging bought.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from rit.latency import LatencyHistogram
+
+PERCENTILE = 90         # hedge once a call is slower than this share of past calls
+MIN_SAMPLES = 50        # calls seen before hedging starts (the deadline needs a baseline)
+MIN_DEADLINE_NS = 200_000  # never hedge sooner than this, however fast the p90 is
+REFRESH_EVERY = 32      # calls between deadline recomputations
+
+
+class QuoteHedger:
+    """Runs a call, and a second copy of it if the first misses a p90 deadline"""
+
+    def __init__(self, percentile=PERCENTILE, min_samples=MIN_SAMPLES, min_deadline_ns=MIN_DEADLINE_NS):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_deadline_ns = min_deadline_ns
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hedge')
+        self.lock = threading.Lock()
+        self.deadline = None  # seconds; None until min_samples calls have been seen
+
+        self.primary = LatencyHistogram()
+        self.hedged = LatencyHistogram()
+
+        # Statistics
+        self.calls = 0
+        self.fired = 0       # calls that sent a second request
+        self.hedge_won = 0   # ... where the second request answered first
+
+    def _record_primary(self, started):
+        def done(future):
+            with self.lock:
+                self.primary.record(time.perf_counter_ns() - started)
+        return done
+
+    def _refresh_deadline(self):
+        with self.lock:
+            if self.primary.count < self.min_samples:
+                return
+            deadline_ns = max(self.primary.percentile(self.percentile), self.min_deadline_ns)
+        self.deadline = deadline_ns / 1e9
+
+    def call(self, func, *args):
+        """func(*args), hedged with a second call once the first is late"""
+        started = time.perf_counter_ns()
+        first = self.executor.submit(func, *args)
+        first.add_done_callback(self._record_primary(started))
+        self.calls += 1
+        if self.calls % REFRESH_EVERY == 0 or self.deadline is None:
+            self._refresh_deadline()
+
+        pending = {first}
+        if self.deadline is not None and not wait(pending, timeout=self.deadline).done:
+            self.fired += 1
+            pending.add(self.executor.submit(func, *args))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not first:
+                        self.hedge_won += 1
+                    self.hedged.record(time.perf_counter_ns() - started)
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def reset(self):
+        with self.lock:
+            self.primary = LatencyHistogram()
+        self.hedged = LatencyHistogram()
+        self.deadline = None
+        self.calls = self.fired = self.hedge_won = 0
+
+    def report(self):
+        """Plain-text summary for the period statistics printout"""
+        if not self.calls:
+            return '   hedged quotes: no calls'
+        deadline = f"{self.deadline * 1000:.3f}ms" if self.deadline is not None else 'warming up'
+        primary_p99 = self.primary.percentile(99) / 1e6
+        hedged_p99 = self.hedged.percentile(99) / 1e6
+        return (f"   hedged quotes: {self.fired}/{self.calls} hedged ({self.fired / self.calls:.1%}), "
+                f"{self.hedge_won} won by the hedge, deadline {deadline}\n"
+                f"   quote p99 {primary_p99:.3f}ms unhedged -> {hedged_p99:.3f}ms hedged")
+
+    def close(self):
+        self.executor.shutdown(wait=False)
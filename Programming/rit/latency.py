@@ -0,0 +1,133 @@
+"""
+Low-overhead latency histograms for the bots' hot loops.
+
+Values are nanosecond ints from time.perf_counter_ns(). Buckets are HDR-style
+log-linear (SUB_BUCKET_BITS significant bits, about 3% relative error), so
+recording is a bit_length, a shift and a list increment - no allocation - and
+p50/p99 come out of a fixed-size array instead of a growing list of samples.
+
+    latency = LatencyRecorder()
+    start = perf_counter_ns()
+    ...
+    latency.record('quote_fetch', perf_counter_ns() - start)
+    print(latency.report())
+    latency.dump('latency.json')
+"""
+import json
+
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF = SUB_BUCKETS >> 1
+BUCKETS = SUB_BUCKETS + (64 - SUB_BUCKET_BITS) * HALF
+
+
+def bucket_index(value):
+    """Histogram slot of a non-negative int"""
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    if shift <= 0:
+        return value
+    return SUB_BUCKETS + (shift - 1) * HALF + (value >> shift) - HALF
+
+
+def bucket_bounds(index):
+    """(lowest, highest) value that lands in a slot"""
+    if index < SUB_BUCKETS:
+        return index, index
+    shift = (index - SUB_BUCKETS) // HALF + 1
+    top = (index - SUB_BUCKETS) % HALF + HALF
+    return top << shift, ((top + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of nanosecond durations"""
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value):
+        if value < 0:
+            value = 0
+        self.counts[bucket_index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, p):
+        """Value at or below which p percent of the samples fall (bucket upper bound)"""
+        if self.count == 0:
+            return 0
+        target = max(1, -(-self.count * p // 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            if n:
+                seen += n
+                if seen >= target:
+                    return min(bucket_bounds(index)[1], self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def merge(self, other):
+        for index, n in enumerate(other.counts):
+            if n:
+                self.counts[index] += n
+        if other.count:
+            self.min = other.min if self.count == 0 else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def summary(self):
+        """Counts and percentiles in microseconds"""
+        return {
+            'count': self.count,
+            'mean_us': round(self.mean() / 1000, 1),
+            'p50_us': round(self.percentile(50) / 1000, 1),
+            'p90_us': round(self.percentile(90) / 1000, 1),
+            'p99_us': round(self.percentile(99) / 1000, 1),
+            'max_us': round(self.max / 1000, 1),
+        }
+
+
+class LatencyRecorder:
+    """A named set of histograms (quote_fetch, decision, order_rtt, ...)"""
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, name, value):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(value)
+
+    def reset(self):
+        self.histograms = {}
+
+    def report(self):
+        """Plain-text table for the period statistics printout"""
+        if not self.histograms:
+            return '   (no latency samples)'
+        lines = [f"   {'latency':<14}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name, histogram in self.histograms.items():
+            s = histogram.summary()
+            lines.append(f"   {name:<14}{s['count']:>8}{s['p50_us'] / 1000:>10.3f}{s['p90_us'] / 1000:>10.3f}"
+                         f"{s['p99_us'] / 1000:>10.3f}{s['max_us'] / 1000:>10.3f}")
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """Write summaries plus the raw non-empty buckets (so runs can be merged later)"""
+        data = {}
+        for name, histogram in self.histograms.items():
+            data[name] = histogram.summary()
+            data[name]['buckets'] = {str(bucket_bounds(i)[0]): n for i, n in enumerate(histogram.counts) if n}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
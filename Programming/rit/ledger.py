@@ -0,0 +1,192 @@
+"""
+Local position ledger so the bots never wait on /limits before trading.
+
+Every order response is applied as soon as it comes back (its ticker, action
+and quantity_filled), and gross/net exposure is kept as running totals, so
+headroom is a couple of additions instead of a round trip. /limits and
+/securities are only read off the hot path, by a background reconciler, when
+the ledger may be wrong:
+
+  * an order's outcome is unknown (exception, timeout, unexpected status)
+  * the positions the bot sees in /securities disagree with the ledger for
+    DRIFT_POLLS polls in a row (one or two can lag an order in flight)
+  * every RECONCILE_INTERVAL seconds anyway, as a safety net
+
+    ledger = PositionLedger(('CRZY_M', 'CRZY_A'))
+    start_reconciler(ledger, lambda: fetch_positions(client))
+    qty = min(ask_size, bid_size, MAX_ORDER_SIZE, ledger.pair_headroom('CRZY_M', 'CRZY_A'))
+    ledger.apply_order(decode.order(resp.content))
+"""
+import threading
+import time
+
+GROSS_LIMIT = 25000
+NET_LIMIT = 25000
+DRIFT_POLLS = 3            # consecutive mismatching polls before asking for a reconcile
+RECONCILE_INTERVAL = 5.0   # seconds between unprompted reconciles
+
+
+class PositionLedger:
+    """Positions from our own fills, with O(1) gross/net headroom"""
+
+    def __init__(self, tickers=(), gross_limit=GROSS_LIMIT, net_limit=NET_LIMIT, drift_polls=DRIFT_POLLS):
+        self.gross_limit = gross_limit
+        self.net_limit = net_limit
+        self.drift_polls = drift_polls
+        self.positions = {ticker: 0 for ticker in tickers}
+        self.gross = 0
+        self.net = 0
+        # Exposure the server reports beyond the tickers we trade
+        self.other_gross = 0
+        self.other_net = 0
+
+        self.version = 0
+        self.mismatches = 0
+        self.reconciles = 0
+        self.wanted = threading.Event()
+        self.lock = threading.Lock()
+
+    # ---- hot path ----------------------------------------------------
+
+    def apply(self, ticker, action, quantity):
+        """Record a fill of quantity shares"""
+        if not quantity:
+            return
+        signed = quantity if action == 'BUY' else -quantity
+        with self.lock:
+            old = self.positions.get(ticker, 0)
+            new = old + signed
+            self.positions[ticker] = new
+            self.gross += abs(new) - abs(old)
+            self.net += signed
+            self.version += 1
+
+    def apply_order(self, order):
+        """Record the fills of an /orders response (an Order record or the raw dict)"""
+        if isinstance(order, dict):
+            self.apply(order['ticker'], order['action'], order.get('quantity_filled') or 0)
+        else:
+            self.apply(order.ticker, order.action, order.quantity_filled)
+
+    def unknown(self):
+        """An order's outcome is unknown; ask the reconciler to check"""
+        self.wanted.set()
+
+    def headroom(self):
+        """Shares that can still be added in one direction without breaching gross or net"""
+        return min(self.gross_limit - self.gross - self.other_gross,
+                   self.net_limit - abs(self.net + self.other_net))
+
+    def pair_headroom(self, buy_ticker, sell_ticker):
+        """Largest q for buying q of buy_ticker and selling q of sell_ticker within the limits
+
+        The server checks every order on its own and the bots send the BUY leg
+        first, so q also has to fit with only that leg filled.
+        """
+        buy = self.positions.get(buy_ticker, 0)
+        sell = self.positions.get(sell_ticker, 0)
+        net = self.net + self.other_net
+        if abs(net) > self.net_limit:
+            return 0
+        room = self.gross_limit - self.other_gross - (self.gross - abs(buy) - abs(sell))
+        # The BUY leg alone: net rises by q, gross by |buy + q| - |buy|
+        first_leg = min(self.net_limit - net, room - abs(sell) - buy)
+        if first_leg <= 0:
+            return 0
+        return min(first_leg, self._both_legs(buy, sell, room))
+
+    @staticmethod
+    def _both_legs(buy, sell, room):
+        """Largest q with both legs filled keeping gross within room"""
+
+        def gross(q):
+            return abs(buy + q) + abs(sell - q)
+
+        # gross(q) is convex and piecewise linear; its kinks are where a leg crosses flat
+        points = sorted({0, max(0, -buy), max(0, sell)})
+        if gross(points[0]) > room:
+            return 0
+        for a, b in zip(points, points[1:]):
+            if gross(b) > room:
+                slope = (gross(b) - gross(a)) / (b - a)
+                return int(a + (room - gross(a)) / slope)
+        last = points[-1]
+        return int(last + (room - gross(last)) // 2)
+
+    def observe(self, ticker, position):
+        """Compare a position from /securities; True once it has disagreed DRIFT_POLLS times"""
+        if self.positions.get(ticker, 0) == position:
+            self.mismatches = 0
+            return False
+        self.mismatches += 1
+        if self.mismatches >= self.drift_polls:
+            self.mismatches = 0
+            self.wanted.set()
+            return True
+        return False
+
+    # ---- reconciling -------------------------------------------------
+
+    def reconcile(self, positions, limit=None, version=None):
+        """Adopt server positions (and LIMIT-STOCK gross, net, gross_limit, net_limit)
+
+        Skipped, returning False, if a fill was applied since `version` was read,
+        because the server data may predate it; the reconciler tries again.
+        """
+        with self.lock:
+            if version is not None and version != self.version:
+                return False
+            for ticker in self.positions:
+                self.positions[ticker] = positions.get(ticker, 0)
+            self.gross = sum(abs(p) for p in self.positions.values())
+            self.net = sum(self.positions.values())
+            if limit is not None:
+                gross, net, self.gross_limit, self.net_limit = limit
+                self.other_gross = max(0, gross - self.gross)
+                self.other_net = net - self.net
+            self.mismatches = 0
+            self.reconciles += 1
+            self.wanted.clear()
+            return True
+
+    def reset(self):
+        """Flat book for a new period"""
+        with self.lock:
+            for ticker in self.positions:
+                self.positions[ticker] = 0
+            self.gross = self.net = 0
+            self.other_gross = self.other_net = 0
+            self.mismatches = 0
+            self.version += 1
+
+
+def fetch_positions(client):
+    """(positions by ticker, LIMIT-STOCK tuple) from a RitClient"""
+    positions = {ticker: quote.position for ticker, quote in client.quotes().items()}
+    return positions, client.stock_limit()
+
+
+def reconcile_loop(ledger, fetch, stop, interval=RECONCILE_INTERVAL):
+    """Reconcile whenever asked (or every interval seconds) until stop is set"""
+    while not stop.is_set():
+        ledger.wanted.wait(interval)
+        if stop.is_set():
+            break
+        version = ledger.version
+        try:
+            positions, limit = fetch()
+        except Exception as e:  # keep the thread alive through network errors
+            print(f"Reconcile failed: {e}")
+            time.sleep(0.5)
+            continue
+        if not ledger.reconcile(positions, limit, version):
+            # A fill landed meanwhile; try again shortly
+            ledger.wanted.set()
+            time.sleep(0.05)
+
+
+def start_reconciler(ledger, fetch, interval=RECONCILE_INTERVAL):
+    """Run reconcile_loop on a daemon thread; set the returned event to stop it"""
+    stop = threading.Event()
+    threading.Thread(target=reconcile_loop, args=(ledger, fetch, stop, interval), daemon=True).start()
+    return stop
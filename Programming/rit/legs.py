@@ -0,0 +1,98 @@
+"""
+Keep the two legs of an arbitrage the same size.
+
+execute_arbitrage sends a BUY on one venue and a SELL on the other. When one
+leg is rate limited, rejected or only partly filled, the bot is left holding
+the difference: inventory nobody hedged, sitting on position limit the next
+arbitrage needs. balance_legs() compares quantity_filled on the two legs and
+trades the difference straight away.
+
+The first offsetting order goes to the venue the missing leg was priced on.
+By construction that is the cheapest venue for that side: the arbitrage was
+only taken because that venue's price beat the other one's. If that order is
+refused (a 429, or TRADING_LIMIT because it would add gross exposure), the
+next try goes to the other venue, where it unwinds the leg that did fill. If
+it only partly fills, the next try goes to whichever venue a fresh quote
+shows as best (when the bot passes quotes). This repeats until the legs
+match or ATTEMPTS run out.
+
+    left = balance_legs(lambda t, a, q: submit_order(client, t, a, q),
+                        'CRZY_M', 'CRZY_A', bought=buy_filled, sold=0, quotes=client.quotes)
+
+asyncio bots await balance_legs_async() with a coroutine submit instead.
+"""
+ATTEMPTS = 3  # offsetting orders tried before the difference is left to the caller
+
+
+def filled(order):
+    """quantity_filled of an order dict or Order record; 0 for a failed (None) order"""
+    if order is None:
+        return 0
+    if isinstance(order, dict):
+        return order['quantity_filled']
+    return order.quantity_filled
+
+
+def best_venue(action, quotes, venues):
+    """Venue with the highest bid (to SELL) or the lowest non-zero ask (to BUY)"""
+    if action == 'SELL':
+        priced = [(quotes[t].bid, t) for t in venues if t in quotes and quotes[t].bid > 0]
+        return max(priced)[1] if priced else venues[0]
+    priced = [(quotes[t].ask, t) for t in venues if t in quotes and quotes[t].ask > 0]
+    return min(priced)[1] if priced else venues[0]
+
+
+def _next_venue(action, venue, done, buy_ticker, sell_ticker, quotes):
+    """Venue for the next offsetting order, given the last one tried and what it filled"""
+    if venue is None:
+        return sell_ticker if action == 'SELL' else buy_ticker
+    other = buy_ticker if venue == sell_ticker else sell_ticker
+    if done and quotes is not None:
+        return best_venue(action, quotes(), (venue, other))
+    return other
+
+
+def balance_legs(submit, buy_ticker, sell_ticker, bought, sold, quotes=None, limiter=None, attempts=ATTEMPTS):
+    """Trade away bought - sold with MARKET orders; returns the shares still unhedged (+ long, - short)
+
+    submit(ticker, action, quantity) sends one MARKET order and returns the order
+    (dict or Order) or None. Pass limiter when submit does not take a permit itself;
+    quotes() returns {ticker: Quote} and is only read after a try that filled part of the order.
+    """
+    excess = bought - sold
+    venue = done = None
+    for _ in range(attempts):
+        if excess == 0:
+            break
+        action = 'SELL' if excess > 0 else 'BUY'
+        venue = _next_venue(action, venue, done, buy_ticker, sell_ticker, quotes)
+        if limiter is not None:
+            limiter.acquire()
+        done = filled(submit(venue, action, abs(excess)))
+        print(f"🔁 Leg hedge: {action} {abs(excess):,} on {venue} -> filled {done:,}")
+        excess -= done if action == 'SELL' else -done
+
+    if excess:
+        print(f"⚠️ Legs still uneven by {excess:+,} shares")
+    return excess
+
+
+async def balance_legs_async(submit, buy_ticker, sell_ticker, bought, sold, quotes=None, limiter=None,
+                             attempts=ATTEMPTS):
+    """balance_legs() for asyncio bots: submit is a coroutine function, limiter is awaited"""
+    excess = bought - sold
+    venue = done = None
+    for _ in range(attempts):
+        if excess == 0:
+            break
+        action = 'SELL' if excess > 0 else 'BUY'
+        venue = _next_venue(action, venue, done, buy_ticker, sell_ticker, quotes)
+        if limiter is not None:
+            await limiter.acquire_async()
+        done = filled(await submit(venue, action, abs(excess)))
+        print(f"🔁 Leg hedge: {action} {abs(excess):,} on {venue} -> filled {done:,}")
+        excess -= done if action == 'SELL' else -done
+
+    if excess:
+        print(f"⚠️ Legs still uneven by {excess:+,} shares")
+    return excess
@@ -0,0 +1,62 @@
+"""
+Unwind a position against the live book as fast as the order limit allows.
+
+slice_schedule() plans the whole unwind from one book snapshot: the fewest
+MARKET orders that respect the case's max trade size, each with the VWAP
+the snapshot says it should get. liquidate() sends them back to back through
+the rate limiter (no fixed sleeps), takes the position down by every
+response's quantity_filled instead of re-reading it, trims the last slice so
+it lands exactly on flat, and only asks for a fresh snapshot when a slice
+comes back short because the book ran out under it.
+
+    left = liquidate(client, limiter, 'CRZY', position, depth, max_size=25000)
+
+depth(fresh) returns depth_books() of the ticker; fresh=True means the
+previous snapshot has been traded through and must not be reused.
+"""
+from rit import decode
+
+MAX_ROUNDS = 20  # re-plans before giving up on a book that keeps running dry
+
+
+def slice_schedule(side, quantity, max_size):
+    """[(size, expected vwap or None), ...] unwinding quantity against one DepthBook side"""
+    slices = []
+    done = 0
+    filled_before, cost_before = 0, 0.0
+    while done < quantity:
+        size = min(max_size, quantity - done)
+        filled_after, cost_after = side.notional(done + size)
+        filled = filled_after - filled_before
+        slices.append((size, (cost_after - cost_before) / filled if filled else None))
+        filled_before, cost_before = filled_after, cost_after
+        done += size
+    return slices
+
+
+def liquidate(client, limiter, ticker, position, depth, max_size):
+    """Trade a signed position to flat with MARKET orders; returns the shares still open"""
+    for rounds in range(MAX_ROUNDS):
+        if position == 0:
+            break
+        action = 'SELL' if position > 0 else 'BUY'
+        side = depth(rounds > 0)['bids' if action == 'SELL' else 'asks']
+
+        for size, expected in slice_schedule(side, abs(position), max_size):
+            limiter.acquire()
+            resp = client.post_order(ticker, action, size)
+            if resp.status_code == 429:
+                limiter.penalize(resp.json().get('wait', 1))
+                break  # re-plan once the limiter lets us back in
+            if resp.status_code != 200:
+                print(f"Failed to fulfill {action} order. Status code: {resp.status_code}")
+                return position
+
+            order = decode.order(resp.content)
+            filled = order.quantity_filled
+            position -= filled if action == 'SELL' else -filled
+            expected = f" (expected {expected:.4f})" if expected is not None else ""
+            print(f"Fulfilled {action} order for {filled} shares of {ticker} at {order.vwap}{expected}")
+            if filled < size:
+                break  # the book ran out under us; plan again from a fresh snapshot
+    return position
@@ -0,0 +1,261 @@
+"""
+Local table of our resting orders so the market makers stop polling /orders.
+
+Orders are keyed by order_id and go in as soon as the submission response
+comes back; a successful cancel takes them out. Fills on resting orders are
+picked up by one diff poll of /orders?status=OPEN, run every ORDERS_INTERVAL
+seconds or as soon as the position in /securities moves (which only happens
+when one of our orders traded). Open volume and our best price per side are
+kept as running values, so a decision reads them without a round trip.
+
+    table = OrderTable('ALGO')
+    table.add(decode.order(client.post_order('ALGO', 'BUY', 5000, 'LIMIT', 24.95).content))
+    started = time.monotonic()
+    table.sync(client.orders('OPEN'), started)
+    table.volume('BUY'), table.top('BUY'), table.entries('BUY')
+
+requote() moves a whole side to a new price: a fresh /orders sync, one
+/commands/cancel for every order on it, then the unfilled remainder of each
+is re-posted concurrently, each replacement still waiting its turn on the
+rate limiter.
+
+    results = requote(client, limiter, table, 'BUY', 24.96)
+
+ladder() puts a whole quote set up the same way: every order is handed to
+the pool at once and reserves its limiter slot in list order, so the first
+`burst` go out together and the rest follow exactly at the allowed rate.
+
+    results = ladder(client, limiter, table, [('SELL', 5000, 25.02), ('BUY', 5000, 24.98)] * 5)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rit import decode
+
+ORDERS_INTERVAL = 0.5  # seconds between unprompted diff polls of /orders
+WORKERS = 10           # concurrent order posts, one per pooled connection
+
+_executor = None
+
+
+class _Side:
+    """Open orders of one action with running remaining volume and best price"""
+
+    __slots__ = ('action', 'orders', 'volume', '_top', '_stale')
+
+    def __init__(self, action):
+        self.action = action
+        # order_id -> [price, quantity, quantity_filled, added (monotonic)]
+        self.orders = {}
+        self.volume = 0
+        self._top = None
+        self._stale = False
+
+    def put(self, order_id, price, quantity, filled, added):
+        old = self.orders.get(order_id)
+        if old is not None:
+            self.volume -= old[1] - old[2]
+            if old[0] != price:
+                self._stale = True
+        self.orders[order_id] = [price, quantity, filled, added]
+        self.volume += quantity - filled
+        if not self._stale and (self._top is None or self._better(price, self._top)):
+            self._top = price
+
+    def fill(self, order_id, filled):
+        entry = self.orders[order_id]
+        if filled > entry[2]:
+            self.volume -= filled - entry[2]
+            entry[2] = filled
+
+    def pop(self, order_id):
+        entry = self.orders.pop(order_id, None)
+        if entry is not None:
+            self.volume -= entry[1] - entry[2]
+            if entry[0] == self._top:
+                self._stale = True
+        return entry
+
+    def top(self):
+        if self._stale:
+            prices = [entry[0] for entry in self.orders.values()]
+            if not prices:
+                self._top = None
+            else:
+                self._top = max(prices) if self.action == 'BUY' else min(prices)
+            self._stale = False
+        return self._top
+
+    def _better(self, price, than):
+        return price > than if self.action == 'BUY' else price < than
+
+    def clear(self):
+        self.orders.clear()
+        self.volume = 0
+        self._top = None
+        self._stale = False
+
+
+class OrderTable:
+    """Our open orders for one ticker, by order_id"""
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.sides = {'BUY': _Side('BUY'), 'SELL': _Side('SELL')}
+        self.lock = threading.Lock()
+        self.syncs = 0
+        self.last_sync = 0.0
+
+    # ---- updates from our own requests -------------------------------
+
+    def add(self, order):
+        """Record a submitted Order (ignored unless it is still resting)"""
+        if order is None or order.ticker != self.ticker or order.status != 'OPEN':
+            return
+        with self.lock:
+            self.sides[order.action].put(order.order_id, order.price, order.quantity,
+                                         order.quantity_filled, time.monotonic())
+
+    def remove(self, order_id):
+        """Forget an order (cancelled, or known to be filled); returns its entry or None"""
+        with self.lock:
+            for side in self.sides.values():
+                entry = side.pop(order_id)
+                if entry is not None:
+                    return entry
+        return None
+
+    def sync(self, orders, started):
+        """Diff the Orders of an /orders?status=OPEN response into the table
+
+        started is time.monotonic() from just before the request went out:
+        orders we added after that may be missing from the response only
+        because it was built first, so they are kept.
+        """
+        with self.lock:
+            seen = set()
+            for order in orders:
+                if order.ticker != self.ticker:
+                    continue
+                order_id = order.order_id
+                seen.add(order_id)
+                side = self.sides[order.action]
+                if order_id in side.orders:
+                    side.fill(order_id, order.quantity_filled)
+                else:
+                    side.put(order_id, order.price, order.quantity, order.quantity_filled, started)
+            for side in self.sides.values():
+                gone = [order_id for order_id, entry in side.orders.items()
+                        if order_id not in seen and entry[3] < started]
+                for order_id in gone:
+                    side.pop(order_id)
+            self.syncs += 1
+            self.last_sync = started
+
+    def clear(self):
+        """Empty the table (new period, or after a cancel-all)"""
+        with self.lock:
+            for side in self.sides.values():
+                side.clear()
+
+    # ---- reads -------------------------------------------------------
+
+    def volume(self, action):
+        """Shares still open on one side"""
+        return self.sides[action].volume
+
+    def top(self, action):
+        """Our best resting price on one side (highest BUY, lowest SELL), or None"""
+        with self.lock:
+            return self.sides[action].top()
+
+    def entries(self, action):
+        """[(order_id, price, quantity, quantity_filled), ...] on one side, oldest first"""
+        with self.lock:
+            return [(order_id, entry[0], entry[1], entry[2])
+                    for order_id, entry in sorted(self.sides[action].orders.items())]
+
+    def __len__(self):
+        return sum(len(side.orders) for side in self.sides.values())
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='orders')
+    return _executor
+
+
+def place(client, limiter, table, action, quantity, price, at=None):
+    """Post one LIMIT order once the limiter allows it and record it; the Order, or None
+
+    at is a time.monotonic() slot already reserved on the limiter. If a 429
+    penalty has landed since, the slot is given up and a fresh permit taken.
+    """
+    if at is None:
+        limiter.acquire()
+    else:
+        delay = at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if limiter.blocked():
+            limiter.acquire()
+    resp = client.post_order(table.ticker, action, quantity, 'LIMIT', price)
+
+    if resp.status_code == 429:
+        wait_time = resp.json().get('wait', 1)
+        print(f"⚠️ Rate limited! Pausing orders for {wait_time:.2f} seconds...")
+        limiter.penalize(wait_time)
+        return None
+
+    if resp.status_code != 200:
+        error_msg = resp.json() if resp.content else "Unknown error"
+        print(f"⚠️ Order failed: {error_msg}")
+        return None
+
+    order = decode.order(resp.content)
+    table.add(order)
+    return order
+
+
+def requote(client, limiter, table, action, price):
+    """Cancel every open order on one side and re-post what was left of each at price
+
+    Returns [(cancelled order_id, quantity re-posted, new order or None), ...].
+    The table is synced first, so remainders come from current fills rather
+    than the last periodic poll. Orders the API did not cancel (already
+    filled) are left for the next sync.
+    """
+    started = time.monotonic()
+    table.sync(client.orders('OPEN'), started)
+    entries = table.entries(action)
+    if not entries:
+        return []
+    cancelled = set(client.cancel_orders([entry[0] for entry in entries]))
+
+    replaced = []
+    for order_id, _, quantity, filled in entries:
+        if order_id not in cancelled:
+            continue
+        table.remove(order_id)
+        left = quantity - filled
+        if left > 0:
+            replaced.append((order_id, left))
+    orders = ladder(client, limiter, table, [(action, left, price) for _, left in replaced])
+    return [(order_id, left, result[3]) for (order_id, left), result in zip(replaced, orders)]
+
+
+def ladder(client, limiter, table, quotes):
+    """Post every (action, quantity, price) in quotes concurrently
+
+    Returns [(action, quantity, price, order or None), ...] in the same order,
+    None where the API refused the order.
+    """
+    pool = _pool()
+    futures = []
+    for action, quantity, price in quotes:
+        # Reserve here, in list order, rather than in whichever worker runs first
+        at = time.monotonic() + limiter.reserve()
+        futures.append(pool.submit(place, client, limiter, table, action, quantity, price, at))
+    return [quote + (future.result(),) for quote, future in zip(quotes, futures)]
@@ -0,0 +1,149 @@
+"""
+Quote polling over several connections at once.
+
+One connection polling /securities gets at most one snapshot per round
+trip, and one slow response stalls every decision behind it. QuotePoller
+keeps `connections` keep-alive sockets (rit.wire), each with its own thread
+that always has a GET /v1/securities outstanding. The threads start
+staggered by a fraction of the measured round trip, so completed snapshots
+arrive spread out and the refresh rate grows roughly with the number of
+connections.
+
+Every request takes a sequence number when it is sent. A response is
+published only if it was sent after the one already published; an older
+response that completes late is dropped, so readers never go back in time.
+After trading, wait(poller.mark()) skips snapshots requested before the
+orders went out.
+
+    poller = QuotePoller(10007, {'X-API-Key': 'HCYA2KPW'}, connections=3).start()
+    seq = 0
+    while True:
+        seq, quotes = poller.wait(seq)      # {ticker: Quote}, newer than seq
+        quotes['CRZY_M'].ask
+    poller.stop()
+"""
+import threading
+import time
+
+from rit import decode
+from rit.wire import Connection, header_lines
+
+CONNECTIONS = 3      # sockets each keeping one /securities request in flight
+RETRY_DELAY = 0.05   # seconds before retrying after a socket error or an error answer
+WAIT_TIMEOUT = 1.0   # wait() gives up after this long without a newer snapshot
+
+
+class QuotePoller:
+    """Keeps the freshest {ticker: Quote} from several staggered /securities pollers"""
+
+    def __init__(self, port, headers, host='localhost', connections=CONNECTIONS, timeout=None):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.connections = connections
+        self.request = b'GET /v1/securities HTTP/1.1\r\n' + header_lines(host, port, headers) + b'\r\n'
+
+        self._seq_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._threads = []
+
+        self.sent = 0          # sequence number of the last request sent
+        self.seq = 0           # sequence number of the published snapshot
+        self.quotes = {}
+        self.received = 0.0    # time.monotonic() the published snapshot arrived
+
+        # Statistics
+        self.published = 0
+        self.dropped = 0       # completed after a newer snapshot was already published
+        self.errors = 0        # socket errors and non-200 answers
+        self.started = None
+
+    def start(self):
+        """Measure one round trip, then start the pollers a fraction of it apart"""
+        conn = Connection(self.address, self.timeout)
+        sent = time.monotonic()
+        self._exchange(conn)
+        stagger = (time.monotonic() - sent) / self.connections
+        self.started = time.monotonic()
+        for index in range(self.connections):
+            thread = threading.Thread(target=self._run, args=(conn if index == 0 else None, index * stagger),
+                                      name=f'quotes-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def _exchange(self, conn):
+        with self._seq_lock:
+            seq = self.sent = self.sent + 1
+        status, body, keep_alive = conn.exchange(self.request)
+        if status != 200:
+            with self._cond:
+                self.errors += 1
+                first = self.errors == 1
+            if first:
+                print(f"Quote poller: HTTP {status} {body[:200]!r}; readers keep the last snapshot")
+            self._stop.wait(RETRY_DELAY)
+        elif seq < self.seq:
+            with self._cond:
+                self.dropped += 1  # a newer snapshot is already out; skip decoding this one
+        else:
+            self._publish(seq, decode.quotes(body), time.monotonic())
+        return keep_alive
+
+    def _publish(self, seq, quotes, received):
+        with self._cond:
+            if seq < self.seq:
+                self.dropped += 1
+                return
+            self.seq, self.quotes, self.received = seq, quotes, received
+            self.published += 1
+            self._cond.notify_all()
+
+    def _run(self, conn, delay):
+        if delay:
+            time.sleep(delay)
+        while not self._stop.is_set():
+            try:
+                if conn is None:
+                    conn = Connection(self.address, self.timeout)
+                if not self._exchange(conn):
+                    conn.close()
+                    conn = None
+            except OSError:
+                with self._cond:
+                    self.errors += 1
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                self._stop.wait(RETRY_DELAY)
+        if conn is not None:
+            conn.close()
+
+    def mark(self):
+        """Sequence number of the last request sent; wait(mark()) only returns snapshots requested after now"""
+        with self._seq_lock:
+            return self.sent
+
+    def latest(self):
+        """(seq, {ticker: Quote}) of the freshest snapshot, without waiting"""
+        with self._cond:
+            return self.seq, self.quotes
+
+    def wait(self, after=0, timeout=WAIT_TIMEOUT):
+        """(seq, {ticker: Quote}) of a snapshot newer than `after`; the latest one if none arrives in time"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.seq > after or self._stop.is_set(), timeout)
+            return self.seq, self.quotes
+
+    def rate(self):
+        """Snapshots published per second since start()"""
+        if not self.started:
+            return 0.0
+        return self.published / max(time.monotonic() - self.started, 1e-9)
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
@@ -0,0 +1,115 @@
+"""
+Order rate limiter shared by threads and asyncio tasks.
+
+A token bucket (written as GCRA: one "theoretical arrival time" instead of a
+token count) that hands out `rate` permits per second with up to `burst` saved
+up, plus an optional sliding-window cap so that no window of `window` seconds
+ever holds more than `rate` orders - which is how the RIT API counts before
+answering 429. Permits are reserved under a lock and the caller sleeps outside
+it, so a thread and an event loop can share one limiter and are served in the
+order they asked.
+
+    limiter = TokenBucket(10)
+    limiter.acquire()                # threads: blocks only when over budget
+    await limiter.acquire_async(2)   # asyncio: both legs of an arbitrage
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+
+ORDER_LIMIT = 10  # orders per second allowed by the RIT API
+SLACK = 0.01      # seconds added to the window for network/scheduling jitter
+EPSILON = 1e-9    # seconds; a grant this close to now is now (float drift from summing intervals)
+
+
+class TokenBucket:
+    """Grants `rate` permits per second, `burst` at once, never more than `rate` per `window`"""
+
+    def __init__(self, rate=ORDER_LIMIT, burst=None, window=1.0, slack=SLACK):
+        self.rate = rate
+        self.burst = burst or rate
+        self.window = window + slack if window else None
+        self.interval = 1.0 / rate
+        self.tolerance = (self.burst - 1) * self.interval
+        self.tat = time.monotonic()
+        self.recent = deque(maxlen=int(rate * window)) if window else None
+        self.penalty_until = 0.0  # time.monotonic() the last 429 penalty runs out
+        self.lock = threading.Lock()
+
+        # Statistics
+        self.granted = 0
+        self.delayed = 0
+        self.waited = 0.0
+
+    def _grant_time(self, now):
+        """Earliest time the next permit may be used"""
+        grant = max(now, self.tat - self.tolerance)
+        if self.recent is not None and len(self.recent) == self.recent.maxlen:
+            grant = max(grant, self.recent[0] + self.window)
+        return now if grant - now <= EPSILON else grant
+
+    def _take(self, grant):
+        self.tat = max(self.tat, grant) + self.interval
+        if self.recent is not None:
+            self.recent.append(grant)
+
+    def reserve(self, permits=1):
+        """Book permits now and return how many seconds the caller must wait"""
+        with self.lock:
+            now = time.monotonic()
+            grant = now
+            for _ in range(permits):
+                grant = self._grant_time(now)
+                self._take(grant)
+            wait = grant - now
+            self.granted += permits
+            if wait > 0:
+                self.delayed += 1
+                self.waited += wait
+            return wait
+
+    def try_acquire(self, permits=1):
+        """Take permits only if they are available right now"""
+        with self.lock:
+            now = time.monotonic()
+            saved_tat = self.tat
+            saved_recent = list(self.recent) if self.recent is not None else None
+            for _ in range(permits):
+                grant = self._grant_time(now)
+                if grant > now:
+                    self.tat = saved_tat
+                    if saved_recent is not None:
+                        self.recent.clear()
+                        self.recent.extend(saved_recent)
+                    return False
+                self._take(grant)
+            self.granted += permits
+            return True
+
+    def acquire(self, permits=1):
+        """Block the calling thread until the permits are granted; returns the wait"""
+        wait = self.reserve(permits)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, permits=1):
+        """Coroutine version of acquire(); only the awaiting task waits"""
+        wait = self.reserve(permits)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def penalize(self, wait):
+        """The API answered 429: grant nothing for `wait` seconds"""
+        with self.lock:
+            self.penalty_until = max(self.penalty_until, time.monotonic() + wait)
+            self.tat = max(self.tat, self.penalty_until + self.tolerance)
+
+    def blocked(self):
+        """True while a 429 penalty is in force; slots reserved before it should not be used"""
+        return time.monotonic() < self.penalty_until
+
+    def stats(self):
+        return {'granted': self.granted, 'delayed': self.delayed, 'waited': round(self.waited, 3)}
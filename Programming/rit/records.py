@@ -0,0 +1,110 @@
+"""
+Compact records for the hot path.
+
+Quote, BookLevel, Order and Tender hold only the fields the bots use, in
+__slots__ (no per-instance dict), and are built once when a response is
+decoded (rit.decode). Quantities still open are worked out at that point as
+`remaining`, so helpers read an attribute instead of subtracting two dict
+lookups every time.
+
+    quote = client.quotes()['CRZY_M']
+    quote.bid, quote.ask_size, quote.position
+    bids, asks = client.levels('CRZY_M')
+    bids[0].price, bids[0].remaining
+"""
+
+
+class _Record:
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+    def __eq__(self, other):
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+
+class Quote(_Record):
+    """Top of book, position and P&L of one security from /securities"""
+
+    __slots__ = ('ticker', 'bid', 'ask', 'bid_size', 'ask_size', 'position', 'realized', 'unrealized', 'last')
+
+    def __init__(self, ticker, bid, ask, bid_size, ask_size, position=0, realized=0.0, unrealized=0.0, last=0.0):
+        self.ticker = ticker
+        self.bid = bid
+        self.ask = ask
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+        self.position = position
+        self.realized = realized
+        self.unrealized = unrealized
+        self.last = last
+
+    @classmethod
+    def from_json(cls, s):
+        return cls(s['ticker'], s['bid'], s['ask'], s['bid_size'], s['ask_size'],
+                   s['position'], s['realized'], s['unrealized'], s['last'])
+
+
+class BookLevel(_Record):
+    """One resting order in a /securities/book side"""
+
+    __slots__ = ('price', 'quantity', 'quantity_filled', 'remaining')
+
+    def __init__(self, price, quantity, quantity_filled=0):
+        self.price = price
+        self.quantity = quantity
+        self.quantity_filled = quantity_filled
+        self.remaining = quantity - quantity_filled
+
+    @classmethod
+    def from_json(cls, level):
+        return cls(level['price'], level['quantity'], level['quantity_filled'])
+
+
+class Order(_Record):
+    """One of our orders, from /orders or an order submission response"""
+
+    __slots__ = ('order_id', 'ticker', 'action', 'type', 'price', 'quantity', 'quantity_filled', 'vwap',
+                 'status', 'remaining')
+
+    def __init__(self, order_id, ticker, action, type, price, quantity, quantity_filled=0, vwap=None, status='OPEN'):
+        self.order_id = order_id
+        self.ticker = ticker
+        self.action = action
+        self.type = type
+        self.price = price
+        self.quantity = quantity
+        self.quantity_filled = quantity_filled
+        self.vwap = vwap
+        self.status = status
+        self.remaining = quantity - quantity_filled
+
+    @classmethod
+    def from_json(cls, o):
+        return cls(o['order_id'], o['ticker'], o['action'], o['type'], o.get('price'), o['quantity'],
+                   o['quantity_filled'], o.get('vwap'), o['status'])
+
+
+class Tender(_Record):
+    """A tender offer from /tenders"""
+
+    __slots__ = ('tender_id', 'ticker', 'action', 'price', 'quantity', 'expires', 'is_fixed_bid')
+
+    def __init__(self, tender_id, ticker, action, price, quantity, expires, is_fixed_bid=True):
+        self.tender_id = tender_id
+        self.ticker = ticker
+        self.action = action
+        self.price = price
+        self.quantity = quantity
+        self.expires = expires
+        self.is_fixed_bid = is_fixed_bid
+
+    @classmethod
+    def from_json(cls, t):
+        return cls(t['tender_id'], t['ticker'], t['action'], t.get('price'), t['quantity'], t['expires'],
+                   t.get('is_fixed_bid', True))
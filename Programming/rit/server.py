@@ -0,0 +1,675 @@
+"""
+Local stand-in for the RIT client REST API.
+
+Serves the endpoints the Algo1 bots use (/v1/case, /v1/securities,
+/v1/securities/book, /v1/limits, /v1/orders) over a simulated CRZY_M / CRZY_A
+market so the bots can be run and timed on Linux without the Windows RIT
+client. The price path is seeded, so every bot sees the same market.
+
+    python -m rit.server --port 10010 --seed 7 --speed 5
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Simulation settings
+STEPS_PER_TICK = 10        # the book is rebuilt this many times per tick
+BOOK_DEPTH = 20            # levels per side
+ORDER_LIMIT = 10           # orders per second before the API answers 429
+VOLATILITY = 0.004         # per-step move of the shared fair value
+NOISE = 0.003              # per-step venue offset noise
+DECAY = 0.85               # how fast a venue offset reverts to the fair value
+DISLOCATION_RATE = 0.006   # chance per step that a venue jumps away from fair value
+TRADER_ID = 'standin'
+
+# ALGO1 case brief: 10,000 shares per order, 25,000 gross/net, no commissions
+ALGO1 = {
+    'name': 'ALGO1',
+    'ticks_per_period': 300,
+    'gross_limit': 25000,
+    'net_limit': 25000,
+    'securities': [
+        {'ticker': 'CRZY_M', 'start_price': 10.00, 'max_trade_size': 10000, 'trading_fee': 0.0, 'limit_order_rebate': 0.0},
+        {'ticker': 'CRZY_A', 'start_price': 10.00, 'max_trade_size': 10000, 'trading_fee': 0.0, 'limit_order_rebate': 0.0},
+    ],
+}
+
+# ALGO2 case brief: one market-making ticker, $0.01 to take and $0.005 rebate to provide
+ALGO2 = {
+    'name': 'ALGO2',
+    'ticks_per_period': 300,
+    'gross_limit': 25000,
+    'net_limit': 25000,
+    'securities': [
+        {'ticker': 'ALGO', 'start_price': 25.00, 'max_trade_size': 5000, 'trading_fee': 0.01, 'limit_order_rebate': 0.005},
+    ],
+}
+
+CASES = {'ALGO1': ALGO1, 'ALGO2': ALGO2}
+
+# Requests that hand the bot fresh prices (used for quote-to-order latency)
+QUOTE_PATHS = ('/v1/securities', '/v1/securities/book')
+
+
+def percentiles(values, points=(50, 90, 99)):
+    """Return {'p50': .., ...} for a list of numbers (empty list gives zeros)"""
+    if not values:
+        return {f'p{p}': 0 for p in points}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {f'p{p}': ordered[min(last, int(round(p / 100 * last)))] for p in points}
+
+
+class Market:
+    """Simulated exchange shared by all request handler threads"""
+
+    def __init__(self, case=ALGO1, seed=0, speed=1.0, warmup=1.0, total_periods=1, pause=2.0,
+                 ticks_per_period=None, api_key=None, enforce_limits=True):
+        self.case = case
+        self.seed = seed
+        self.speed = speed
+        self.total_periods = total_periods
+        self.pause = pause
+        self.ticks_per_period = ticks_per_period or case['ticks_per_period']
+        self.api_key = api_key
+        self.enforce_limits = enforce_limits
+        self.specs = {spec['ticker']: spec for spec in case['securities']}
+        self.tickers = list(self.specs)
+
+        self.lock = threading.Lock()
+        self.start = time.monotonic() + warmup
+        self.order_times = deque()
+        self.next_order_id = 1
+        self.last_quote_ns = 0
+        self.history = []
+
+        self.period = 0
+        self.tick = 0
+        self.step = 0
+        self.status = 'STOPPED'
+        self._start_period(1)
+
+    # ---- clock ----------------------------------------------------------
+
+    def _sync(self, now):
+        """Move the case clock to the monotonic time now"""
+        period_seconds = self.ticks_per_period / self.speed
+        elapsed = now - self.start
+        if elapsed < 0:
+            self.status, self.tick, self.step = 'STOPPED', 0, 0
+            return
+
+        index = int(elapsed // (period_seconds + self.pause))
+        if index >= self.total_periods:
+            index = self.total_periods - 1
+            within = period_seconds
+        else:
+            within = elapsed - index * (period_seconds + self.pause)
+
+        if index + 1 != self.period:
+            self.history.append(self.summary())
+            self._start_period(index + 1)
+
+        if within >= period_seconds:
+            self.status = 'STOPPED'
+            self.tick = self.ticks_per_period
+            self.step = self.ticks_per_period * STEPS_PER_TICK
+        else:
+            self.status = 'ACTIVE'
+            self.tick = int(within * self.speed)
+            self.step = int(within * self.speed * STEPS_PER_TICK)
+
+    def _start_period(self, period):
+        """Reset positions, orders and statistics and draw a new price path"""
+        self.period = period
+        self.position = dict.fromkeys(self.tickers, 0)
+        self.cost = dict.fromkeys(self.tickers, 0.0)
+        self.realized = dict.fromkeys(self.tickers, 0.0)
+        self.volume = dict.fromkeys(self.tickers, 0)
+        self.orders = {}
+        self.books = {}
+        self.book_steps = {}
+        self.stats = {
+            'requests': Counter(),
+            'orders': 0,
+            'filled_shares': 0,
+            'rejected': 0,
+            'rate_limited': 0,
+            'quote_to_order_ns': [],
+        }
+        self.path = self._simulate_path()
+        self.available, self.crossed_steps = self._measure_opportunity()
+
+    # ---- price path and books ------------------------------------------
+
+    def _simulate_path(self):
+        """Pre-compute top-of-book prices for every step of the period"""
+        rng = random.Random(self.seed * 7919 + self.period)
+        fair = self.case['securities'][0]['start_price']
+        offsets = [0.0] * len(self.tickers)
+        path = [[] for _ in self.tickers]
+
+        for _ in range(self.ticks_per_period * STEPS_PER_TICK + 1):
+            fair = max(1.0, fair + rng.gauss(0, VOLATILITY))
+            for i in range(len(self.tickers)):
+                offsets[i] = offsets[i] * DECAY + rng.gauss(0, NOISE)
+                if rng.random() < DISLOCATION_RATE:
+                    offsets[i] += rng.choice((-1, 1)) * rng.uniform(0.03, 0.10)
+                mid = fair + offsets[i]
+                half = rng.choice((0.01, 0.01, 0.02))
+                bid = round(mid - half, 2)
+                ask = round(mid + half, 2)
+                if ask <= bid:
+                    ask = round(bid + 0.01, 2)
+                path[i].append((bid, ask))
+
+        return path
+
+    def _levels(self, index, step):
+        """Build the synthetic book of one ticker at one step (deterministic)"""
+        ticker = self.tickers[index]
+        bid, ask = self.path[index][step]
+        rng = random.Random(((self.seed * 1000003 + self.period) * 1000003 + step) * 16 + index)
+        base = 10**9 + (step * 16 + index) * 2 * BOOK_DEPTH
+
+        def level(i, action, price):
+            return {
+                'order_id': base + i,
+                'period': self.period,
+                'tick': step // STEPS_PER_TICK,
+                'trader_id': 'ANON',
+                'ticker': ticker,
+                'type': 'LIMIT',
+                'quantity': rng.randint(1, 40) * 100,
+                'action': action,
+                'price': price,
+                'quantity_filled': 0,
+                'vwap': None,
+                'status': 'OPEN',
+            }
+
+        bids = [level(i, 'BUY', round(bid - 0.01 * i, 2)) for i in range(BOOK_DEPTH)]
+        asks = [level(BOOK_DEPTH + i, 'SELL', round(ask + 0.01 * i, 2)) for i in range(BOOK_DEPTH)]
+        return {'bids': bids, 'asks': asks}
+
+    def _measure_opportunity(self):
+        """Top-of-book arbitrage on offer this period, counted once per crossing episode"""
+        if len(self.tickers) < 2:
+            return 0.0, 0
+        available = 0.0
+        crossed_steps = 0
+        previous = None
+        for step in range(len(self.path[0])):
+            best_bid = max(range(len(self.tickers)), key=lambda i: self.path[i][step][0])
+            best_ask = min(range(len(self.tickers)), key=lambda i: self.path[i][step][1])
+            crossed = self.path[best_bid][step][0] > self.path[best_ask][step][1]
+            if crossed:
+                crossed_steps += 1
+                if previous != (best_bid, best_ask):
+                    bids = self._levels(best_bid, step)['bids']
+                    asks = self._levels(best_ask, step)['asks']
+                    size = min(bids[0]['quantity'], asks[0]['quantity'],
+                               self.specs[self.tickers[best_ask]]['max_trade_size'])
+                    available += (bids[0]['price'] - asks[0]['price']) * size
+                previous = (best_bid, best_ask)
+            else:
+                previous = None
+        return round(available, 2), crossed_steps
+
+    def _book(self, ticker):
+        """Current synthetic book of a ticker, rebuilt once per step"""
+        if self.book_steps.get(ticker) != self.step:
+            self.books[ticker] = self._levels(self.tickers.index(ticker), self.step)
+            self.book_steps[ticker] = self.step
+            self._match_resting(ticker)
+        return self.books[ticker]
+
+    def _merged_book(self, ticker):
+        """Synthetic book with our own resting LIMIT orders merged in"""
+        book = self._book(ticker)
+        own = [o for o in self.orders.values() if o['ticker'] == ticker and o['status'] == 'OPEN']
+        if not own:
+            return book
+        bids = book['bids'] + [o for o in own if o['action'] == 'BUY']
+        asks = book['asks'] + [o for o in own if o['action'] == 'SELL']
+        bids.sort(key=lambda level: -level['price'])
+        asks.sort(key=lambda level: level['price'])
+        return {'bids': bids, 'asks': asks}
+
+    # ---- execution -----------------------------------------------------
+
+    def _take(self, ticker, action, quantity, limit_price=None):
+        """Walk the opposite side of the synthetic book; return (filled, notional)"""
+        book = self._book(ticker)
+        side = book['asks'] if action == 'BUY' else book['bids']
+        filled = 0
+        notional = 0.0
+        for level in side:
+            if filled >= quantity:
+                break
+            if limit_price is not None:
+                if (action == 'BUY' and level['price'] > limit_price) or (action == 'SELL' and level['price'] < limit_price):
+                    break
+            take = min(level['quantity'] - level['quantity_filled'], quantity - filled)
+            level['quantity_filled'] += take
+            filled += take
+            notional += take * level['price']
+        side[:] = [level for level in side if level['quantity_filled'] < level['quantity']]
+        return filled, notional
+
+    def _match_resting(self, ticker):
+        """Fill our resting LIMIT orders that the freshly built book now crosses"""
+        for order in list(self.orders.values()):
+            if order['ticker'] != ticker or order['status'] != 'OPEN':
+                continue
+            remaining = order['quantity'] - order['quantity_filled']
+            filled, _ = self._take(ticker, order['action'], remaining, order['price'])
+            if filled:
+                # Passive fills happen at our own price and earn the rebate
+                rebate = self.specs[ticker]['limit_order_rebate']
+                self._apply_fill(ticker, order['action'], filled, filled * order['price'], -rebate * filled)
+                self._record_fill(order, filled, filled * order['price'])
+
+    def _record_fill(self, order, filled, notional):
+        total = order['quantity_filled'] + filled
+        previous = (order['vwap'] or 0) * order['quantity_filled']
+        order['vwap'] = round((previous + notional) / total, 4)
+        order['quantity_filled'] = total
+        if total >= order['quantity']:
+            order['status'] = 'TRANSACTED'
+
+    def _apply_fill(self, ticker, action, quantity, notional, fee):
+        """Update position and average-cost P&L for one fill"""
+        price = notional / quantity
+        signed = quantity if action == 'BUY' else -quantity
+        position = self.position[ticker]
+        new_position = position + signed
+
+        if position == 0 or (position > 0) == (signed > 0):
+            self.cost[ticker] = (self.cost[ticker] * abs(position) + price * quantity) / abs(new_position)
+        else:
+            closed = min(quantity, abs(position))
+            direction = 1 if position > 0 else -1
+            self.realized[ticker] += (price - self.cost[ticker]) * closed * direction
+            if new_position == 0:
+                self.cost[ticker] = 0.0
+            elif (new_position > 0) != (position > 0):
+                self.cost[ticker] = price
+
+        self.position[ticker] = new_position
+        self.realized[ticker] -= fee
+        self.volume[ticker] += quantity
+        self.stats['filled_shares'] += quantity
+
+    def _within_limits(self, ticker, signed):
+        if not self.enforce_limits:
+            return True
+        positions = dict(self.position)
+        positions[ticker] += signed
+        gross = sum(abs(p) for p in positions.values())
+        net = sum(positions.values())
+        current_gross = sum(abs(p) for p in self.position.values())
+        current_net = sum(self.position.values())
+        # Orders that reduce exposure are always allowed
+        if gross > self.case['gross_limit'] and gross > current_gross:
+            return False
+        if abs(net) > self.case['net_limit'] and abs(net) > abs(current_net):
+            return False
+        return True
+
+    # ---- endpoints -----------------------------------------------------
+
+    def handle(self, method, path, query, received_ns):
+        """Route one request; returns (status_code, json_body)"""
+        with self.lock:
+            self._sync(time.monotonic())
+            self.stats['requests'][f'{method} {path}'] += 1
+
+            if method == 'GET' and path == '/v1/case':
+                return 200, self._case()
+            if method == 'GET' and path == '/v1/securities':
+                tickers = [query['ticker']] if 'ticker' in query else self.tickers
+                return 200, [self._security(t) for t in tickers if t in self.specs]
+            if method == 'GET' and path == '/v1/securities/book':
+                return self._book_response(query)
+            if method == 'GET' and path == '/v1/limits':
+                return 200, [self._limits()]
+            if method == 'GET' and path == '/v1/orders':
+                status = query.get('status', 'OPEN')
+                return 200, [o for o in self.orders.values() if o['status'] == status]
+            if method == 'POST' and path == '/v1/orders':
+                return self._submit(query, received_ns)
+            if path.startswith('/v1/orders/'):
+                return self._order_by_id(method, path[len('/v1/orders/'):])
+            if method == 'POST' and path == '/v1/commands/cancel':
+                return 200, {'cancelled_order_ids': self._cancel(query)}
+            if method == 'GET' and path == '/_standin/stats':
+                return 200, {'current': self.summary(), 'history': self.history}
+            return 404, {'code': 'NOT_FOUND', 'message': f'No route for {method} {path}'}
+
+    def _case(self):
+        return {
+            'name': self.case['name'],
+            'period': self.period,
+            'tick': self.tick,
+            'ticks_per_period': self.ticks_per_period,
+            'total_periods': self.total_periods,
+            'status': self.status,
+            'is_enforce_trading_limits': self.enforce_limits,
+        }
+
+    def _security(self, ticker):
+        spec = self.specs[ticker]
+        book = self._merged_book(ticker)
+        bid = book['bids'][0]['price'] if book['bids'] else 0
+        ask = book['asks'][0]['price'] if book['asks'] else 0
+        bid_size = sum(l['quantity'] - l['quantity_filled'] for l in book['bids'] if l['price'] == bid)
+        ask_size = sum(l['quantity'] - l['quantity_filled'] for l in book['asks'] if l['price'] == ask)
+        last = self._mark(ticker)
+        return {
+            'ticker': ticker,
+            'type': 'STOCK',
+            'size': 1,
+            'position': self.position[ticker],
+            'vwap': round(self.cost[ticker], 4),
+            'nlv': round(self.position[ticker] * last, 2),
+            'last': last,
+            'bid': bid,
+            'bid_size': bid_size,
+            'ask': ask,
+            'ask_size': ask_size,
+            'volume': self.volume[ticker],
+            'unrealized': round(self._unrealized(ticker), 2),
+            'realized': round(self.realized[ticker], 2),
+            'currency': 'CAD',
+            'total_volume': self.volume[ticker],
+            'is_tradeable': True,
+            'is_shortable': True,
+            'start_price': spec['start_price'],
+            'quoted_decimals': 2,
+            'trading_fee': spec['trading_fee'],
+            'limit_order_rebate': spec['limit_order_rebate'],
+            'min_trade_size': 0,
+            'max_trade_size': spec['max_trade_size'],
+            'api_orders_per_second': ORDER_LIMIT,
+            'execution_delay_ms': 0,
+        }
+
+    def _mark(self, ticker):
+        bid, ask = self.path[self.tickers.index(ticker)][self.step]
+        return round((bid + ask) / 2, 2)
+
+    def _unrealized(self, ticker):
+        return (self._mark(ticker) - self.cost[ticker]) * self.position[ticker]
+
+    def _limits(self):
+        return {
+            'name': 'LIMIT-STOCK',
+            'gross': sum(abs(p) for p in self.position.values()),
+            'net': sum(self.position.values()),
+            'gross_limit': self.case['gross_limit'],
+            'net_limit': self.case['net_limit'],
+            'gross_fine': 0,
+            'net_fine': 0,
+        }
+
+    def _book_response(self, query):
+        ticker = query.get('ticker')
+        if ticker not in self.specs:
+            return 400, {'code': 'INVALID_TICKER', 'message': f'Unknown ticker {ticker}'}
+        limit = int(query.get('limit', 20))
+        book = self._merged_book(ticker)
+        return 200, {'bids': book['bids'][:limit], 'asks': book['asks'][:limit]}
+
+    def _submit(self, query, received_ns):
+        now = time.monotonic()
+        while self.order_times and now - self.order_times[0] >= 1.0:
+            self.order_times.popleft()
+        if len(self.order_times) >= ORDER_LIMIT:
+            self.stats['rate_limited'] += 1
+            wait = round(1.0 - (now - self.order_times[0]), 3)
+            return 429, {'code': 'TOO_MANY_REQUESTS', 'message': 'API order rate limit exceeded', 'wait': wait}
+        self.order_times.append(now)
+
+        ticker = query.get('ticker')
+        order_type = query.get('type', 'MARKET')
+        action = query.get('action')
+        try:
+            quantity = int(float(query.get('quantity', 0)))
+            price = float(query['price']) if 'price' in query else None
+        except ValueError:
+            return self._reject('INVALID_ARGUMENT', 'quantity and price must be numeric')
+
+        if ticker not in self.specs:
+            return self._reject('INVALID_TICKER', f'Unknown ticker {ticker}')
+        if action not in ('BUY', 'SELL') or order_type not in ('MARKET', 'LIMIT'):
+            return self._reject('INVALID_ARGUMENT', 'action must be BUY/SELL and type MARKET/LIMIT')
+        if quantity <= 0 or quantity > self.specs[ticker]['max_trade_size']:
+            return self._reject('INVALID_QUANTITY', f'quantity must be 1..{self.specs[ticker]["max_trade_size"]}')
+        if order_type == 'LIMIT' and price is None:
+            return self._reject('INVALID_ARGUMENT', 'LIMIT orders need a price')
+        if self.status != 'ACTIVE':
+            return self._reject('CASE_NOT_ACTIVE', 'The case is not running')
+        if not self._within_limits(ticker, quantity if action == 'BUY' else -quantity):
+            return self._reject('TRADING_LIMIT', 'Order would exceed the trading limits')
+
+        if self.last_quote_ns:
+            self.stats['quote_to_order_ns'].append(received_ns - self.last_quote_ns)
+        self.stats['orders'] += 1
+
+        order = {
+            'order_id': self.next_order_id,
+            'period': self.period,
+            'tick': self.tick,
+            'trader_id': TRADER_ID,
+            'ticker': ticker,
+            'type': order_type,
+            'quantity': quantity,
+            'action': action,
+            'price': price,
+            'quantity_filled': 0,
+            'vwap': None,
+            'status': 'OPEN',
+        }
+        self.next_order_id += 1
+
+        filled, notional = self._take(ticker, action, quantity, price if order_type == 'LIMIT' else None)
+        if filled:
+            self._apply_fill(ticker, action, filled, notional, self.specs[ticker]['trading_fee'] * filled)
+            self._record_fill(order, filled, notional)
+        if order_type == 'MARKET':
+            # Market orders never rest; whatever the book could not fill is dropped
+            order['status'] = 'TRANSACTED'
+        self.orders[order['order_id']] = order
+        return 200, order
+
+    def _reject(self, code, message):
+        self.stats['rejected'] += 1
+        return 400, {'code': code, 'message': message}
+
+    def _order_by_id(self, method, order_id):
+        try:
+            order = self.orders.get(int(order_id))
+        except ValueError:
+            order = None
+        if order is None:
+            return 404, {'code': 'NOT_FOUND', 'message': f'Order {order_id} not found'}
+        if method == 'GET':
+            return 200, order
+        if method == 'DELETE':
+            if order['status'] != 'OPEN':
+                return 200, {'success': False}
+            order['status'] = 'CANCELLED'
+            return 200, {'success': True}
+        return 405, {'code': 'METHOD_NOT_ALLOWED', 'message': method}
+
+    def _cancel(self, query):
+        """Bulk cancel by all=1, ticker=... or ids=1,2,3"""
+        ids = {int(i) for i in query['ids'].split(',')} if query.get('ids') else None
+        cancelled = []
+        for order in self.orders.values():
+            if order['status'] != 'OPEN':
+                continue
+            if query.get('all') in ('1', 'true') or query.get('ticker') == order['ticker'] or (ids and order['order_id'] in ids):
+                order['status'] = 'CANCELLED'
+                cancelled.append(order['order_id'])
+        return cancelled
+
+    def note_quote_sent(self):
+        """Called by the handler right after a quote response hits the socket"""
+        self.last_quote_ns = time.perf_counter_ns()
+
+    # ---- reporting -----------------------------------------------------
+
+    def summary(self):
+        """Statistics for the current period (caller should hold the lock)"""
+        realized = sum(self.realized.values())
+        unrealized = sum(self._unrealized(t) for t in self.tickers)
+        latency = percentiles(self.stats['quote_to_order_ns'])
+        return {
+            'period': self.period,
+            'status': self.status,
+            'tick': self.tick,
+            'orders': self.stats['orders'],
+            'filled_shares': self.stats['filled_shares'],
+            'rejected': self.stats['rejected'],
+            'rate_limited': self.stats['rate_limited'],
+            'requests': dict(self.stats['requests']),
+            'quote_to_order_ms': {k: round(v / 1e6, 3) for k, v in latency.items()},
+            'positions': dict(self.position),
+            'realized': round(realized, 2),
+            'unrealized': round(unrealized, 2),
+            'pnl': round(realized + unrealized, 2),
+            'available': self.available,
+            'crossed_steps': self.crossed_steps,
+        }
+
+    def snapshot(self):
+        """Thread-safe summary for callers outside the request path"""
+        with self.lock:
+            self._sync(time.monotonic())
+            return self.summary()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real client
+    disable_nagle_algorithm = True
+    server_version = 'RIT-StandIn'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        received_ns = time.perf_counter_ns()
+        market = self.server.market
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+
+        if market.api_key and self.headers.get('X-API-Key') != market.api_key:
+            status, body = 401, {'code': 'UNAUTHORIZED', 'message': 'API key mismatch'}
+        else:
+            status, body = market.handle(method, url.path, query, received_ns)
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if status == 429:
+            self.send_header('Retry-After', str(body['wait']))
+        self.end_headers()
+        self.wfile.write(payload)
+
+        if status == 200 and url.path in QUOTE_PATHS:
+            market.note_quote_sent()
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+    def handle_error(self, request, client_address):
+        # Bots dropping their keep-alive connections on exit is not an error
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+
+class StandInServer:
+    """Runs a Market behind a threaded HTTP server, in the background or the foreground"""
+
+    def __init__(self, port, host='127.0.0.1', **market_options):
+        self.market = Market(**market_options)
+        self.httpd = _HTTPServer((host, port), _Handler)
+        self.httpd.market = self.market
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def serve_forever(self):
+        try:
+            self.httpd.serve_forever()
+        finally:
+            self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the RIT REST API')
+    parser.add_argument('--port', type=int, default=10010)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--case', default='ALGO1', choices=sorted(CASES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--speed', type=float, default=1.0, help='ticks per second')
+    parser.add_argument('--ticks', type=int, default=None, help='ticks per period (default from the case)')
+    parser.add_argument('--periods', type=int, default=1)
+    parser.add_argument('--warmup', type=float, default=1.0, help='seconds STOPPED before the first period')
+    parser.add_argument('--pause', type=float, default=2.0, help='seconds STOPPED between periods')
+    parser.add_argument('--api-key', default=None, help='reject requests without this X-API-Key')
+    parser.add_argument('--no-limits', action='store_true', help='do not enforce gross/net limits')
+    args = parser.parse_args()
+
+    server = StandInServer(
+        args.port, args.host, case=CASES[args.case], seed=args.seed, speed=args.speed,
+        warmup=args.warmup, total_periods=args.periods, pause=args.pause,
+        ticks_per_period=args.ticks, api_key=args.api_key, enforce_limits=not args.no_limits,
+    )
+    print(f"RIT stand-in ({args.case}) on http://{args.host}:{args.port}/v1 - Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.market.snapshot(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Grid search over the Algo1 arbitrage parameters on recorded tapes.
+
+Every combination of minimum spread (MIN_PRICE_DIFFERENCE), MAX_ORDER_SIZE,
+limit-check cadence (check_ctr >= 50) and sizing (top of book as main6g,
+depth/VWAP as main4) is replayed with rit.backtest over every period of every
+tape. Crossed-book signals are found for all snapshots at once with NumPy
+(rit.backtest.signals) and cached per spread, so each grid point only walks
+the handful of snapshots that could trade. Grid points run across a process
+pool; each worker loads the tapes once.
+
+    python -m rit.sweep tapes/run1 tapes/run2
+    python -m rit.sweep tapes/* --min-spread 0 0.01 0.02 --max-order-size 5000 10000 --csv sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from rit.backtest import MAX_ORDER_SIZE, load_periods, run, signals
+
+FIELDS = ('min_spread', 'max_order_size', 'limit_check_every', 'sizing')
+
+_periods = []
+_signals = {}
+
+
+def _load(tapes):
+    """Process-pool initializer: read every tape once per worker"""
+    global _periods
+    _periods = [period for directory in tapes for period in load_periods(directory)]
+
+
+def _evaluate(point):
+    """Totals over all loaded periods for one grid point"""
+    params, options = point
+    totals = {'pnl': 0.0, 'orders': 0, 'rejected': 0, 'trades': 0, 'requested': 0, 'filled': 0,
+              'unhedged': 0, 'periods': len(_periods)}
+    for n, period in enumerate(_periods):
+        key = (n, params['min_spread'])
+        indices = _signals.get(key)
+        if indices is None:
+            indices = _signals[key] = signals(period, params['min_spread'])
+        result = run(period, indices=indices, **params, **options)
+        for name in ('pnl', 'orders', 'rejected', 'trades', 'requested', 'filled', 'unhedged'):
+            totals[name] += result[name]
+    totals['pnl'] = round(totals['pnl'], 2)
+    totals['fill_rate'] = totals['filled'] / totals['requested'] if totals['requested'] else 0.0
+    return params, totals
+
+
+def sweep(tapes, grid, workers=None, **options):
+    """[(params, totals), ...] for every combination in grid, best P&L first"""
+    points = [(dict(zip(grid, values)), options) for values in itertools.product(*grid.values())]
+    if workers == 1:
+        _load(tapes)
+        results = [_evaluate(point) for point in points]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_load, initargs=(tapes,)) as pool:
+            chunk = max(1, len(points) // ((workers or os.cpu_count() or 1) * 4))
+            results = list(pool.map(_evaluate, points, chunksize=chunk))
+    results.sort(key=lambda item: item[1]['pnl'], reverse=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rank Algo1 arbitrage parameters on recorded tapes')
+    parser.add_argument('tapes', nargs='+', help='tape directories (python -m rit.tape record)')
+    parser.add_argument('--min-spread', type=float, nargs='+', default=[0.0, 0.01, 0.02, 0.03])
+    parser.add_argument('--max-order-size', type=int, nargs='+', default=[2500, 5000, 7500, MAX_ORDER_SIZE])
+    parser.add_argument('--limit-check-every', type=int, nargs='+', default=[0, 10, 50, 200])
+    parser.add_argument('--sizing', nargs='+', choices=('top', 'depth'), default=['top', 'depth'])
+    parser.add_argument('--latency-ms', type=float, default=1.0)
+    parser.add_argument('--leg-gap-ms', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: one per CPU)')
+    parser.add_argument('--top', type=int, default=20, help='rows to print')
+    parser.add_argument('--csv', default=None, help='also write every row to this file')
+    args = parser.parse_args()
+
+    grid = {
+        'min_spread': args.min_spread,
+        'max_order_size': args.max_order_size,
+        'limit_check_every': args.limit_check_every,
+        'sizing': args.sizing,
+    }
+    start = time.perf_counter()
+    results = sweep(args.tapes, grid, workers=args.workers, latency_ms=args.latency_ms, leg_gap_ms=args.leg_gap_ms)
+    elapsed = time.perf_counter() - start
+
+    periods = results[0][1]['periods'] if results else 0
+    print(f"{len(results)} grid points x {periods} periods in {elapsed:.1f} s\n")
+    print(f"{'#':>3}{'spread':>8}{'max size':>10}{'check':>7}{'sizing':>8}{'P&L':>12}{'fill %':>8}"
+          f"{'orders':>8}{'rej':>6}{'unhedged':>10}")
+    for rank, (params, totals) in enumerate(results[:args.top], 1):
+        print(f"{rank:>3}{params['min_spread']:>8.2f}{params['max_order_size']:>10}{params['limit_check_every']:>7}"
+              f"{params['sizing']:>8}{totals['pnl']:>12.2f}{totals['fill_rate'] * 100:>7.1f}%"
+              f"{totals['orders']:>8}{totals['rejected']:>6}{totals['unhedged']:>10.0f}")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS + ('pnl', 'fill_rate', 'orders', 'rejected', 'trades', 'unhedged'))
+            for params, totals in results:
+                writer.writerow([params[name] for name in FIELDS] + [
+                    totals['pnl'], round(totals['fill_rate'], 4), totals['orders'], totals['rejected'],
+                    totals['trades'], totals['unhedged']])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Tick tape: every /case, /securities and /securities/book response a bot sees,
+written to disk with its receive time so sessions can be replayed offline.
+
+A tape is a directory with one append-only file per endpoint. Each file is a
+16-byte header followed by fixed-width little-endian records, so it can be
+memory-mapped straight into a NumPy structured array (load()) or walked with
+struct.iter_unpack (records()) without parsing anything. Every response gets
+a sequence number shared by the three files; all levels of one book response
+carry the same one. Buffered records go to disk at least every
+FLUSH_INTERVAL seconds, so a bot that crashes or is killed loses at most that
+much of its tape.
+
+    case.bin        recv_ns, seq, tick, period, status
+    securities.bin  recv_ns, seq, ticker, bid, ask, bid_size, ask_size, last,
+                    position, realized, unrealized
+    book.bin        recv_ns, seq, ticker, side (0 bid, 1 ask), level, price,
+                    remaining (quantity - quantity_filled)
+
+Recording alongside a bot:
+
+    client = RitClient(Port, API_KEY, recorder=TapeRecorder('tapes/run1'))
+
+or as its own process (separate requests, so it never touches the order rate):
+
+    python -m rit.tape record --port 10001 --out tapes/run1
+    python -m rit.tape info tapes/run1
+"""
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # only load() needs NumPy
+    np = None
+
+MAGIC = b'RITTAPE1'
+HEADER = struct.Struct('<8sII')  # magic, record size, reserved
+
+STATUSES = ('STOPPED', 'ACTIVE', 'PAUSED')
+STATUS_CODES = {name: code for code, name in enumerate(STATUSES)}
+UNKNOWN_STATUS = 255
+
+BID = 0
+ASK = 1
+
+TICKER_BYTES = 8      # width of the ticker field; longer tickers are refused, not cut
+FLUSH_INTERVAL = 1.0  # seconds between flushes to disk (about one tick at normal speed)
+
+CASE = struct.Struct('<qqiiB7x')
+SECURITY = struct.Struct('<qq8sdddddddd')
+LEVEL = struct.Struct('<qq8sBxH4xdd')
+
+STREAMS = {
+    'case': (CASE, ['recv_ns', 'seq', 'tick', 'period', 'status']),
+    'securities': (SECURITY, ['recv_ns', 'seq', 'ticker', 'bid', 'ask', 'bid_size', 'ask_size', 'last',
+                              'position', 'realized', 'unrealized']),
+    'book': (LEVEL, ['recv_ns', 'seq', 'ticker', 'side', 'level', 'price', 'remaining']),
+}
+
+if np is not None:
+    DTYPES = {
+        'case': np.dtype([('recv_ns', '<i8'), ('seq', '<i8'), ('tick', '<i4'), ('period', '<i4'),
+                          ('status', 'u1'), ('_pad', 'V7')]),
+        'securities': np.dtype([('recv_ns', '<i8'), ('seq', '<i8'), ('ticker', 'S8'), ('bid', '<f8'),
+                                ('ask', '<f8'), ('bid_size', '<f8'), ('ask_size', '<f8'), ('last', '<f8'),
+                                ('position', '<f8'), ('realized', '<f8'), ('unrealized', '<f8')]),
+        'book': np.dtype([('recv_ns', '<i8'), ('seq', '<i8'), ('ticker', 'S8'), ('side', 'u1'), ('_pad', 'V1'),
+                          ('level', '<u2'), ('_pad2', 'V4'), ('price', '<f8'), ('remaining', '<f8')]),
+    }
+else:
+    DTYPES = {}
+
+
+def _open(path, record):
+    """Open a stream for appending, writing or checking its header"""
+    f = open(path, 'ab', buffering=1 << 20)
+    if f.tell() == 0:
+        f.write(HEADER.pack(MAGIC, record.size, 0))
+    else:
+        with open(path, 'rb') as existing:
+            magic, size, _ = HEADER.unpack(existing.read(HEADER.size))
+        if magic != MAGIC or size != record.size:
+            f.close()
+            raise ValueError(f'{path} is not a tape stream with {record.size}-byte records')
+    return f
+
+
+def _ticker(ticker):
+    """Ticker encoded for the fixed-width field; ValueError if it does not fit"""
+    name = ticker.encode()
+    if len(name) > TICKER_BYTES:
+        raise ValueError(f'ticker {ticker!r} is longer than the {TICKER_BYTES}-byte tape field')
+    return name
+
+
+class TapeRecorder:
+    """Appends API responses to a tape directory; safe to share between threads"""
+
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flushed = time.monotonic()
+        self.files = {name: _open(os.path.join(directory, f'{name}.bin'), record)
+                      for name, (record, _) in STREAMS.items()}
+        self.seq = 0
+        self.lock = threading.Lock()
+        self.counts = {name: 0 for name in STREAMS}
+
+    def case(self, case, recv_ns=None):
+        recv_ns = recv_ns or time.time_ns()
+        with self.lock:
+            self.seq += 1
+            self.files['case'].write(CASE.pack(
+                recv_ns, self.seq, case['tick'], case['period'],
+                STATUS_CODES.get(case['status'], UNKNOWN_STATUS)))
+            self.counts['case'] += 1
+            self._maybe_flush()
+
+    def securities(self, securities, recv_ns=None):
+        recv_ns = recv_ns or time.time_ns()
+        names = [_ticker(s['ticker']) for s in securities]
+        with self.lock:
+            self.seq += 1
+            pack = SECURITY.pack
+            self.files['securities'].write(b''.join(
+                pack(recv_ns, self.seq, name, s['bid'], s['ask'], s['bid_size'], s['ask_size'],
+                     s.get('last') or 0, s.get('position') or 0, s.get('realized') or 0, s.get('unrealized') or 0)
+                for name, s in zip(names, securities)))
+            self.counts['securities'] += len(securities)
+            self._maybe_flush()
+
+    def book(self, ticker, book, recv_ns=None):
+        recv_ns = recv_ns or time.time_ns()
+        name = _ticker(ticker)
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+            pack = LEVEL.pack
+            rows = [pack(recv_ns, seq, name, BID, i, l['price'], l['quantity'] - l['quantity_filled'])
+                    for i, l in enumerate(book.get('bids') or ())]
+            rows += [pack(recv_ns, seq, name, ASK, i, l['price'], l['quantity'] - l['quantity_filled'])
+                     for i, l in enumerate(book.get('asks') or ())]
+            self.files['book'].write(b''.join(rows))
+            self.counts['book'] += len(rows)
+            self._maybe_flush()
+
+    def _maybe_flush(self):
+        """Flush every stream once flush_interval has passed since the last flush (lock held)"""
+        now = time.monotonic()
+        if now - self.flushed >= self.flush_interval:
+            for f in self.files.values():
+                f.flush()
+            self.flushed = now
+
+    def flush(self):
+        with self.lock:
+            for f in self.files.values():
+                f.flush()
+            self.flushed = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ---- reading ---------------------------------------------------------
+
+def records(path):
+    """Yield the records of one stream file as tuples (tickers decoded)"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    record, fields = STREAMS[name]
+    ticker_at = fields.index('ticker') if 'ticker' in fields else None
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            usable = (len(m) - HEADER.size) // record.size * record.size
+            for row in record.iter_unpack(memoryview(m)[HEADER.size:HEADER.size + usable]):
+                if ticker_at is not None:
+                    row = row[:ticker_at] + (row[ticker_at].rstrip(b'\0').decode(),) + row[ticker_at + 1:]
+                yield row
+
+
+def load(directory):
+    """{'case': array, 'securities': array, 'book': array} memory-mapped with NumPy"""
+    if np is None:
+        raise ImportError('rit.tape.load needs NumPy; use records() without it')
+    tape = {}
+    for name in STREAMS:
+        path = os.path.join(directory, f'{name}.bin')
+        dtype = DTYPES[name]
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = max(0, size - HEADER.size) // dtype.itemsize
+        if count:
+            tape[name] = np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size, shape=(count,))
+        else:
+            tape[name] = np.zeros(0, dtype=dtype)
+    return tape
+
+
+# ---- command line ----------------------------------------------------
+
+def record(args):
+    """Poll case, securities and books and write them until Ctrl+C"""
+    from rit.client import RitClient
+
+    recorder = TapeRecorder(args.out)
+    client = RitClient(args.port, {'X-API-Key': args.api_key}, host=args.host, recorder=recorder)
+    print(f"Recording to {args.out} - Ctrl+C to stop")
+    polls = 0
+    try:
+        while True:
+            client.case()
+            securities = client.securities()
+            tickers = args.tickers or [s['ticker'] for s in securities]
+            for ticker in tickers:
+                client.book(ticker, args.depth)
+            polls += 1
+            if args.interval:
+                time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+        recorder.close()
+    print(f"{polls} polls: {recorder.counts}")
+
+
+def info(args):
+    for name, (record, _) in STREAMS.items():
+        path = os.path.join(args.tape, f'{name}.bin')
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        count = max(0, size - HEADER.size) // record.size
+        if not count:
+            print(f"{name:<11} empty")
+            continue
+        with open(path, 'rb') as f:
+            f.seek(HEADER.size)
+            first = record.unpack(f.read(record.size))[0]
+            f.seek(HEADER.size + (count - 1) * record.size)
+            last = record.unpack(f.read(record.size))[0]
+        print(f"{name:<11}{count:>10} records  {record.size:>3} bytes each  {(last - first) / 1e9:8.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record or inspect RIT tick tapes')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    rec = commands.add_parser('record', help='poll the API and write a tape')
+    rec.add_argument('--port', type=int, default=10001)
+    rec.add_argument('--host', default='localhost')
+    rec.add_argument('--api-key', default='HCYA2KPW')
+    rec.add_argument('--out', required=True, help='tape directory')
+    rec.add_argument('--tickers', nargs='*', default=None, help='books to record (default: every security)')
+    rec.add_argument('--depth', type=int, default=20, help='book levels per side')
+    rec.add_argument('--interval', type=float, default=0.0, help='seconds between polls')
+    rec.set_defaults(run=record)
+
+    show = commands.add_parser('info', help='summarize a tape')
+    show.add_argument('tape')
+    show.set_defaults(run=info)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Raw-socket order entry for the RIT REST API.
+
+Every order through requests builds a PreparedRequest, url-encodes the
+query, merges session headers and runs hooks before a byte is sent, then
+parses every response header into a case-insensitive dict. OrderWire keeps
+its own keep-alive sockets (TCP_NODELAY) to the RIT client instead. The
+bytes of POST /v1/orders for each (ticker, action, type) are built once and
+only the quantity (and price) are spliced in per order. Of the response,
+only the status line, the framing header and the body are read.
+
+    wire = OrderWire(10010, {'X-API-Key': 'HCYA2KPW'})
+    resp = wire.post_order('CRZY_M', 'BUY', 10000)
+    resp.status_code, decode.order(resp.content)
+
+RitClient(..., raw_orders=True) sends post_order() through an OrderWire and
+keeps everything else on requests. benchmarks/bench_wire.py compares the
+two on the stand-in market.
+"""
+import select
+import socket
+import threading
+
+from rit import decode
+
+POOL_SIZE = 10      # keep-alive sockets kept open to the RIT client
+RECV_SIZE = 65536
+
+
+class WireResponse:
+    """The parts of a requests.Response the order paths read"""
+
+    __slots__ = ('status_code', 'content')
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return decode.loads(self.content)
+
+
+class SendFailed(OSError):
+    """The request could not be written, so the server never saw all of it"""
+
+
+def header_lines(host, port, headers):
+    """Host plus the fixed headers, as they follow a request line"""
+    fixed = ''.join(f'{name}: {value}\r\n' for name, value in headers.items())
+    return f'Host: {host}:{port}\r\n{fixed}'.encode()
+
+
+class Connection:
+    """One keep-alive socket plus whatever it has read past the last response"""
+
+    __slots__ = ('sock', 'pending', 'reused')
+
+    def __init__(self, address, timeout):
+        self.sock = socket.create_connection(address, timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.pending = b''
+        self.reused = False
+
+    def _recv(self):
+        data = self.sock.recv(RECV_SIZE)
+        if not data:
+            raise ConnectionError('RIT client closed the connection')
+        return data
+
+    def dropped(self):
+        """True if an idle socket is readable: the server closed it (or sent something unasked)"""
+        try:
+            return bool(select.select([self.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def exchange(self, request):
+        """Send one request; (status, body, keep_alive) of its response
+
+        Raises SendFailed if the request could not be written; any error after
+        that leaves it unknown whether the server acted on the request.
+        """
+        try:
+            self.sock.sendall(request)
+        except socket.timeout:
+            raise
+        except OSError as e:
+            raise SendFailed(*e.args) from e
+        data = self.pending
+        end = data.find(b'\r\n\r\n')
+        while end < 0:
+            data += self._recv()
+            end = data.find(b'\r\n\r\n')
+        head = data[:end].lower()
+        data = data[end + 4:]
+        status = int(head[9:12])
+
+        start = head.find(b'\r\ncontent-length:')
+        if start >= 0:
+            stop = head.find(b'\r\n', start + 2)
+            length = int(head[start + 17:stop if stop >= 0 else None])
+            while len(data) < length:
+                data += self._recv()
+            body, self.pending = data[:length], data[length:]
+        elif b'\r\ntransfer-encoding: chunked' in head:
+            body, self.pending = self._chunked(data)
+        elif status == 204 or status == 304 or status < 200:
+            body, self.pending = b'', data
+        else:
+            # No framing: the body runs until the server closes
+            chunks = [data]
+            while True:
+                chunk = self.sock.recv(RECV_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            return status, b''.join(chunks), False
+        return status, body, b'\r\nconnection: close' not in head
+
+    def _chunked(self, data):
+        body = []
+        while True:
+            end = data.find(b'\r\n')
+            while end < 0:
+                data += self._recv()
+                end = data.find(b'\r\n')
+            size = int(data[:end].split(b';')[0], 16)
+            while len(data) < end + size + 4:
+                data += self._recv()
+            body.append(data[end + 2:end + 2 + size])
+            data = data[end + size + 4:]
+            if size == 0:
+                return b''.join(body), data
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class OrderWire:
+    """Pre-serialized POST /v1/orders over a small pool of raw keep-alive sockets"""
+
+    def __init__(self, port, headers, host='localhost', pool_size=POOL_SIZE, timeout=None):
+        self.address = (host, port)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle = []
+        self._lock = threading.Lock()
+
+        self._tail = b' HTTP/1.1\r\n' + header_lines(host, port, headers) + b'Content-Length: 0\r\n\r\n'
+        self._heads = {}
+
+        # Statistics
+        self.sent = 0
+        self.reconnects = 0
+
+    def _head(self, ticker, action, order_type):
+        """Request line up to 'quantity=' for one (ticker, action, type), built once"""
+        key = (ticker, action, order_type)
+        head = self._heads.get(key)
+        if head is None:
+            head = self._heads[key] = (
+                f'POST /v1/orders?ticker={ticker}&type={order_type}&action={action}&quantity=').encode()
+        return head
+
+    def request_bytes(self, ticker, action, quantity, order_type='MARKET', price=None):
+        """The full request for one order, as it goes on the wire"""
+        head = self._head(ticker, action, order_type)
+        if price is None:
+            return head + str(quantity).encode() + self._tail
+        return head + str(quantity).encode() + b'&price=' + str(price).encode() + self._tail
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn = self._idle.pop()
+            if not conn.dropped():
+                return conn
+            # Closed by the server while idle; never written to, so just replace it
+            conn.close()
+            self.reconnects += 1
+        return Connection(self.address, self.timeout)
+
+    def _checkin(self, conn):
+        conn.reused = True
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def send(self, request):
+        """Send raw request bytes and return a WireResponse"""
+        conn = self._checkout()
+        try:
+            status, body, keep_alive = conn.exchange(request)
+        except SendFailed:
+            conn.close()
+            if not conn.reused:
+                raise
+            # A reused socket refused the write, so the order never reached the
+            # server; one fresh try
+            self.reconnects += 1
+            conn = Connection(self.address, self.timeout)
+            try:
+                status, body, keep_alive = conn.exchange(request)
+            except OSError:
+                conn.close()
+                raise
+        except OSError:
+            conn.close()
+            raise  # the order may have gone through (timeout, reset mid-response); never resend it
+        self.sent += 1
+        if keep_alive:
+            self._checkin(conn)
+        else:
+            conn.close()
+        return WireResponse(status, body)
+
+    def post_order(self, ticker, action, quantity, order_type='MARKET', price=None):
+        """Submit an order and return the raw response (the caller handles 429s)"""
+        return self.send(self.request_bytes(ticker, action, quantity, order_type, price))
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
@@ -1,18 +1,22 @@
 # V2
 
 import os
-import functools
-import operator
+import sys
 import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep
 import signal
-import requests
 import keyboard
 
-Port = 65535
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Programming'))
+from rit.book import BookCache
+from rit.client import ApiException, RitClient
+from rit.clock import CaseClock
+from rit.liquidate import liquidate
+from rit.ratelimit import TokenBucket
 
-class ApiException(Exception):
-    pass
+Port = 65535
 
 # this signal handler allows for a graceful shutdown when CTRL+C is pressed
 def signal_handler(signum, frame):
@@ -24,36 +28,27 @@ def signal_handler(signum, frame):
 API_KEY = {'X-API-Key': 'L365SOJK'}
 shutdown = False
 
+# seconds to let an accepted tender's position land before unwinding it
+UNWIND_DELAY = 1
+
+# one processed book per ticker per cycle, shared by every helper below
+book_cache = BookCache(ttl=0.1)
+
+# largest order the case accepts per ticker, and the API's 10 orders/second
+MAX_TRADE_SIZE = {'CRZY': 25000, 'TAME': 10000}
+order_limiter = TokenBucket(10)
+
 # this helper method returns the current 'tick' of the running case
 def get_tick(session):
-    resp = session.get(f'http://localhost:{Port}/v1/case')
-    if resp.status_code == 401:
-        raise ApiException('The API key provided in this Python code must match that in the RIT client (please refer to the API hyperlink in the client toolbar and/or the RIT â€“ User Guide â€“ REST API Documentation.pdf)')
-    case = resp.json()
-    return case['tick']
+    return session.case()['tick']
 
 # this helper method builds the depth view for two tickers
 def depth_view(session):
-    crzy_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=CRZY')
-    tame_resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=TAME')
-    if crzy_resp.status_code == 401 or tame_resp.status_code == 401:
-        raise ApiException('The API key provided in this Python code must match that in the RIT client (please refer to the API hyperlink in the client toolbar and/or the RIT â€“ User Guide â€“ REST API Documentation.pdf)')
-    crzy_book = crzy_resp.json()
-    tame_book = tame_resp.json()
-    calculate_cumulatives(crzy_book['bids'])
-    calculate_cumulatives(crzy_book['asks'])
-    calculate_cumulatives(tame_book['bids'])
-    calculate_cumulatives(tame_book['asks'])
+    crzy_book = get_order_book(session, 'CRZY')
+    tame_book = get_order_book(session, 'TAME')
     combined = itertools.zip_longest(crzy_book['bids'], crzy_book['asks'], tame_book['bids'], tame_book['asks'], fillvalue={'cumulative_vwap': 0, 'cumulative_vol': 0, 'price': 0})
     return combined
 
-# this helper method calculates cumulative volumes and VWAPs for each level of an order book
-def calculate_cumulatives(book):
-    for level in book:
-        slice = book[:book.index(level) + 1]
-        level['cumulative_vol'] = int(sum(s['quantity'] - s['quantity_filled'] for s in slice))
-        level['cumulative_vwap'] = sum(functools.reduce(operator.mul, data) for data in zip((s['quantity'] - s['quantity_filled'] for s in slice), (s['price'] for s in slice))) / level['cumulative_vol']
-
 # this helper method prints two order books to the screen
 def print_books(combined):
     os.system('cls')
@@ -65,11 +60,7 @@ def print_books(combined):
     sleep(0.5)
 
 def get_tenders(session):
-    resp = session.get(f'http://localhost:{Port}/v1/tenders')
-    if resp.status_code == 401:
-        raise ApiException('The API key provided in this Python code must match that in the RIT client (please refer to the API hyperlink in the client toolbar and/or the RIT â€“ User Guide â€“ REST API Documentation.pdf)')
-    tenders = resp.json()
-    return tenders
+    return session.tenders()
 
 # def place_order(session, tender):
 
@@ -120,14 +111,10 @@ def get_tenders(session):
 #             decline_tender(session, tender_id)
 
 
-def get_order_book(session, ticker):
-    resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker={ticker}')
-    if resp.status_code == 401:
-        raise ApiException('Invalid API key')
-    book = resp.json()
-    calculate_cumulatives(book['bids'])
-    calculate_cumulatives(book['asks'])
-    return book
+def get_order_book(session, ticker, tick=None):
+    # cumulatives plus book['depth'] (price/quantity arrays with running totals for
+    # check_liquidity), fetched and built at most once per cycle and shared
+    return book_cache.get(session, ticker, tick)
 
 
 
@@ -158,39 +145,97 @@ def get_order_book(session, ticker):
 #         decline_tender(session, tender_id, tender_price, tender_quantity, tender_type, ticker)
 
 
-def evaluate_tender(session, tender):
-    ticker = tender['ticker']
-    tender_id = tender['tender_id']
-    tender_type = tender['action']  # BUY or SELL
-    tender_price = tender['price']
-    tender_quantity = tender['quantity']
-    expires = tender['expires']  # This gives us the number of ticks left until the tender expires
+def evaluate_tender(session, tender, order_book):
+    """One look at a tender against this cycle's book; True if it was accepted"""
+    ticker = tender.ticker
+    tender_id = tender.tender_id
+    tender_type = tender.action  # BUY or SELL
+    tender_price = tender.price
+    tender_quantity = tender.quantity
 
-    # Loop until the tender expires
-    while get_tick(session) < expires:
-        # Get the current price and order book of the ticker
-        current_price = get_current_price(session, ticker)
-        order_book = get_order_book(session, ticker)
-        
-        # Print tender details and current price for debugging
-        print(f"Tender Details: {tender}")
-        print(f"Current Price: {current_price}")
-        
-        # Check if liquidity is favorable to accept the tender
-        if check_liquidity(order_book, tender_quantity, tender_type, tender_price):
-            # Accept the tender as soon as it's profitable
-            accept_tender(session, tender_id, tender_price, tender_quantity, tender_type, ticker)
-            sleep(1)
-            # Zero out the tender position
-            zero_out_tender(session, ticker)
-            return  # Exit the function after accepting the tender
-        
-        # Wait for 1 second before rechecking the market conditions
-        # sleep(1)
-    
-    # If the current tick reaches the tender expiration and the tender hasn't been accepted, decline it
-    print("Tender expired")
-    # decline_tender(session, tender_id, tender_price, tender_quantity, tender_type, ticker)
+    # Accept the tender as soon as liquidity makes it profitable
+    if check_liquidity(order_book, tender_quantity, tender_type, tender_price):
+        return accept_tender(session, tender_id, tender_price, tender_quantity, tender_type, ticker)
+    return False
+
+
+class TenderScheduler:
+    """Keeps every live tender and re-evaluates all of them each cycle
+
+    Each cycle reads /tenders once and fetches one book per ticker that has a
+    live tender (in parallel); every tender on that ticker is judged against
+    the same snapshot. Accepted tenders are unwound on a thread per ticker so
+    the loop goes straight back to the other tenders and the keypresses.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self.live = {}       # tender_id -> tender still being watched
+        self.done = set()    # tender ids accepted or expired
+        self.unwinding = {}  # ticker -> thread running zero_out_tender
+        self.pending = {}    # ticker -> delay of an unwind asked for but not started yet
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def cycle(self, tick):
+        """Refresh the live tenders and decide on each; returns how many are still live"""
+        current = {}
+        for tender in get_tenders(self.session):
+            tender_id = tender.tender_id
+            if tender_id in self.done:
+                continue
+            if tender_id not in self.live:
+                print(f"Tender Details: {tender}")
+            current[tender_id] = tender
+        # Tenders missing from /tenders expired or were taken elsewhere
+        for tender_id in self.live.keys() - current.keys():
+            print(f"Tender {tender_id} is gone")
+            self.done.add(tender_id)
+        self.live = current
+        if not current:
+            return 0
+
+        tickers = sorted({tender.ticker for tender in current.values()})
+        books = dict(zip(tickers, self.executor.map(lambda ticker: get_order_book(self.session, ticker, tick), tickers)))
+        for tender_id, tender in list(current.items()):
+            if evaluate_tender(self.session, tender, books[tender.ticker]):
+                self.unwind(tender.ticker, UNWIND_DELAY)
+            elif tick < tender.expires:
+                continue  # not profitable yet, look again next cycle
+            else:
+                print(f"Tender {tender_id} expired")
+            self.done.add(tender_id)
+            del self.live[tender_id]
+        return len(self.live)
+
+    def unwind(self, ticker, delay=0):
+        """Zero out a ticker in the background (one thread per ticker at a time)
+
+        If that ticker is already being unwound, the running thread goes round
+        again once it finishes, so a tender accepted mid-unwind is never missed.
+        """
+        with self.lock:
+            self.pending[ticker] = delay
+            if ticker in self.unwinding:
+                return
+            thread = threading.Thread(target=self._unwind, args=(ticker,), daemon=True)
+            self.unwinding[ticker] = thread
+        thread.start()
+
+    def _unwind(self, ticker):
+        while True:
+            with self.lock:
+                if ticker not in self.pending:
+                    # Leave under the lock so a later unwind() starts a new thread
+                    del self.unwinding[ticker]
+                    return
+                delay = self.pending.pop(ticker)
+            if delay:
+                sleep(delay)
+            try:
+                zero_out_tender(self.session, ticker)
+            except Exception as e:  # keep the scheduler running if one unwind fails
+                print(f"Failed to zero out {ticker}: {e}")
 
 def check_liquidity(order_book, tender_quantity, tender_type, tender_price):
     """
@@ -199,29 +244,26 @@ def check_liquidity(order_book, tender_quantity, tender_type, tender_price):
    # Determine if we are buying or selling
     book_side = 'asks' if tender_type == 'BUY' else 'bids'  # Buy checks sell (ask) side, Sell checks buy (bid) side
     price_threshold = tender_price + 0.20 if tender_type == 'BUY' else tender_price - 0.20
+    side = order_book['depth'][book_side]
 
-    cumulative_vol = 0
-    total_vwap = 0
-
-    for level in order_book[book_side]:         
-        price = level['price']
-        if (tender_type == 'BUY' and price >= price_threshold) or (tender_type == 'SELL' and price <= price_threshold):
-             # Add available volume at this price level
-            cumulative_vol += level['cumulative_vol']
-            total_vwap += level['cumulative_vwap'] * level['cumulative_vol']
-            
-             # If cumulative volume is enough to cover tender size
-            if cumulative_vol >= tender_quantity:   
-                 # Calculate the average VWAP and check profitability
-                avg_vwap = total_vwap / cumulative_vol
-                if tender_type == 'BUY':
-                     return tender_price < avg_vwap  # Ensure we can sell at a higher price
-                else:
-                     return tender_price > avg_vwap  # Ensure we can buy at a lower price
-        else:
-            break  # Stop if no better price levels available
+    # Stop if no better price levels available
+    if not side:
+        return False
+    # Every level the unwind reaches must clear the threshold; the book is sorted,
+    # so the levels in between lie between the best and the deepest one
+    for price in (side.best_price, side.last_price(tender_quantity)):
+        if (tender_type == 'BUY' and price < price_threshold) or (tender_type == 'SELL' and price > price_threshold):
+            return False
+
+    # VWAP of the first tender_quantity shares on that side
+    avg_vwap, cumulative_vol, _ = side.vwap(tender_quantity)
+    if cumulative_vol < tender_quantity:
+        return False  # Not enough liquidity to unwind the tender profitably
 
-    return False  # Not enough liquidity to unwind the tender profitably
+    if tender_type == 'BUY':
+        return tender_price < avg_vwap  # Ensure we can sell at a higher price
+    else:
+        return tender_price > avg_vwap  # Ensure we can buy at a lower price
 
 
 # def check_liquidity(order_book, tender_quantity, tender_type, tender_price):
@@ -274,29 +316,26 @@ def check_liquidity(order_book, tender_quantity, tender_type, tender_price):
 
 
 def get_current_price(session, ticker):
-    resp = session.get(f'http://localhost:{Port}/v1/securities/book?ticker=' + ticker)
-    if resp.status_code == 401:
-        raise ApiException('The API key provided in this Python code must match that in the RIT client (please refer to the API hyperlink in the client toolbar and/or the RIT â€“ User Guide â€“ REST API Documentation.pdf)')
-    book = resp.json()
-    calculate_cumulatives(book['bids'])
-    calculate_cumulatives(book['asks'])
+    book = get_order_book(session, ticker)
     # the current price is the last successful price either bid or ask
     current_price = book['bids'][0]['price'] if book['bids'] else book['asks'][0]['price']
     return current_price
 
 def accept_tender(session, tender_id, tender_price, tender_quantity, tender_type, ticker):
-    response = session.post(f"http://localhost:{Port}/v1/tenders/{tender_id}?price={tender_price}")
+    response = session.accept_tender(tender_id, tender_price)
     if response.status_code == 200:
         if tender_type == 'BUY':
             print(f'BOUGHT {tender_quantity} shares of {ticker} at {tender_price}')
         else:
             print(f'SOLD {tender_quantity} shares of {ticker} at {tender_price}')
+        return True
     else:
         print(f"Failed to accept tender offer. Status code: {response.status_code}")
+        return False
 
 
 def decline_tender(session, tender_id, tender_price, tender_quantity, tender_type, ticker):
-    response = session.delete(f"http://localhost:{Port}/v1/tenders/{tender_id}")
+    response = session.decline_tender(tender_id)
 
     if response.status_code == 200:
         if tender_type == 'BUY':
@@ -351,7 +390,7 @@ def decline_tender(session, tender_id, tender_price, tender_quantity, tender_typ
         fulfill_quantity = min(remaining_quantity, available_volume)
         
         # Execute a marketable limit order to accept the order at the current price level
-        response = session.post(f"http://localhost:9999/v1/orders?ticker={ticker}&type=MARKET&quantity={fulfill_quantity}&price={price}&action={opposite_action}")
+        response = session.post_order(ticker, opposite_action, fulfill_quantity, 'MARKET', price)
         
         # Handle the response
         if response.status_code == 200:
@@ -382,72 +421,38 @@ def decline_tender(session, tender_id, tender_price, tender_quantity, tender_typ
 
 def get_position(session, ticker):
     """Helper function to get the current position for the given ticker."""
-    response = session.get(f"http://localhost:{Port}/v1/securities?ticker={ticker}")
-    if response.status_code == 200:
-        security_info = response.json()
-        if isinstance(security_info, list) and len(security_info) > 0:
-            return security_info[0]['position']  # Access the first item in the list and return its position
-        else:
-            raise ApiException(f"No position data found for ticker {ticker}.")
+    quote = session.quotes(ticker).get(ticker)
+    if quote is not None:
+        return quote.position  # Return the current position (positive or negative)
     else:
-        raise ApiException(f"Failed to get position for {ticker}. Status code: {response.status_code}")
+        raise ApiException(f"No position data found for ticker {ticker}.")
 
 
 
 def zero_out_tender(session, ticker):
     """
-    Continuously check the current position and zero it out by fulfilling available orders
-    until the position reaches zero.
+    Trade the ticker's position to zero with as few MARKET orders as the max trade size
+    allows, sent as fast as the order limit allows. The position is read once, then
+    tracked from each fill; one more read at the end catches tenders accepted meanwhile.
     """
-    # Loop until the position is fully zeroed out
-    while True:
-        # Check the current position for the ticker
+    current_position = get_position(session, ticker)
+
+    def depth(fresh):
+        # A slice came back short: the snapshot we planned from is used up
+        if fresh:
+            book_cache.invalidate(ticker)
+        return get_order_book(session, ticker)['depth']
+
+    while current_position != 0:
+        left = liquidate(session, order_limiter, ticker, current_position, depth, MAX_TRADE_SIZE.get(ticker, 10000))
+        # We traded against this snapshot, so the next reader needs a fresh one
+        book_cache.invalidate(ticker)
+        if left != 0:
+            print(f"Warning: Unable to fully zero out, {left} shares of {ticker} remain.")
+            return
         current_position = get_position(session, ticker)
 
-        # If the current position is zero, we're done
-        if current_position == 0:
-            print(f"Position for {ticker} is fully zeroed out.")
-            break
-
-        # Determine whether we need to buy or sell to zero out
-        action = "SELL" if current_position > 0 else "BUY"  # Sell if long (positive), Buy if short (negative)
-        remaining_quantity = abs(current_position)  # We only care about the absolute value of the position
-
-        # Fetch the order book to fulfill available orders
-        order_book = get_order_book(session, ticker)
-        
-        # Depending on the action, check the opposite side of the book
-        book_side = order_book['bids'] if action == "SELL" else order_book['asks']
-
-        # Loop through the book to fulfill available orders
-        for level in book_side:
-            price = level['price']
-            available_volume = level['cumulative_vol']
-            
-            # Determine how much to fulfill from the available volume at this price level
-            fulfill_quantity = min(remaining_quantity, available_volume)
-            
-            # Execute a marketable limit order to fulfill the order at the current price level
-            response = session.post(f"http://localhost:{Port}/v1/orders?ticker={ticker}&type=MARKET&quantity={fulfill_quantity}&price={price}&action={action}")
-            
-            # Handle the response
-            if response.status_code == 200:
-                print(f"Fulfilled {action} order for {fulfill_quantity} shares of {ticker} at price {price}")
-            else:
-                print(f"Failed to fulfill {action} order. Status code: {response.status_code}")
-                break
-            
-            # Decrease the remaining quantity
-            remaining_quantity -= fulfill_quantity
-            if remaining_quantity <= 0:
-                break  # Stop if we've zeroed out the current iteration
-            
-            sleep(0.1)  # Sleep to avoid overwhelming the server with requests too quickly
-
-        # If we can't zero out more at the moment, wait a bit and retry
-        sleep(1)
-
-    print(f"Finished zeroing out the position for {ticker}.")
+    print(f"Position for {ticker} is fully zeroed out.")
 
 
 
@@ -473,13 +478,13 @@ def call_position_on_keypress(session, tickers):
 
 # this is the main method containing the actual order routing logic
 def main():
-    seen_tenders = []
     # creates a session to manage connections and requests to the RIT Client
-    with requests.Session() as s:
-        # add the API key to the session to authenticate during requests
-        s.headers.update(API_KEY)
-        # get the current time of the case
-        tick = get_tick(s)
+    with RitClient(Port, API_KEY) as s:
+        # every live tender is tracked and re-evaluated each cycle
+        scheduler = TenderScheduler(s)
+        # the case time comes from a local clock that only reads /case around tick boundaries
+        clock = CaseClock(s)
+        tick = clock.read()[0]
 
         # while the time is <= 300
         while tick <= 300:
@@ -492,7 +497,7 @@ def main():
             if keyboard.is_pressed('z'):  # If the 'z' key is pressed
                 print("Key 'z' pressed! Zeroing out positions for all tickers...")
                 for ticker in tickers:
-                    zero_out_tender(s, ticker)  # Call zero out function for each ticker
+                    scheduler.unwind(ticker)  # Zero out each ticker without blocking the tenders
             # tickers = ['CRZY', 'TAME']  # List of tickers to zero out
             # zero_out_all_on_keypress(s, tickers)  # Wait for the 'z' keypress to zero out positions for all tickers
             # array to store already seen tender id's
@@ -501,16 +506,12 @@ def main():
             # get and print the two books to the prompt
             # books = depth_view(s)
             # print_books(books)
-            tenders = get_tenders(s)
-            # If the tenders array is not empty, then call the evaluation on it
-            for tender in tenders:
-                if tender['tender_id'] not in seen_tenders:
-                    seen_tenders.append(tender['tender_id'])
-                    evaluate_tender(s, tender)
-            
+            # look at every live tender against one fresh book per ticker
+            scheduler.cycle(tick)
+
 
             # refresh the case time. THIS IS IMPORTANT FOR THE WHILE LOOP
-            tick = get_tick(s)
+            tick = clock.read()[0]
 
 # this calls the main() method when you type 'python lt3.py' into the command prompt
 if __name__ == '__main__':